@@ -0,0 +1,48 @@
+import threading
+import traceback
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class BackgroundTask(QObject):
+    """Runs a function on a thread pool and reports back to the GUI thread through signals.
+
+    The function is called with the given arguments plus two keywords: progress,
+    a callable taking (done, total), and cancelled, a threading.Event that is set
+    when cancel() is called. Its return value is sent with finished.
+    """
+
+    progress = Signal(int, int)
+    finished = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, function, *args, parent=None, **kwargs):
+        super().__init__(parent)
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = threading.Event()
+
+    def start(self, pool=None):
+        (pool or QThreadPool.globalInstance()).start(_TaskRunnable(self))
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _run(self):
+        try:
+            result = self.function(*self.args, progress=self.progress.emit, cancelled=self.cancelled, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.failed.emit(str(e))
+            return
+        self.finished.emit(result)
+
+
+class _TaskRunnable(QRunnable):
+    def __init__(self, task):
+        super().__init__()
+        self.task = task
+
+    def run(self):
+        self.task._run()
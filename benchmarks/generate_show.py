@@ -0,0 +1,149 @@
+"""Synthetic shows for the benchmarks: metadata, shot list sheets and project trees.
+
+    python benchmarks/generate_show.py /tmp/bench --shows 100 --shots 200 --sheet csv --tree
+
+Everything is derived from the show and shot numbers, so the same arguments
+always generate the same data.
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RESOLUTIONS = ['2K', '4K', 'HD', '2048x858', '3840x2160']
+COMMENTS = ['roto and paint', 'sky replacement', 'cleanup rig removal', 'CG integration', 'retime', 'grain match']
+SHEET_COLUMNS = ['SHOW', 'SHOT', 'RESOLUTION', 'FRAME-RANGE', 'COMMENTS']
+
+
+def show_name(show_number):
+    return f'SHOW{show_number:03d}'
+
+
+def shot_name(shot_number):
+    return f'sh{(shot_number + 1) * 10:04d}'
+
+
+def shot_record(show_number, shot_number, project_path):
+    first = 1001
+    last = first + 40 + (show_number * 7 + shot_number * 13) % 200
+    show, shot = show_name(show_number), shot_name(shot_number)
+    return {
+        'show': show,
+        'shot': shot,
+        'frame_range': f'{first}-{last}',
+        'comment': COMMENTS[(show_number + shot_number) % len(COMMENTS)],
+        'resolution': RESOLUTIONS[(show_number + shot_number) % len(RESOLUTIONS)],
+        'footage': '',
+        'elements': '',
+        'path': os.path.join(project_path, show, shot),
+    }
+
+
+def shot_records(shows, shots_per_show, project_path, first_show=0):
+    return [shot_record(show_number, shot_number, project_path)
+            for show_number in range(first_show, first_show + shows) for shot_number in range(shots_per_show)]
+
+
+def write_store(store, records):
+    """Write records into a metadata store in one batch per show."""
+    by_show = {}
+    for record in records:
+        by_show.setdefault(record['show'], []).append(record)
+    for show_records in by_show.values():
+        store.add_shots(show_records)
+    return len(records)
+
+
+def write_json_files(json_dir, records):
+    """Write records as legacy {show}_{shot}_metadata.json files, as older versions did."""
+    os.makedirs(json_dir, exist_ok=True)
+    for record in records:
+        with open(os.path.join(json_dir, f"{record['show']}_{record['shot']}_metadata.json"), 'w') as file:
+            json.dump(record, file, indent=4)
+    return len(records)
+
+
+def write_sheet(path, records):
+    """Write records as a shot list, .csv or .xlsx by the file extension."""
+    rows = [[record['show'], record['shot'], record['resolution'], record['frame_range'], record['comment']]
+            for record in records]
+    if path.endswith('.xlsx'):
+        import openpyxl
+
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(SHEET_COLUMNS)
+        for row in rows:
+            sheet.append(row)
+        workbook.save(path)
+    else:
+        import csv
+
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(SHEET_COLUMNS)
+            writer.writerows(rows)
+    return path
+
+
+def write_nuke_template(path, nodes=200):
+    """Write a template .nk with a Root block and a chain of nodes, sized like a studio template."""
+    lines = ['#! nuke -nx', 'version 14.0 v5', 'Root {', ' inputs 0', ' name template.nk',
+             ' format "2048 1556 0 0 2048 1556 1 2K_Super_35(full-ap)"', ' fps 24', ' colorManagement OCIO', '}']
+    for node in range(nodes):
+        lines += ['Grade {', f' name Grade{node + 1}', f' white {1 + node / 1000:.3f}',
+                  f' xpos {node * 10}', f' ypos {node * 24}', '}']
+    with open(path, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+    return path
+
+
+def write_tree(records, plate_frames=0):
+    """Create the template folders of every record's shot, plus empty plate frames in footages/."""
+    from folder_builder import DEFAULT_FOLDERS, build_folders
+
+    build_folders([record['path'] for record in records], DEFAULT_FOLDERS)
+    for record in records:
+        if plate_frames:
+            plate_folder = os.path.join(record['path'], 'footages')
+            first = int(record['frame_range'].split('-')[0])
+            for frame in range(first, first + plate_frames):
+                open(os.path.join(plate_folder, f"{record['shot']}_plate.{frame:04d}.exr"), 'w').close()
+    return len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate synthetic shows for benchmarks.')
+    parser.add_argument('output', help='Directory to generate into, gets metadata/, projects/ and sheets')
+    parser.add_argument('--shows', type=int, default=100)
+    parser.add_argument('--shots', type=int, default=200, help='Shots per show')
+    parser.add_argument('--backend', default='sqlite', choices=['sqlite', 'manifest', 'json'])
+    parser.add_argument('--sheet', choices=['csv', 'xlsx'], help='Also write a shot list of every shot')
+    parser.add_argument('--tree', action='store_true', help='Also create the shot folders')
+    parser.add_argument('--plate-frames', type=int, default=0, help='Empty plate frames per shot, with --tree')
+    args = parser.parse_args(argv)
+
+    metadata_path = os.path.join(args.output, 'metadata')
+    project_path = os.path.join(args.output, 'projects')
+    records = shot_records(args.shows, args.shots, project_path)
+
+    if args.backend == 'json':
+        write_json_files(metadata_path, records)
+    else:
+        from metadata_store import open_store
+
+        write_store(open_store(metadata_path, args.backend), records)
+    print(f'{len(records)} shots in {metadata_path}')
+    if args.sheet:
+        print(f"Shot list: {write_sheet(os.path.join(args.output, 'shots.' + args.sheet), records)}")
+    print(f"Nuke template: {write_nuke_template(os.path.join(args.output, 'template.nk'))}")
+    if args.tree:
+        write_tree(records, args.plate_frames)
+        print(f'Shot folders in {project_path}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,417 @@
+"""Time the slow paths of the show manager and launcher on synthetic shows, offscreen.
+
+    python benchmarks/run_benchmarks.py --save-baseline baseline.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --threshold 1.3
+
+Each benchmark runs --repeat times and its median is kept. With --baseline
+the medians are compared against an earlier run and the exit code is 1 when
+any of them got slower than its threshold allows, so a CI job can fail on it.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+DEFAULT_THRESHOLD = 1.25  # A median this many times the baseline's is a regression
+MIN_REGRESSION_SECONDS = 0.005  # Slowdowns smaller than this are timer noise, whatever their ratio
+WAIT_SECONDS = 120  # Longest a benchmark may wait for background work before it fails
+
+BENCHMARKS = {}  # Name -> function(context) returning the seconds one run took
+
+
+def benchmark(function):
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+def isolate(home):
+    """Point every path and socket the apps use into a throwaway home before they are imported."""
+    os.environ['HOME'] = home
+    os.environ['USERPROFILE'] = home
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    os.environ['SHOW_MANAGER_CHANGE_SOCKET'] = ''  # No change feed between the benchmark windows
+    os.environ['SHOW_MANAGER_FOLDER_TEMPLATE'] = os.path.join(home, 'folder_template.json')
+    os.environ['SHOW_MANAGER_NUKE_TEMPLATE'] = os.path.join(home, 'template.nk')
+    os.environ['SHOW_MANAGER_SOFTWARE_CONFIG'] = os.path.join(home, 'software.json')
+
+
+def wait_until(app, condition, what):
+    deadline = time.perf_counter() + WAIT_SECONDS
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f'Timed out waiting for {what}')
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+class SignalWaiter:
+    """Notes a signal being emitted with a value, created before the work starts so it can't be missed."""
+
+    def __init__(self, signal, value):
+        self.signal = signal
+        self.value = value
+        self.emitted = False
+        signal.connect(self._on_emitted)
+
+    def _on_emitted(self, argument):
+        if argument == self.value:
+            self.emitted = True
+
+    def wait(self, app, what):
+        try:
+            wait_until(app, lambda: self.emitted, what)
+        finally:
+            self.signal.disconnect(self._on_emitted)
+
+
+def settle(app, window):
+    """Let the loader finish whatever a benchmark queued, outside the timed part."""
+    window.loader.pool.waitForDone()
+    app.processEvents()
+
+
+class Context:
+    """The generated data and the windows shared by all benchmarks of a run."""
+
+    def __init__(self, args, home):
+        import generate_show
+        from PySide6.QtWidgets import QApplication
+        from metadata_store import METADATA_DIR, open_store
+
+        self.args = args
+        self.home = home
+        self.project_path = os.path.join(home, 'projects')
+        self.app = QApplication.instance() or QApplication([])
+
+        generate_show.write_nuke_template(os.environ['SHOW_MANAGER_NUKE_TEMPLATE'])
+        with open(os.environ['SHOW_MANAGER_SOFTWARE_CONFIG'], 'w') as file:
+            json.dump({'nuke': sys.executable}, file)  # Launch contexts need an executable that exists
+        self.records = generate_show.shot_records(args.shows, args.shots, self.project_path)
+        generate_show.write_store(open_store(METADATA_DIR), self.records)
+        self.show_names = sorted({record['show'] for record in self.records})
+        self._next_show = args.shows  # Shows past the generated ones, for benchmarks that add shots
+        self._manager = None
+        self._launcher = None
+
+    def new_records(self, count):
+        """Records of shots in shows nobody has seen yet, so every run writes new shots."""
+        import generate_show
+
+        shows = -(-count // self.args.shots)
+        records = generate_show.shot_records(shows, self.args.shots, self.project_path, self._next_show)[:count]
+        self._next_show += shows
+        return records
+
+    def manager(self):
+        if self._manager is None:
+            from show_manager import ShowShotManager
+
+            self._manager = ShowShotManager()
+            self._manager.project_path = self.project_path
+            wait_until(self.app, lambda: self._manager.shows, 'the show manager to start')
+            settle(self.app, self._manager)
+        return self._manager
+
+    def launcher(self):
+        if self._launcher is None:
+            from project_launcher import ProjectLauncher
+
+            self._launcher = ProjectLauncher()
+            wait_until(self.app, lambda: self._launcher.shows, 'the launcher to start')
+            settle(self.app, self._launcher)
+        return self._launcher
+
+    def close(self):
+        for window in (self._manager, self._launcher):
+            if window is not None:
+                window.close()
+        self.app.processEvents()
+
+
+def reset_shows(window):
+    window.show_dropdown.blockSignals(True)
+    window.show_dropdown.clear()
+    window.show_dropdown.blockSignals(False)
+    window.shows.clear()
+    window.registry = type(window.registry)()
+    window.shot_model.set_shots([])
+
+
+@benchmark
+def manager_load_existing_shows(context):
+    """Show manager: read the show list until the loader reports it complete."""
+    window = context.manager()
+    reset_shows(window)
+    waiter = SignalWaiter(window.loader.finished, '')
+    start = time.perf_counter()
+    window.load_existing_shows()
+    waiter.wait(context.app, 'the show list')
+    wait_until(context.app, lambda: len(window.shows) == len(context.show_names), 'the show dropdown')
+    end = time.perf_counter()
+    settle(context.app, window)
+    return end - start
+
+
+@benchmark
+def launcher_load_shows(context):
+    """Launcher: read the show list until the loader reports it complete."""
+    window = context.launcher()
+    reset_shows(window)
+    waiter = SignalWaiter(window.loader.finished, '')
+    start = time.perf_counter()
+    window.load_shows()
+    waiter.wait(context.app, 'the show list')
+    wait_until(context.app, lambda: len(window.shows) == len(context.show_names), 'the show dropdown')
+    end = time.perf_counter()
+    settle(context.app, window)
+    return end - start
+
+
+@benchmark
+def manager_update_table(context):
+    """Show manager: open a show that was not read yet, until all its shots are in the table."""
+    window = context.manager()
+    show_name = context.show_names[-1]
+    window.shows[show_name] = None
+    window.registry.remove_show(show_name)
+    waiter = SignalWaiter(window.loader.finished, show_name)
+    start = time.perf_counter()
+    window.update_table(show_name)
+    waiter.wait(context.app, f'the shots of {show_name}')
+    # The loader is done once it sent the last batch, the table once that batch arrived
+    wait_until(context.app, lambda: window.shot_model.rowCount() == context.args.shots, f'the {show_name} table')
+    end = time.perf_counter()
+    return end - start
+
+
+@benchmark
+def launcher_update_table(context):
+    """Launcher: open a show that was not read yet, until all its shots are in the table."""
+    window = context.launcher()
+    show_name = context.show_names[-1]
+    window.shows[show_name] = None
+    window.registry.remove_show(show_name)
+    window.show_dropdown.blockSignals(True)
+    window.show_dropdown.setCurrentText(show_name)
+    window.show_dropdown.blockSignals(False)
+    waiter = SignalWaiter(window.loader.finished, show_name)
+    start = time.perf_counter()
+    window.load_shots_for_show()
+    waiter.wait(context.app, f'the shots of {show_name}')
+    # The loader is done once it sent the last batch, the table once that batch arrived
+    wait_until(context.app, lambda: window.shot_model.rowCount() == context.args.shots, f'the {show_name} table')
+    end = time.perf_counter()
+    return end - start
+
+
+@benchmark
+def manager_load_from_excel(context):
+    """Show manager: import a shot list of new shots, up to their folders being created."""
+    import generate_show
+    import show_manager
+    from PySide6.QtWidgets import QDialog
+
+    window = context.manager()
+    records = context.new_records(context.args.sheet_shots)
+    sheet_path = generate_show.write_sheet(
+        os.path.join(context.home, f'shots_{records[0]["show"]}.{context.args.sheet_format}'), records)
+
+    # The file dialog, the review dialog and the Nuke script question are answered by the benchmark
+    class FileDialog:
+        @staticmethod
+        def getOpenFileName(*args, **kwargs):
+            return sheet_path, ''
+
+    class MessageBox(show_manager.QMessageBox):
+        @staticmethod
+        def question(*args, **kwargs):
+            return show_manager.QMessageBox.No
+
+        @staticmethod
+        def warning(parent, title, text, *args, **kwargs):
+            raise RuntimeError(text)
+
+    patched = {'QFileDialog': FileDialog, 'QMessageBox': MessageBox}
+    originals = {name: getattr(show_manager, name) for name in patched}
+    original_exec = show_manager.ReviewDialog.exec_
+    for name, value in patched.items():
+        setattr(show_manager, name, value)
+    show_manager.ReviewDialog.exec_ = lambda dialog: QDialog.Accepted
+    try:
+        start = time.perf_counter()
+        window.load_from_excel()
+        wait_until(context.app, lambda: window.folder_task is None, 'the folders of the imported shots')
+        end = time.perf_counter()
+    finally:
+        for name, value in originals.items():
+            setattr(show_manager, name, value)
+        show_manager.ReviewDialog.exec_ = original_exec
+
+    assert all(os.path.isdir(os.path.join(record['path'], 'comp')) for record in records)
+    settle(context.app, window)
+    return end - start
+
+
+@benchmark
+def manager_create_folder_structure(context):
+    """Show manager: create the template folders of new shots one at a time."""
+    window = context.manager()
+    records = context.new_records(context.args.folder_shots)
+    start = time.perf_counter()
+    for record in records:
+        window.create_folder_structure(record['show'], record['shot'])
+    return time.perf_counter() - start
+
+
+@benchmark
+def nuke_launch_scripts(context):
+    """Make the Nuke launch context of many shots for the first time, writing their startup scripts."""
+    from shot_record import Shot
+    from launch_context import LaunchContextCache
+
+    shots = [Shot(**record) for record in context.records[:context.args.nuke_shots]]
+    contexts = LaunchContextCache(script_dir=tempfile.mkdtemp(dir=context.home))
+    start = time.perf_counter()
+    for shot in shots:
+        contexts.context('nuke', shot)
+    return time.perf_counter() - start
+
+
+@benchmark
+def nuke_launch_contexts_cached(context):
+    """Look up the Nuke launch context of many shots again, as every launch after the first does."""
+    from shot_record import Shot
+    from launch_context import LaunchContextCache
+
+    shots = [Shot(**record) for record in context.records[:context.args.nuke_shots]]
+    contexts = LaunchContextCache(script_dir=tempfile.mkdtemp(dir=context.home))
+    contexts.precompute(shots, ['nuke'])
+    start = time.perf_counter()
+    for shot in shots:
+        contexts.context('nuke', shot)
+    return time.perf_counter() - start
+
+
+@benchmark
+def nuke_generate_show_scripts(context):
+    """Write v001 scripts from the template for many shots, as Generate Nuke Scripts does."""
+    from nuke_script_generator import generate_show_scripts
+
+    records = context.records[:context.args.nuke_shots]
+    start = time.perf_counter()
+    results = generate_show_scripts(records, overwrite=True)
+    elapsed = time.perf_counter() - start
+    assert all(status == 'created' for _, _, status, _ in results)
+    return elapsed
+
+
+def run(args, names):
+    home = tempfile.mkdtemp(prefix='show_manager_bench_')
+    isolate(home)
+    try:
+        print(f'Generating {args.shows} shows of {args.shots} shots in {home}...')
+        context = Context(args, home)
+        results = {}
+        try:
+            for name in names:
+                runs = [BENCHMARKS[name](context) for _ in range(args.repeat)]
+                results[name] = {'median': statistics.median(runs), 'min': min(runs), 'runs': runs}
+                print(f'{name:34} {results[name]["median"] * 1000:10.1f} ms  (min {min(runs) * 1000:.1f} ms)')
+        finally:
+            context.close()
+    finally:
+        if not args.keep:
+            shutil.rmtree(home, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, threshold, thresholds):
+    """Print each median against the baseline's and return the names of the benchmarks that regressed."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline.get('results', {}):
+            print(f'{name:34} not in the baseline')
+            continue
+        before = baseline['results'][name]['median']
+        ratio = result['median'] / before if before else float('inf')
+        limit = thresholds.get(name, threshold)
+        regressed = ratio > limit and result['median'] - before > MIN_REGRESSION_SECONDS
+        if regressed:
+            regressions.append(name)
+        print(f'{name:34} {before * 1000:10.1f} -> {result["median"] * 1000:10.1f} ms  x{ratio:.2f}'
+              f'{"  REGRESSION, limit x" + format(limit, ".2f") if regressed else ""}')
+    return regressions
+
+
+def _parse_thresholds(values):
+    thresholds = {}
+    for value in values:
+        name, separator, ratio = value.partition('=')
+        if not separator or name not in BENCHMARKS:
+            raise SystemExit(f'Expected BENCHMARK=RATIO with one of: {", ".join(BENCHMARKS)}, got {value!r}')
+        thresholds[name] = float(ratio)
+    return thresholds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the show manager and launcher on synthetic shows.')
+    parser.add_argument('--shows', type=int, default=100)
+    parser.add_argument('--shots', type=int, default=200, help='Shots per show')
+    parser.add_argument('--sheet-shots', type=int, default=1000, help='Shots in the imported shot list')
+    parser.add_argument('--sheet-format', choices=['xlsx', 'csv'], default='xlsx')
+    parser.add_argument('--folder-shots', type=int, default=500, help='Shots create_folder_structure is run for')
+    parser.add_argument('--nuke-shots', type=int, default=500, help='Shots Nuke scripts are written for')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help='Run only these benchmarks')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--save-baseline', help='Write the results as the baseline to compare later runs against')
+    parser.add_argument('--baseline', help='Compare against this baseline, exit code 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Allowed median / baseline median ratio (default {DEFAULT_THRESHOLD})')
+    parser.add_argument('--threshold-for', action='append', default=[], metavar='BENCHMARK=RATIO',
+                        help='Allowed ratio of one benchmark, for the noisy ones')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated data')
+    args = parser.parse_args(argv)
+    thresholds = _parse_thresholds(args.threshold_for)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    results = run(args, args.only or list(BENCHMARKS))
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'parameters': {name: getattr(args, name) for name in
+                       ('shows', 'shots', 'sheet_shots', 'sheet_format', 'folder_shots', 'nuke_shots', 'repeat')},
+        'results': results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f'Results written to {path}')
+
+    if baseline is None:
+        return 0
+    if baseline.get('parameters') != report['parameters']:
+        print(f'Warning: the baseline was run with {baseline.get("parameters")}, timings may not compare.')
+    regressions = compare(results, baseline, args.threshold, thresholds)
+    if regressions:
+        print(f'{len(regressions)} benchmarks regressed: {", ".join(regressions)}')
+        return 1
+    print('No regressions.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
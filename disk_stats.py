@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+STATS_CACHE_FILE = os.path.join(os.path.expanduser('~/.nuke'), 'show_manager', 'disk_stats.json')
+CACHE_VERSION = 1
+MAX_WORKERS = 8  # Enough to hide network latency without flooding the file server
+ACTIVE_DAYS = 7  # A shot with a file changed this recently counts as active
+OTHER_FOLDER = 'other'  # Files in the shot folder itself and folders that aren't in the template
+
+
+class FolderStats:
+    """Bytes, file count and newest modification time of a folder tree."""
+
+    __slots__ = ('bytes', 'files', 'latest')
+
+    def __init__(self, nbytes=0, files=0, latest=0.0):
+        self.bytes = nbytes
+        self.files = files
+        self.latest = latest
+
+    def add(self, nbytes, files, latest):
+        self.bytes += nbytes
+        self.files += files
+        if latest > self.latest:
+            self.latest = latest
+
+    def __repr__(self):
+        return f'FolderStats({self.bytes}, {self.files}, {self.latest})'
+
+
+def format_size(nbytes):
+    """'512 B', '3.4 MB', '1.2 TB'."""
+    size = float(nbytes)
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+class DiskStatsScanner:
+    """Sizes of folder trees, cached per folder until its mtime changes.
+
+    A folder's mtime changes when files are added, removed or renamed in it,
+    so a refresh only lists the folders that changed and stats the others.
+    A file rewritten in place keeps its folder's mtime, scan with full=True
+    to measure everything again. With a cache_file the cache is kept between
+    sessions, see load and save.
+    """
+
+    def __init__(self, cache_file=None):
+        self.cache_file = cache_file
+        self._loaded = cache_file is None
+        self._lock = threading.Lock()
+        self._folders = {}  # folder -> (mtime_ns, bytes, files, newest mtime, subfolder names)
+
+    def _folder(self, folder, full=False):
+        try:
+            stat = os.stat(folder)
+        except OSError:
+            with self._lock:
+                self._folders.pop(folder, None)
+            return None
+
+        if not full:
+            with self._lock:
+                cached = self._folders.get(folder)
+            if cached and cached[0] == stat.st_mtime_ns:
+                return cached
+
+        nbytes = files = 0
+        latest = stat.st_mtime  # Removing files is activity too
+        subfolders = []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subfolders.append(entry.name)
+                            continue
+                        entry_stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue  # Removed while listing
+                    nbytes += entry_stat.st_size
+                    files += 1
+                    if entry_stat.st_mtime > latest:
+                        latest = entry_stat.st_mtime
+        except OSError as e:
+            print(f'Could not list {folder}: {e}')
+            return None
+
+        record = (stat.st_mtime_ns, nbytes, files, latest, subfolders)
+        with self._lock:
+            self._folders[folder] = record
+        return record
+
+    def tree(self, folder, full=False):
+        """Return the FolderStats of a folder and everything below it."""
+        stats = FolderStats()
+        pending = [folder]
+        while pending:
+            path = pending.pop()
+            record = self._folder(path, full)
+            if record is None:
+                continue
+            stats.add(record[1], record[2], record[3])
+            pending.extend(os.path.join(path, name) for name in record[4])
+        return stats
+
+    def shot(self, shot_path, full=False):
+        """Return {top level folder name: FolderStats} of a shot folder, or None if it doesn't exist.
+
+        Files directly in the shot folder are under ''.
+        """
+        record = self._folder(shot_path, full)
+        if record is None:
+            return None
+        stats = {'': FolderStats(record[1], record[2], record[3])}
+        for name in record[4]:
+            stats[name] = self.tree(os.path.join(shot_path, name), full)
+        return stats
+
+    def invalidate(self, folder=None):
+        """Forget a folder tree, or everything if folder is None."""
+        with self._lock:
+            if folder is None:
+                self._folders.clear()
+                return
+            prefix = os.path.join(folder, '')
+            for path in [path for path in self._folders if path == folder or path.startswith(prefix)]:
+                del self._folders[path]
+
+    # Kept between sessions, so the first refresh of a day only lists what changed
+
+    def load(self):
+        """Read the cache file once, folders measured in this session win."""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.cache_file, 'r') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f'Could not read the disk usage cache {self.cache_file}, folders are measured again: {e}')
+            return
+        if data.get('version') != CACHE_VERSION:
+            return
+        with self._lock:
+            for folder, record in data.get('folders', {}).items():
+                self._folders.setdefault(folder, tuple(record))
+
+    def save(self):
+        if not self.cache_file:
+            return
+        with self._lock:
+            folders = dict(self._folders)
+        temp_path = f'{self.cache_file}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(temp_path, 'w') as file:
+                json.dump({'version': CACHE_VERSION, 'folders': folders}, file, separators=(',', ':'))
+            os.replace(temp_path, self.cache_file)  # Another app saving at the same time never leaves half a file
+        except OSError as e:
+            print(f'Could not write the disk usage cache {self.cache_file}: {e}')
+
+
+def folder_columns(template_folders):
+    """Top level folders of a folder template, in template order, plus OTHER_FOLDER."""
+    names = []
+    for folder in template_folders:
+        name = folder.split('/')[0]
+        if name not in names:
+            names.append(name)
+    return names + [OTHER_FOLDER]
+
+
+def usage_key(folder_name):
+    """Row key of a folder's byte count in the rows of shot_disk_usage."""
+    return 'bytes:' + folder_name
+
+
+def shot_disk_usage(shots, folder_names, scanner=None, full=False, workers=MAX_WORKERS, progress=None, cancelled=None):
+    """Measure the folders of many shots on a bounded thread pool.
+
+    Returns one row dict per shot with show, shot, path, size, files, latest
+    (newest mtime) and the bytes of every folder in folder_names under
+    usage_key(name); folders not named, and files in the shot folder itself,
+    count as OTHER_FOLDER. Shots without a folder get missing=True. Shots
+    that weren't reached before cancelled was set are left out.
+    """
+    scanner = scanner or DiskStatsScanner()
+    scanner.load()
+    shots = [shot for shot in shots if shot.get('path')]
+    total = len(shots)
+    rows = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(scanner.shot, shot['path'], full): position for position, shot in enumerate(shots)}
+        for done, future in enumerate(as_completed(futures), 1):
+            if future.cancelled():
+                continue
+            position = futures[future]
+            shot = shots[position]
+            row = {'show': shot.get('show', ''), 'shot': shot.get('shot', ''), 'path': shot['path'],
+                   'size': 0, 'files': 0, 'latest': 0.0, 'missing': False}
+            row.update((usage_key(name), 0) for name in folder_names)
+            stats = future.result()
+            if stats is None:
+                row['missing'] = True
+            else:
+                for name, folder_stats in stats.items():
+                    key = usage_key(name if name in folder_names else OTHER_FOLDER)
+                    row[key] = row.get(key, 0) + folder_stats.bytes
+                    row['size'] += folder_stats.bytes
+                    row['files'] += folder_stats.files
+                    row['latest'] = max(row['latest'], folder_stats.latest)
+            rows[position] = row
+
+            if progress:
+                progress(done, total)
+            if cancelled is not None and cancelled.is_set():
+                for pending in futures:
+                    pending.cancel()
+
+    scanner.save()  # Also when cancelled, every folder measured so far is up to date
+    return [rows[position] for position in sorted(rows)]
+
+
+def show_summaries(rows, folder_names, active_days=ACTIVE_DAYS, now=None):
+    """Add up the rows of shot_disk_usage per show.
+
+    Returns {show: dict of shots, size, files, active (shots changed in the
+    last active_days), missing, latest and folders {name: bytes}}.
+    """
+    active_since = (now or time.time()) - active_days * 86400
+    summaries = {}
+    for row in rows:
+        summary = summaries.get(row['show'])
+        if summary is None:
+            summary = summaries[row['show']] = {'shots': 0, 'size': 0, 'files': 0, 'active': 0, 'missing': 0,
+                                                 'latest': 0.0, 'folders': dict.fromkeys(folder_names, 0)}
+        summary['shots'] += 1
+        summary['size'] += row['size']
+        summary['files'] += row['files']
+        summary['missing'] += row['missing']
+        summary['active'] += row['latest'] >= active_since
+        summary['latest'] = max(summary['latest'], row['latest'])
+        for name in folder_names:
+            summary['folders'][name] += row.get(usage_key(name), 0)
+    return summaries
+
+
+def summary_text(show_name, summary, active_days=ACTIVE_DAYS):
+    """One paragraph about a show's disk usage, e.g. for a status line or the command line."""
+    text = (f"{show_name}: {format_size(summary['size'])} in {summary['files']:,} files, "
+            f"{summary['shots']} shots, {summary['active']} changed in the last {active_days} days")
+    if summary['missing']:
+        text += f", {summary['missing']} without a folder"
+    largest = sorted(((nbytes, name) for name, nbytes in summary['folders'].items() if nbytes), reverse=True)[:4]
+    if largest:
+        text += '. Largest: ' + ', '.join(f'{name} {format_size(nbytes)}' for nbytes, name in largest)
+    return text + '.'
@@ -0,0 +1,112 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from instrumentation import span, timed
+
+FOLDER_TEMPLATE_FILE = os.environ.get(
+    'SHOW_MANAGER_FOLDER_TEMPLATE',
+    os.path.join(os.path.expanduser('~/.nuke'), 'show_manager', 'folder_template.json'))
+
+# Used when there is no template file, a template file holds a JSON list like this one
+DEFAULT_FOLDERS = [
+    'comp', 'fx', 'lighting', 'roto', 'prep', 'footages', 'elements',
+    'nuke', 'houdini', 'silhouette', 'mari', 'substance', 'katana',
+]
+
+MAX_WORKERS = 8  # Enough to hide network latency without flooding the file server
+
+
+def load_folder_template(template_file=FOLDER_TEMPLATE_FILE):
+    """Return the list of folders every shot gets, relative to the shot folder."""
+    if not os.path.exists(template_file):
+        return list(DEFAULT_FOLDERS)
+
+    try:
+        with open(template_file, 'r') as file:
+            folders = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f'Could not read folder template {template_file}, using the default folders: {e}')
+        return list(DEFAULT_FOLDERS)
+
+    if not isinstance(folders, list):
+        print(f'Folder template {template_file} should hold a JSON list of folder names, using the default folders.')
+        return list(DEFAULT_FOLDERS)
+
+    template = []
+    for folder in folders:
+        problem = template_folder_problem(folder)
+        if problem:
+            print(f'Skipping folder {folder!r} of folder template {template_file}: {problem}')
+            continue
+        # Nested folders are written with '/', whatever the platform
+        template.append('/'.join(part for part in folder.replace('\\', '/').split('/') if part not in ('', '.')))
+    return template
+
+
+def template_folder_problem(folder):
+    """Why a folder template entry can't be used, or '' if it is a folder inside the shot folder."""
+    if not isinstance(folder, str):
+        return 'folder names must be strings'
+    path = folder.replace('\\', '/')
+    if path.startswith('/') or os.path.isabs(folder) or os.path.splitdrive(folder)[0]:
+        return 'folders must be relative to the shot folder'
+    parts = [part for part in path.split('/') if part not in ('', '.')]
+    if not parts:
+        return 'the folder name is empty'
+    if '..' in parts:
+        return "'..' would leave the shot folder"
+    return ''
+
+
+def missing_shot_folders(shot_path, folders):
+    """Return the template folders a shot doesn't have, with one scandir for the top level."""
+    try:
+        existing = {entry.name for entry in os.scandir(shot_path) if entry.is_dir()}
+    except FileNotFoundError:
+        return list(folders)
+
+    missing = []
+    for folder in folders:
+        top, _, rest = folder.partition('/')
+        if top not in existing or (rest and not os.path.isdir(os.path.join(shot_path, folder))):
+            missing.append(folder)
+    return missing
+
+
+@timed('folders.build_shot', count=len)
+def build_shot_folders(shot_path, folders):
+    """Create the template folders a shot is missing and return the ones created."""
+    missing = missing_shot_folders(shot_path, folders)
+    for folder in missing:
+        os.makedirs(os.path.join(shot_path, *folder.split('/')), exist_ok=True)
+    return missing
+
+
+def build_folders(shot_paths, folders, workers=MAX_WORKERS, progress=None, cancelled=None):
+    """Create missing folders for many shots on a bounded thread pool.
+
+    Returns a dict of shot path -> (created folders, error message or ''). Shots
+    that weren't reached before cancelled was set are left out.
+    """
+    results = {}
+    shot_paths = list(dict.fromkeys(shot_paths))
+    total = len(shot_paths)
+
+    with span('folders.build', shots=total), ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(build_shot_folders, path, folders): path for path in shot_paths}
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            if future.cancelled():
+                continue
+            try:
+                results[path] = (future.result(), '')
+            except OSError as e:
+                results[path] = ([], str(e))
+
+            if progress:
+                progress(done, total)
+            if cancelled is not None and cancelled.is_set():
+                for pending in futures:
+                    pending.cancel()
+
+    return results
@@ -0,0 +1,58 @@
+import os
+from PySide6.QtCore import QDir, QSize, Qt
+from PySide6.QtGui import QIcon, QPixmap
+from instrumentation import span
+
+ICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'icons')
+
+# Icon name -> file in icons/, read through the 'icons:' search path
+SOFTWARE_ICONS = {
+    'nuke': 'oundry_n_icon.png',
+    'houdini': 'houdini_icon.png',
+    'substance': 'substance_icon.png',
+    'katana': 'katana_icon.jpeg',
+}
+
+_icons = {}  # name -> QIcon
+_pixmaps = {}  # (name, width, height, device pixel ratio) -> scaled QPixmap
+
+
+def _register_search_path():
+    if ICON_DIR not in QDir.searchPaths('icons'):
+        QDir.addSearchPath('icons', ICON_DIR)
+
+
+def icon_file(name):
+    return 'icons:' + SOFTWARE_ICONS.get(name, name)
+
+
+def icon(name):
+    """Return the QIcon of an icon name, each file is read once per process."""
+    if name not in _icons:
+        _register_search_path()
+        _icons[name] = QIcon(icon_file(name))
+    return _icons[name]
+
+
+def pixmap(name, size, device_pixel_ratio=1.0):
+    """Return an icon scaled to size for the given screen, decoded and scaled once per process.
+
+    A null QPixmap is returned (and cached) when the icon file can't be read.
+    """
+    size = QSize(size)
+    key = (name, size.width(), size.height(), device_pixel_ratio)
+    cached = _pixmaps.get(key)
+    if cached is None:
+        _register_search_path()
+        with span('icons.decode', icon=name):
+            cached = QPixmap(icon_file(name))
+            if not cached.isNull():
+                cached = cached.scaled(size * device_pixel_ratio, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                cached.setDevicePixelRatio(device_pixel_ratio)
+        _pixmaps[key] = cached
+    return cached
+
+
+def clear():
+    _icons.clear()
+    _pixmaps.clear()
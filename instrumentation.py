@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import atexit
+import threading
+from functools import wraps
+
+# Both are off unless set, timing then costs one function call per instrumented block
+TRACE_FILE = os.environ.get('SHOW_MANAGER_TRACE', '')  # Chrome trace JSON written at exit, open it in ui.perfetto.dev
+TIMING_LOG = os.environ.get('SHOW_MANAGER_TIMING_LOG', '')  # Rotating log of per-operation summaries
+SUMMARY_SECONDS = float(os.environ.get('SHOW_MANAGER_TIMING_INTERVAL', 60))
+ENABLED = bool(TRACE_FILE or TIMING_LOG)
+
+MAX_TRACE_EVENTS = 200000  # Later events are dropped, a long session must not grow without bound
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+_lock = threading.Lock()
+_origin = time.perf_counter_ns()
+_events = []
+_thread_names = {}  # thread id -> name, written as trace metadata
+_dropped_events = 0
+_stats = {}  # name -> [calls, total ns, max ns, items, bytes, errors], since the last summary
+_flusher = None  # Daemon thread logging the summary every SUMMARY_SECONDS, started by the first span
+_log_lock = threading.Lock()
+_logger = None
+
+
+class _Span:
+    __slots__ = ('name', 'args', 'count', 'bytes', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.count = 0
+        self.bytes = 0
+
+    def add(self, count=0, nbytes=0):
+        """Add items handled and bytes read or written to the span."""
+        self.count += count
+        self.bytes += nbytes
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _record(self, time.perf_counter_ns(), exc_type is not None)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def add(self, count=0, nbytes=0):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **args):
+    """Time a block, with span('folders.build', shots=10) as s: ... s.add(count=..., nbytes=...).
+
+    Keyword arguments are shown with the span in the trace.
+    """
+    return _Span(name, args) if ENABLED else _NULL_SPAN
+
+
+def timed(name, count=None):
+    """Decorator timing every call of a function, count(result) gives the items it handled.
+
+    When instrumentation is off the function is returned as it is.
+    """
+    def decorate(function):
+        if not ENABLED:
+            return function
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with _Span(name, None) as timing:
+                result = function(*args, **kwargs)
+                if count is not None:
+                    timing.count += count(result)
+                return result
+        return wrapper
+    return decorate
+
+
+def _record(timing, end, failed):
+    global _dropped_events, _flusher
+    duration = end - timing.start
+    thread = threading.current_thread()
+    with _lock:
+        if TRACE_FILE:
+            if len(_events) < MAX_TRACE_EVENTS:
+                args = dict(timing.args) if timing.args else {}
+                if timing.count:
+                    args['count'] = timing.count
+                if timing.bytes:
+                    args['bytes'] = timing.bytes
+                if failed:
+                    args['error'] = True
+                _events.append((timing.name, timing.start, duration, thread.ident, args))
+                _thread_names.setdefault(thread.ident, thread.name)
+            else:
+                _dropped_events += 1
+        if TIMING_LOG:
+            stats = _stats.get(timing.name)
+            if stats is None:
+                stats = _stats[timing.name] = [0, 0, 0, 0, 0, 0]
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+            stats[3] += timing.count
+            stats[4] += timing.bytes
+            stats[5] += failed
+            if _flusher is None:
+                _flusher = threading.Thread(target=_flush_periodically, name='timing summary', daemon=True)
+                _flusher.start()
+
+
+def _take_summary():
+    """Return the stats gathered since the last summary and start over, call with _lock held."""
+    global _stats
+    stats, _stats = _stats, {}
+    return stats
+
+
+def flush_summary():
+    """Log the operations timed since the last summary, if there were any."""
+    with _lock:
+        summary = _take_summary()
+    if summary:
+        _log_summary(summary)
+
+
+def _flush_periodically():
+    # Runs on its own, so operations timed just before a session goes idle are logged on time too
+    while True:
+        time.sleep(SUMMARY_SECONDS)
+        flush_summary()
+
+
+def format_summary(stats):
+    lines = [f"{'operation':32} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'items':>9} {'MiB':>8}"]
+    for name, (calls, total, longest, items, nbytes, errors) in sorted(stats.items(), key=lambda item: -item[1][1]):
+        line = (f'{name:32} {calls:7} {total / 1e6:10.1f} {total / calls / 1e6:9.2f} {longest / 1e6:9.1f} '
+                f'{items:9} {nbytes / 1048576:8.1f}')
+        lines.append(line + (f'  {errors} failed' if errors else ''))
+    return '\n'.join(lines)
+
+
+def _log_summary(stats):
+    with _log_lock:
+        _write_summary(stats)
+
+
+def _write_summary(stats):
+    global _logger
+    if _logger is None:
+        import logging  # Only when there is something to log, the command line starts faster without it
+        from logging.handlers import RotatingFileHandler
+
+        _logger = logging.getLogger('show_manager.timing')
+        _logger.propagate = False
+        _logger.setLevel(logging.INFO)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(TIMING_LOG)), exist_ok=True)
+            handler = RotatingFileHandler(TIMING_LOG, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+        except OSError as e:
+            print(f'Could not open timing log {TIMING_LOG}: {e}')
+            handler = logging.NullHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s pid %(process)d\n%(message)s'))
+        _logger.addHandler(handler)
+    _logger.info(format_summary(stats))
+
+
+def write_trace(path=None):
+    """Write the recorded spans as Chrome trace JSON, returns the number of events written.
+
+    '{pid}' in the path is replaced by the process id, for apps running side by side.
+    """
+    path = (path or TRACE_FILE).replace('{pid}', str(os.getpid()))
+    with _lock:
+        events = list(_events)
+        thread_names = dict(_thread_names)
+        dropped = _dropped_events
+
+    pid = os.getpid()
+    trace = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+             for tid, name in thread_names.items()]
+    for name, start, duration, tid, args in events:
+        trace.append({'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'pid': pid, 'tid': tid,
+                      'ts': (start - _origin) / 1000, 'dur': duration / 1000, 'args': args})
+    with open(path, 'w') as file:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms', 'otherData': {'dropped_events': dropped}}, file)
+    return len(events)
+
+
+def _at_exit():
+    if TIMING_LOG:
+        flush_summary()
+    if TRACE_FILE:
+        try:
+            write_trace()
+        except OSError as e:
+            print(f'Could not write trace {TRACE_FILE}: {e}')
+
+
+if ENABLED:
+    atexit.register(_at_exit)
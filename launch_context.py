@@ -0,0 +1,305 @@
+"""What launching software for a shot needs, worked out before the click.
+
+A LaunchContext is the command, the extra environment (SHOW, SHOT,
+FRAME_RANGE, ...) and, for Nuke, the startup script of one shot in one
+application. LaunchContextCache keeps them per shot and keys each by a hash of
+the metadata it was made from, so a launch is a dict lookup and a process
+spawn, and a changed shot gets a new context the next time it is asked for.
+Startup scripts are written once per hash to LAUNCH_SCRIPT_DIR and shared by
+every launch, and every process, that needs the same one.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+SOFTWARE_CONFIG_FILE = os.environ.get(
+    'SHOW_MANAGER_SOFTWARE_CONFIG',
+    os.path.join(os.path.expanduser('~/.nuke'), 'show_manager', 'software.json'))
+LAUNCH_SCRIPT_DIR = os.path.join(os.path.expanduser('~/.nuke'), 'show_manager', 'launch_scripts')
+SCRIPT_MAX_AGE_DAYS = 30  # Older startup scripts are deleted, Nuke reads them only while it starts
+
+# Used for software the config file doesn't name, a config file holds a JSON object like this one.
+# A value can also be a list, the executable followed by arguments every launch gets.
+DEFAULT_SOFTWARE = {
+    'nuke': r'C:\Program Files\Nuke15.1v2\Nuke15.1.exe',
+    'houdini': r'C:\Program Files\Houdini_19.5\bin\houdinifx.exe',
+    'substance': r'C:\Program Files\Substance\SubstancePainter.exe',
+    'katana': r'C:\Program Files\Katana\katana.exe'
+}
+DEFAULT_FRAMES = (1001, 1100)
+HASHED_FIELDS = ('show', 'shot', 'frame_range', 'resolution', 'path')  # Everything a context is made from
+
+
+class LaunchError(Exception):
+    """Raised when software is unknown or its executable can't be found."""
+
+
+def load_software_config(config_file=SOFTWARE_CONFIG_FILE):
+    """Return {software: [executable, arguments...]}, the config file's entries over DEFAULT_SOFTWARE."""
+    software = {name: [path] for name, path in DEFAULT_SOFTWARE.items()}
+    if not os.path.exists(config_file):
+        return software
+
+    try:
+        with open(config_file, 'r') as file:
+            config = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f'Could not read software config {config_file}, using the default paths: {e}')
+        return software
+
+    for name, command in config.items():
+        command = [command] if isinstance(command, str) else [str(part) for part in command or []]
+        if command and command[0]:
+            software[name] = command
+        else:
+            software.pop(name, None)  # An empty entry removes a default
+    return software
+
+
+def resolve_executable(path):
+    """Return the absolute path of an executable file or a program on PATH, or None."""
+    if os.path.isfile(path) and os.access(path, os.X_OK):
+        return os.path.abspath(path)
+    return shutil.which(path)
+
+
+class SoftwareRegistry:
+    """Launchable software from the config file, each executable looked up once per session."""
+
+    def __init__(self, config_file=SOFTWARE_CONFIG_FILE):
+        self.config_file = config_file
+        self._commands = load_software_config(config_file)
+        self._lock = threading.Lock()
+        self._resolved = {}  # software -> command with the executable's full path, or None if it is missing
+
+    def names(self):
+        return list(self._commands)
+
+    def command(self, software):
+        """Return [executable, arguments...] of software, raises LaunchError if it can't be launched."""
+        with self._lock:
+            if software not in self._resolved:
+                if software not in self._commands:
+                    raise LaunchError(f'Unknown software {software!r}, use one of: {", ".join(self._commands)}')
+                configured = self._commands[software]
+                executable = resolve_executable(configured[0])
+                self._resolved[software] = [executable] + configured[1:] if executable else None
+            command = self._resolved[software]
+        if command is None:
+            raise LaunchError(f'{software} was not found at {self._commands[software][0]}, '
+                              f'set its path in {self.config_file}')
+        return list(command)
+
+
+def shot_environment(shot):
+    """Environment variables telling a launched application which shot it is working on."""
+    start_frame, end_frame = shot.frames or DEFAULT_FRAMES
+    return {
+        'SHOW': shot.get('show', ''),
+        'SHOT': shot.get('shot', ''),
+        'FRAME_RANGE': f'{start_frame}-{end_frame}',
+        'FIRST_FRAME': str(start_frame),
+        'LAST_FRAME': str(end_frame),
+        'RESOLUTION': shot.get('resolution', ''),
+        'SHOT_PATH': shot.get('path', ''),
+    }
+
+
+def nuke_startup_script(shot):
+    """Python run by Nuke at launch: opens the template, sets the shot's frames, format and label and saves v001."""
+    from nuke_script_generator import NUKE_TEMPLATE
+
+    start_frame, end_frame = shot.frames or DEFAULT_FRAMES
+    label = f"Show: {shot.get('show')}  Shot: {shot.get('shot')}"
+    script_name = f"{shot.get('shot', '').replace(' ', '_')}_v001.nk"
+    return f"""
+import os
+import nuke
+
+# Open the template
+nuke.scriptOpen({NUKE_TEMPLATE!r})
+
+# Access project settings
+project_settings = nuke.root()
+
+# Set metadata values
+project_settings['first_frame'].setValue({start_frame})
+project_settings['last_frame'].setValue({end_frame})
+
+# Set resolution, custom WIDTHxHEIGHT resolutions are added as a new format
+format_value = {shot.nuke_format!r}
+if format_value:
+    project_settings['format'].setValue(nuke.addFormat(format_value))
+else:
+    print('Error: Resolution value is invalid.')
+
+# Set additional metadata
+project_settings['label'].setValue({label!r})
+
+# Save the modified script to the shot's Nuke script folder
+script_path = os.path.join({shot.get('path', '')!r}, "comp", {script_name!r})
+nuke.scriptSaveAs(script_path)
+                """
+
+
+# Software -> (function returning a shot's startup script, argument running it)
+STARTUP_SCRIPTS = {
+    'nuke': (nuke_startup_script, '-run'),
+}
+
+
+def metadata_hash(software, command, shot):
+    """Hash of everything a shot's launch context is made from."""
+    from nuke_script_generator import NUKE_TEMPLATE
+
+    values = [software, command, NUKE_TEMPLATE] + [str(shot.get(field) or '') for field in HASHED_FIELDS]
+    return hashlib.sha1(json.dumps(values).encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+class LaunchContext:
+    """Command, extra environment and startup script of one shot in one application."""
+
+    __slots__ = ('software', 'command', 'env', 'script_path', 'digest')
+
+    def __init__(self, software, command, env, script_path=None, digest=''):
+        self.software = software
+        self.command = command
+        self.env = env
+        self.script_path = script_path
+        self.digest = digest
+
+    def environment(self):
+        """The full environment of the launched process, this process's plus the shot's."""
+        environment = dict(os.environ)
+        environment.update(self.env)
+        return environment
+
+    def __repr__(self):
+        return f'LaunchContext({self.software!r}, {self.command!r})'
+
+
+class LaunchContextCache:
+    """Launch contexts of shots, made ahead by precompute() or on first use.
+
+    Contexts are kept by (software, show, shot) with the hash of the metadata
+    they were made from, a shot whose metadata changed since gets a new one.
+    Safe to use from several threads.
+    """
+
+    def __init__(self, software=None, script_dir=LAUNCH_SCRIPT_DIR):
+        self.software = software or SoftwareRegistry()
+        self.script_dir = script_dir
+        self._lock = threading.Lock()
+        self._contexts = {}  # (software, show, shot) -> LaunchContext
+        self._pruned = False
+
+    def context(self, software, shot):
+        """Return the LaunchContext of software for a shot, raises LaunchError or OSError."""
+        command = self.software.command(software)
+        digest = metadata_hash(software, command, shot)
+        key = (software, shot.get('show', ''), shot.get('shot', ''))
+        with self._lock:
+            context = self._contexts.get(key)
+        if context is not None and context.digest == digest:
+            return context
+
+        env = shot_environment(shot)
+        script_path = None
+        if software in STARTUP_SCRIPTS:
+            make_script, run_argument = STARTUP_SCRIPTS[software]
+            script_path = self._write_script(shot, digest, make_script)
+            command = command + [run_argument, script_path]
+        context = LaunchContext(software, command, env, script_path, digest)
+        with self._lock:
+            self._contexts[key] = context
+        return context
+
+    def open_context(self, software, shot, path):
+        """Context opening a file, e.g. a comp script, with the shot's environment and no startup script."""
+        return LaunchContext(software, self.software.command(software) + [path], shot_environment(shot))
+
+    def precompute(self, shots, software_names=None, progress=None, cancelled=None):
+        """Make the contexts of shots ahead of their launch, returns how many were made or checked.
+
+        Software that can't be launched here is skipped, the launch reports it.
+        Also deletes startup scripts older than SCRIPT_MAX_AGE_DAYS, once.
+        """
+        if not self._pruned:
+            self._pruned = True
+            remove_old_scripts(self.script_dir)
+
+        software_names = [name for name in (software_names or self.software.names()) if self._launchable(name)]
+        done = 0
+        for position, shot in enumerate(shots, 1):
+            if cancelled is not None and cancelled.is_set():
+                break
+            for software in software_names:
+                try:
+                    self.context(software, shot)
+                except OSError as e:
+                    print(f"Could not prepare {software} for {shot.get('show', '')} {shot.get('shot', '')}: {e}")
+                    continue
+                done += 1
+            if progress:
+                progress(position, len(shots))
+        return done
+
+    def invalidate(self, keys=None):
+        """Forget the contexts of the given (show, shot) keys, or all of them."""
+        with self._lock:
+            if keys is None:
+                self._contexts.clear()
+                return
+            keys = set(keys)
+            for key in [key for key in self._contexts if key[1:] in keys]:
+                del self._contexts[key]
+
+    def _launchable(self, software):
+        try:
+            self.software.command(software)
+        except LaunchError:
+            return False
+        return True
+
+    def _write_script(self, shot, digest, make_script):
+        from instrumentation import span
+
+        name = f"{shot.get('show', '')}_{shot.get('shot', '')}".replace(' ', '_').replace(os.sep, '_')
+        script_path = os.path.join(self.script_dir, f'{name}_{digest[:16]}.py')
+        if os.path.exists(script_path):
+            try:
+                os.utime(script_path)  # Written by an earlier session or another process, still in use
+            except OSError:
+                pass
+            return script_path
+
+        with span('launch.startup_script', shot=shot.get('shot', '')) as timing:
+            script = make_script(shot)
+            os.makedirs(self.script_dir, exist_ok=True)
+            temp_path = f'{script_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'w') as script_file:
+                script_file.write(script)
+            os.replace(temp_path, script_path)  # A launch never runs half a script
+            timing.add(nbytes=len(script))
+        return script_path
+
+
+def remove_old_scripts(script_dir=LAUNCH_SCRIPT_DIR, max_age_days=SCRIPT_MAX_AGE_DAYS):
+    """Delete startup scripts not written or used for max_age_days, returns how many were deleted."""
+    oldest = time.time() - max_age_days * 86400
+    removed = 0
+    try:
+        entries = list(os.scandir(script_dir))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < oldest:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
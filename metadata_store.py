@@ -0,0 +1,270 @@
+import os
+import json
+import sqlite3
+import threading
+from shot_record import Shot, FIELDS
+
+METADATA_DIR = os.path.join(os.path.expanduser('~/.nuke'), 'metadata')
+DB_FILENAME = 'show_metadata.db'
+
+# Column order of the shots table is FIELDS, (show, shot) is the primary key
+KEY_FIELDS = ('show', 'shot')
+VALUE_FIELDS = FIELDS[2:]
+
+SCHEMA_VERSION = 2
+CHANGES_KEPT = 50000  # Rows of the change feed kept when it is pruned
+
+# 'sqlite' for the shared database, 'manifest' for one JSON Lines manifest per show (see show_manifest.py)
+STORE_BACKEND = os.environ.get('SHOW_MANAGER_BACKEND', 'sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shots (
+    show TEXT NOT NULL,
+    shot TEXT NOT NULL,
+    frame_range TEXT NOT NULL DEFAULT '',
+    comment TEXT NOT NULL DEFAULT '',
+    resolution TEXT NOT NULL DEFAULT '',
+    footage TEXT NOT NULL DEFAULT '',
+    elements TEXT NOT NULL DEFAULT '',
+    path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (show, shot)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Version 2: every write to shots is logged by triggers, so other processes can follow changes
+CHANGES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    show TEXT NOT NULL,
+    shot TEXT NOT NULL,
+    op TEXT NOT NULL,
+    changed REAL NOT NULL DEFAULT (julianday('now'))
+);
+
+CREATE TRIGGER IF NOT EXISTS shots_inserted AFTER INSERT ON shots BEGIN
+    INSERT INTO changes (show, shot, op) VALUES (NEW.show, NEW.shot, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS shots_updated AFTER UPDATE ON shots BEGIN
+    INSERT INTO changes (show, shot, op) VALUES (NEW.show, NEW.shot, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS shots_deleted AFTER DELETE ON shots BEGIN
+    INSERT INTO changes (show, shot, op) VALUES (OLD.show, OLD.shot, 'delete');
+END;
+"""
+
+_UPSERT_SQL = (
+    f"INSERT INTO shots ({', '.join(FIELDS)}) VALUES ({', '.join('?' for _ in FIELDS)}) "
+    f"ON CONFLICT (show, shot) DO UPDATE SET "
+    f"{', '.join(f'{field} = excluded.{field}' for field in VALUE_FIELDS)}"
+)
+
+
+def _row_values(record):
+    values = []
+    for field in FIELDS:
+        value = record.get(field, '')
+        values.append('' if value is None else str(value))
+    return values
+
+
+def read_json_dir(json_dir, progress=None):
+    """Read every legacy {show}_{shot}_metadata.json file of a directory, unreadable files are skipped."""
+    records = []
+    if not os.path.isdir(json_dir):
+        return records
+
+    entries = [entry for entry in os.scandir(json_dir) if entry.is_file() and entry.name.endswith('_metadata.json')]
+    for index, entry in enumerate(entries):
+        try:
+            with open(entry.path, 'r') as file:
+                metadata = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f'Skipping unreadable metadata file {entry.path}: {e}')
+            continue
+
+        if metadata.get('show') and metadata.get('shot'):
+            records.append(metadata)
+        if progress:
+            progress(index + 1, len(entries), metadata)
+    return records
+
+
+def open_store(metadata_path=METADATA_DIR, backend=STORE_BACKEND):
+    """Open the metadata store of the configured backend."""
+    if backend == 'manifest':
+        from show_manifest import ManifestStore
+        return ManifestStore(metadata_path)
+    return MetadataStore(metadata_path)
+
+
+class MetadataStore:
+    """Shot metadata kept in one indexed SQLite database keyed on (show, shot)."""
+
+    def __init__(self, metadata_path=METADATA_DIR, db_name=DB_FILENAME):
+        self.metadata_path = metadata_path
+        os.makedirs(self.metadata_path, exist_ok=True)
+        self.db_path = os.path.join(self.metadata_path, db_name)
+        self._local = threading.local()  # sqlite connections can't be shared between threads
+        self._init_schema()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _init_schema(self):
+        connection = self._connection()
+        version = connection.execute('PRAGMA user_version').fetchone()[0]
+        if version < SCHEMA_VERSION:
+            with connection:
+                connection.executescript(SCHEMA)
+                connection.executescript(CHANGES_SCHEMA)
+                connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def watch_paths(self):
+        """Directories and files a watcher should follow to see changes of other processes."""
+        # The -wal file is where WAL mode writes land, it comes and goes with checkpoints
+        files = [path for path in (self.db_path, self.db_path + '-wal') if os.path.exists(path)]
+        return [self.metadata_path] + files
+
+    # Legacy per-shot JSON files
+
+    @property
+    def needs_migration(self):
+        """True until the legacy *_metadata.json files have been imported once."""
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'json_imported'").fetchone()
+        return row is None
+
+    def import_json_dir(self, json_dir=None, progress=None):
+        """Import every legacy {show}_{shot}_metadata.json file in one transaction."""
+        records = read_json_dir(json_dir or self.metadata_path, progress)
+
+        connection = self._connection()
+        with connection:
+            connection.executemany(_UPSERT_SQL, [_row_values(record) for record in records])
+            connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', '1')")
+
+        return len(records)
+
+    # Queries
+
+    def shows(self):
+        """Return the sorted list of show names."""
+        rows = self._connection().execute('SELECT DISTINCT show FROM shots ORDER BY show')
+        return [row[0] for row in rows]
+
+    def shots(self, show_name):
+        """Return the shots of one show as Shot records, ordered by shot name."""
+        rows = self._connection().execute(
+            f"SELECT {', '.join(FIELDS)} FROM shots WHERE show = ? ORDER BY shot", (show_name,))
+        return [Shot(*row) for row in rows]
+
+    def iter_shots(self, show_name, batch_size=500):
+        """Yield the shots of one show in lists of up to batch_size Shot records."""
+        cursor = self._connection().execute(
+            f"SELECT {', '.join(FIELDS)} FROM shots WHERE show = ? ORDER BY shot", (show_name,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [Shot(*row) for row in rows]
+
+    def get_shot(self, show_name, shot_name):
+        row = self._connection().execute(
+            f"SELECT {', '.join(FIELDS)} FROM shots WHERE show = ? AND shot = ?",
+            (show_name, shot_name)).fetchone()
+        return Shot(*row) if row else None
+
+    def shot_count(self, show_name=None):
+        if show_name is None:
+            return self._connection().execute('SELECT COUNT(*) FROM shots').fetchone()[0]
+        return self._connection().execute('SELECT COUNT(*) FROM shots WHERE show = ?', (show_name,)).fetchone()[0]
+
+    # Change feed
+
+    def last_change_id(self):
+        return self._connection().execute('SELECT COALESCE(MAX(id), 0) FROM changes').fetchone()[0]
+
+    def changes_since(self, change_id):
+        """Return the (id, show, shot, op) changes logged after change_id, op is 'upsert' or 'delete'."""
+        rows = self._connection().execute('SELECT id, show, shot, op FROM changes WHERE id > ? ORDER BY id', (change_id,))
+        return [tuple(row) for row in rows]
+
+    def prune_changes(self, keep=CHANGES_KEPT):
+        connection = self._connection()
+        with connection:
+            connection.execute('DELETE FROM changes WHERE id <= (SELECT MAX(id) FROM changes) - ?', (keep,))
+
+    # Writes
+
+    def add_shot(self, record):
+        """Insert a shot, or replace the values of an existing (show, shot) row."""
+        connection = self._connection()
+        with connection:
+            connection.execute(_UPSERT_SQL, _row_values(record))
+
+    def add_shots(self, records):
+        """Insert or replace many shots in a single transaction."""
+        connection = self._connection()
+        with connection:
+            connection.executemany(_UPSERT_SQL, [_row_values(record) for record in records])
+
+    def update_shot(self, show_name, shot_name, **fields):
+        """Update only the given fields of one shot."""
+        unknown = set(fields) - set(VALUE_FIELDS)
+        if unknown:
+            raise KeyError(f'Unknown metadata fields: {", ".join(sorted(unknown))}')
+        if not fields:
+            return
+
+        assignments = ', '.join(f'{field} = ?' for field in fields)
+        connection = self._connection()
+        with connection:
+            connection.execute(f'UPDATE shots SET {assignments} WHERE show = ? AND shot = ?',
+                               [str(value) for value in fields.values()] + [show_name, shot_name])
+
+    def update_shots(self, edits):
+        """Apply {(show, shot): {field: value}} edits in a single transaction."""
+        groups = {}  # Edits of the same fields share one statement
+        for (show_name, shot_name), fields in edits.items():
+            unknown = set(fields) - set(VALUE_FIELDS)
+            if unknown:
+                raise KeyError(f'Unknown metadata fields: {", ".join(sorted(unknown))}')
+            if fields:
+                names = tuple(sorted(fields))
+                groups.setdefault(names, []).append([str(fields[name]) for name in names] + [show_name, shot_name])
+
+        connection = self._connection()
+        with connection:
+            for names, rows in groups.items():
+                assignments = ', '.join(f'{field} = ?' for field in names)
+                connection.executemany(f'UPDATE shots SET {assignments} WHERE show = ? AND shot = ?', rows)
+
+    def remove_shot(self, show_name, shot_name):
+        connection = self._connection()
+        with connection:
+            connection.execute('DELETE FROM shots WHERE show = ? AND shot = ?', (show_name, shot_name))
+
+    def remove_shots(self, keys):
+        """Remove many (show, shot) rows in a single transaction."""
+        connection = self._connection()
+        with connection:
+            connection.executemany('DELETE FROM shots WHERE show = ? AND shot = ?', list(keys))
@@ -0,0 +1,278 @@
+import os
+import json
+import getpass
+from PySide6.QtCore import QObject, QTimer, QFileSystemWatcher, Signal
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+from background_task import BackgroundTask
+
+# Name of the local socket change notices are published on, set it empty to turn publishing off
+CHANGE_SOCKET = os.environ.get('SHOW_MANAGER_CHANGE_SOCKET', f'show_manager_changes_{getpass.getuser()}')
+
+DEBOUNCE_MSECS = 100  # File events come in bursts while sqlite writes
+POLL_MSECS = 1000  # Fallback for file systems that don't report changes
+RECONNECT_MSECS = 5000
+JSON_RESCAN_MSECS = 60000  # JSON files rewritten in place leave the directory unchanged, they are found this late
+
+
+def scan_json_files(json_dir, known_stats=None, progress=None, cancelled=None):
+    """List the legacy *_metadata.json files of a directory and read the new or changed ones.
+
+    Returns ({file name: (mtime_ns, size)}, [metadata dicts]). Files whose stat
+    matches known_stats are not read, with known_stats None nothing is read and
+    only the stats are returned. Run on a worker thread, a directory can hold
+    thousands of migrated files.
+    """
+    stats = {}
+    records = []
+    try:
+        entries = list(os.scandir(json_dir))
+    except OSError:
+        return stats, records
+    for entry in entries:
+        if cancelled is not None and cancelled.is_set():
+            break
+        if not entry.name.endswith('_metadata.json'):
+            continue
+        try:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+        except OSError:
+            continue
+        stats[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        if known_stats is None or known_stats.get(entry.name) == stats[entry.name]:
+            continue
+        try:
+            with open(entry.path, 'r') as file:
+                metadata = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f'Skipping unreadable metadata file {entry.path}: {e}')
+            stats.pop(entry.name)  # Try again once it has been written completely
+            continue
+        if isinstance(metadata, dict) and metadata.get('show') and metadata.get('shot'):
+            records.append(metadata)
+    return stats, records
+
+
+class MetadataWatcher(QObject):
+    """Follows metadata changes made by any process and reports them per shot.
+
+    Writes to the store are logged in its change feed by triggers. The watcher
+    reads the feed when the metadata directory or database files change, when a
+    publisher sends a notice over the local socket, or at the latest once a
+    second. Legacy *_metadata.json files dropped into the directory are imported.
+    They are listed on a worker thread, only when the directory changed and
+    once a minute, and an mtime/size cache makes sure only new or changed files
+    are parsed, so migrated files cost nothing between scans.
+    """
+
+    shots_changed = Signal(list)  # current metadata dicts of added or changed shots
+    shots_removed = Signal(list)  # (show, shot) keys of removed shots
+
+    def __init__(self, store, publish=False, socket_name=CHANGE_SOCKET, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.store.prune_changes()
+        self.last_change = self.store.last_change_id()
+        self.json_stats = None  # File name -> (mtime_ns, size) of the JSON files already imported
+        self._json_task = None
+        self._json_rescan = False
+        self._json_dir_mtime = self._directory_mtime()
+
+        self._check_timer = QTimer(self)
+        self._check_timer.setSingleShot(True)
+        self._check_timer.setInterval(DEBOUNCE_MSECS)
+        self._check_timer.timeout.connect(self.check)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(POLL_MSECS)
+        self._poll_timer.timeout.connect(self.check)
+        self._poll_timer.start()
+
+        self._json_timer = QTimer(self)
+        self._json_timer.setInterval(JSON_RESCAN_MSECS)
+        self._json_timer.timeout.connect(self.scan_json)
+        self._json_timer.start()
+        self.scan_json()  # Files there now were imported when the store was opened, this only records them
+
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.directoryChanged.connect(self._on_directory_changed)
+        self.file_watcher.fileChanged.connect(self._on_file_changed)
+        self._watch_store_files()
+
+        self.publisher = None
+        self.subscriber = None
+        if socket_name and publish:
+            self.publisher = ChangePublisher(socket_name, self)
+        elif socket_name:
+            self.subscriber = ChangeSubscriber(socket_name, self)
+            self.subscriber.notified.connect(self.schedule_check)
+
+    def _watch_store_files(self):
+        watched = set(self.file_watcher.files()) | set(self.file_watcher.directories())
+        missing = set(self.store.watch_paths()) - watched
+        if missing:
+            self.file_watcher.addPaths(sorted(missing))
+
+    def _directory_mtime(self):
+        try:
+            return os.stat(self.store.metadata_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _on_directory_changed(self, path):
+        self._watch_store_files()
+        self.schedule_check()
+
+    def _on_file_changed(self, path):
+        self._watch_store_files()  # A replaced file is dropped from the watch list
+        self.schedule_check()
+
+    def schedule_check(self):
+        if not self._check_timer.isActive():
+            self._check_timer.start()
+
+    def scan_json(self):
+        """Look for new or changed legacy JSON files on a worker thread, they are imported when it's done."""
+        if self._json_task:
+            self._json_rescan = True  # Files may have changed after the running scan listed them
+            return
+        self._json_dir_mtime = self._directory_mtime()
+        task = BackgroundTask(scan_json_files, self.store.metadata_path, self.json_stats, parent=self)
+        task.finished.connect(self._on_json_scanned)
+        task.failed.connect(lambda message: self._on_json_scanned((self.json_stats, [])))
+        self._json_task = task.start()
+
+    def _on_json_scanned(self, result):
+        task, self._json_task = self._json_task, None
+        if task is None:
+            return  # Closed meanwhile
+        task.deleteLater()
+        self.json_stats, records = result
+        if records:
+            self.store.add_shots(records)  # The store's connection belongs to this thread
+            self.schedule_check()
+        if self._json_rescan:
+            self._json_rescan = False
+            self.scan_json()
+
+    def check(self):
+        """Read the change feed and report what changed since the last check."""
+        if self._directory_mtime() != self._json_dir_mtime:
+            self.scan_json()  # Files were added, removed or renamed, one stat instead of listing them
+
+        changes = self.store.changes_since(self.last_change)
+        if not changes:
+            return
+        self.last_change = changes[-1][0]
+
+        latest = {}  # (show, shot) -> last op, a shot changed many times is reported once
+        for change_id, show_name, shot_name, op in changes:
+            latest.pop((show_name, shot_name), None)
+            latest[(show_name, shot_name)] = op
+
+        changed = []
+        removed = []
+        for key, op in latest.items():
+            shot = self.store.get_shot(*key) if op == 'upsert' else None
+            if shot is None:
+                removed.append(key)
+            else:
+                changed.append(shot)
+
+        if changed:
+            self.shots_changed.emit(changed)
+        if removed:
+            self.shots_removed.emit(removed)
+        if self.publisher:
+            self.publisher.publish(self.last_change)
+
+    def close(self):
+        self._poll_timer.stop()
+        self._check_timer.stop()
+        self._json_timer.stop()
+        if self._json_task:
+            self._json_task.cancel()
+            self._json_task = None
+        if self.publisher:
+            self.publisher.close()
+
+
+def _publisher_running(socket_name):
+    socket = QLocalSocket()
+    socket.connectToServer(socket_name)
+    running = socket.waitForConnected(200)
+    socket.abort()
+    return running
+
+
+class ChangePublisher(QObject):
+    """Local socket server telling connected windows that the change feed moved on."""
+
+    def __init__(self, socket_name=CHANGE_SOCKET, parent=None):
+        super().__init__(parent)
+        self.clients = []
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self._on_new_connection)
+        if not self.server.listen(socket_name):
+            if _publisher_running(socket_name):
+                print(f'Metadata changes are already published on {socket_name} by another window.')
+                return
+            QLocalServer.removeServer(socket_name)  # Left behind by a process that crashed
+            if not self.server.listen(socket_name):
+                print(f'Could not publish metadata changes on {socket_name}: {self.server.errorString()}')
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            client = self.server.nextPendingConnection()
+            client.disconnected.connect(lambda client=client: self._on_disconnected(client))
+            self.clients.append(client)
+
+    def _on_disconnected(self, client):
+        if client in self.clients:
+            self.clients.remove(client)
+        client.deleteLater()
+
+    def publish(self, change_id):
+        message = json.dumps({'change': change_id}).encode() + b'\n'
+        for client in self.clients:
+            client.write(message)
+            client.flush()
+
+    def close(self):
+        for client in self.clients:
+            client.disconnected.disconnect()  # The server deletes its clients when it closes
+        self.clients = []
+        self.server.close()
+
+
+class ChangeSubscriber(QObject):
+    """Connects to a ChangePublisher and reconnects when it goes away."""
+
+    notified = Signal()
+
+    def __init__(self, socket_name=CHANGE_SOCKET, parent=None):
+        super().__init__(parent)
+        self.socket_name = socket_name
+        self.socket = QLocalSocket(self)
+        self.socket.readyRead.connect(self._on_ready_read)
+        self.socket.disconnected.connect(self._schedule_reconnect)
+        self.socket.errorOccurred.connect(self._schedule_reconnect)
+
+        self._reconnect_timer = QTimer(self)
+        self._reconnect_timer.setSingleShot(True)
+        self._reconnect_timer.setInterval(RECONNECT_MSECS)
+        self._reconnect_timer.timeout.connect(self.connect_to_publisher)
+        self.connect_to_publisher()
+
+    def connect_to_publisher(self):
+        if self.socket.state() == QLocalSocket.UnconnectedState:
+            self.socket.connectToServer(self.socket_name)
+
+    def _schedule_reconnect(self, *args):
+        if not self._reconnect_timer.isActive():
+            self._reconnect_timer.start()
+
+    def _on_ready_read(self):
+        self.socket.readAll()  # The notices only say that something changed, the feed says what
+        self.notified.emit()
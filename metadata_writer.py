@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import socket
+import sqlite3
+from metadata_store import VALUE_FIELDS
+
+JOURNAL_PREFIX = 'pending_edits'
+JOURNAL_SUFFIX = '.journal'
+LEGACY_JOURNAL_FILENAME = 'pending_edits.journal'  # Shared by every instance in older versions
+
+
+def journal_filename(host=None, pid=None):
+    """Journal of one process, e.g. pending_edits@workstation@1234.journal."""
+    host = (host or socket.gethostname()).replace('@', '_').replace(os.sep, '_')
+    return f'{JOURNAL_PREFIX}@{host}@{pid or os.getpid()}{JOURNAL_SUFFIX}'
+
+
+def journal_owner(filename):
+    """Return (host, pid) of the process that wrote a journal, or None if it isn't a per-process journal."""
+    if not (filename.startswith(JOURNAL_PREFIX + '@') and filename.endswith(JOURNAL_SUFFIX)):
+        return None
+    parts = filename[:-len(JOURNAL_SUFFIX)].split('@')
+    if len(parts) < 3 or not parts[2].isdigit():
+        return None
+    return parts[1], int(parts[2])
+
+
+def process_running(pid):
+    """Whether a process with this pid runs on this machine, a reused pid counts as running."""
+    if sys.platform == 'win32':
+        import ctypes
+
+        process = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not process:
+            return ctypes.windll.kernel32.GetLastError() == 5  # Access denied, it exists
+        exit_code = ctypes.c_ulong()
+        ctypes.windll.kernel32.GetExitCodeProcess(process, ctypes.byref(exit_code))
+        ctypes.windll.kernel32.CloseHandle(process)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetadataWriter:
+    """Coalesces metadata edits per shot and writes them to the store in batches.
+
+    Every edit is appended to a journal and synced to disk before it is kept as
+    pending, so edits that weren't flushed yet survive a crash and are applied
+    by recover() on the next start. A flush writes all pending edits in one
+    transaction and then empties the journal. Each process has its own journal
+    next to the store, so instances running side by side never flush or replay
+    each other's edits.
+    """
+
+    def __init__(self, store, journal_path=None):
+        self.store = store
+        self.journal_path = journal_path or os.path.join(store.metadata_path, journal_filename())
+        self.pending = {}  # (show, shot) -> {field: value}, later edits of a field win
+
+    def set_fields(self, show_name, shot_name, **fields):
+        """Queue an edit of one shot."""
+        self.set_many({(show_name, shot_name): fields})
+
+    def set_field(self, keys, field, value):
+        """Queue the same field value for many (show, shot) keys, e.g. a comment on hundreds of shots."""
+        self.set_many({key: {field: value} for key in keys})
+
+    def set_many(self, edits):
+        """Queue {(show, shot): {field: value}} edits with one journal write."""
+        edits = {key: fields for key, fields in edits.items() if fields}
+        for fields in edits.values():
+            unknown = set(fields) - set(VALUE_FIELDS)
+            if unknown:
+                raise KeyError(f'Unknown metadata fields: {", ".join(sorted(unknown))}')
+        if not edits:
+            return
+
+        self._append_journal(edits)
+        for key, fields in edits.items():
+            self.pending.setdefault(key, {}).update((field, str(value)) for field, value in fields.items())
+
+    def pending_fields(self, show_name, shot_name):
+        return self.pending.get((show_name, shot_name), {})
+
+    def flush(self):
+        """Write every pending edit in one transaction, returns the number of shots written."""
+        if not self.pending:
+            return 0
+        edits = self.pending
+        self.store.update_shots(edits)
+        self.pending = {}
+        self._clear_journal()
+        return len(edits)
+
+    def orphaned_journals(self):
+        """Journals next to this one whose process is gone, journals of other machines are left to them."""
+        folder = os.path.dirname(self.journal_path)
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            return []
+        host = socket.gethostname().replace('@', '_').replace(os.sep, '_')
+        orphans = []
+        for name in names:
+            path = os.path.join(folder, name)
+            if path == self.journal_path:
+                continue
+            owner = journal_owner(name)
+            if name == LEGACY_JOURNAL_FILENAME or (owner and owner[0] == host and not process_running(owner[1])):
+                orphans.append(path)
+        return orphans
+
+    def recover(self):
+        """Apply edits left in journals by runs that didn't flush them, returns the number of shots."""
+        claimed = []
+        for number, orphan in enumerate(self.orphaned_journals()):
+            # Renamed to this process first, when two instances start at once only one of them gets it
+            claim_path = f'{self.journal_path[:-len(JOURNAL_SUFFIX)]}@{number}{JOURNAL_SUFFIX}'
+            try:
+                os.rename(orphan, claim_path)
+            except OSError:
+                continue
+            claimed.append(claim_path)
+            try:
+                with open(claim_path, 'r', encoding='utf-8') as file:
+                    lines = file.readlines()
+            except OSError as e:
+                print(f'Could not read unsaved edits in {claim_path}: {e}')
+                continue
+
+            for line in lines:
+                try:
+                    entry = json.loads(line)
+                    key = (entry['show'], entry['shot'])
+                    fields = {field: str(value) for field, value in entry['fields'].items() if field in VALUE_FIELDS}
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    continue  # The last line is cut short if the crash happened while it was written
+                self.pending.setdefault(key, {}).update(fields)
+
+        try:
+            recovered = self.flush()
+        except (OSError, sqlite3.Error) as e:
+            # The claimed journals are named after this process, the next start adopts them and tries again
+            print(f'Could not apply unsaved edits of {len(self.pending)} shots, they are kept for the next start: {e}')
+            self.pending = {}
+            return 0
+        for claim_path in claimed:
+            try:
+                os.remove(claim_path)
+            except FileNotFoundError:
+                pass
+        return recovered
+
+    def _append_journal(self, edits):
+        lines = ''.join(json.dumps({'show': show_name, 'shot': shot_name, 'fields': fields}) + '\n'
+                        for (show_name, shot_name), fields in edits.items())
+        with open(self.journal_path, 'a', encoding='utf-8') as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _clear_journal(self):
+        # Replaying a journal that outlived its flush writes the same values again, so a crash here is harmless
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,114 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from shot_record import Shot, parse_frame_range
+from instrumentation import timed
+
+NUKE_TEMPLATE = os.environ.get(
+    'SHOW_MANAGER_NUKE_TEMPLATE',
+    'C:/Users/vishr/Documents/project manager python/pratap/nuke_templete/empty_templete_updated.nk')
+
+# Used when the template can't be found, Nuke fills in every other Root knob with defaults
+MINIMAL_TEMPLATE = """Root {
+ inputs 0
+}
+"""
+
+DEFAULT_FRAME_RANGE = (1001, 1100)
+PATCHED_KNOBS = ('name', 'first_frame', 'last_frame', 'format', 'label')
+
+
+def nuke_format(resolution):
+    """Return the Nuke format string for '2K', '4K', 'HD' or a custom 'WIDTHxHEIGHT', or None."""
+    return Shot(resolution=resolution).nuke_format
+
+
+def quote_knob_value(value):
+    """Quote a string for a .nk file, brackets are escaped so Nuke doesn't run them as TCL."""
+    value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('[', '\\[').replace('\n', '\\n')
+    return f'"{value}"'
+
+
+def script_path_for(shot, version=1):
+    shot_number = shot.get('shot', '').replace(' ', '_')
+    return os.path.join(shot.get('path', ''), 'comp', f'{shot_number}_v{version:03d}.nk')
+
+
+class NukeScriptTemplate:
+    """A template .nk parsed once so shot scripts can be written without starting Nuke."""
+
+    def __init__(self, text):
+        lines = text.splitlines()
+        try:
+            root_start = next(i for i, line in enumerate(lines) if line.strip() == 'Root {')
+            root_end = next(i for i in range(root_start + 1, len(lines)) if lines[i].strip() == '}')
+        except StopIteration:
+            raise ValueError('Nuke template has no Root node')
+
+        self.head = lines[:root_start + 1]
+        self.tail = lines[root_end:]
+        # Knobs written per shot are kept aside, the template's value is used when a shot has none
+        self.root_knobs = []
+        self.template_knobs = {}
+        for line in lines[root_start + 1:root_end]:
+            knob = line.split(None, 1)[0] if line.strip() else ''
+            if knob in PATCHED_KNOBS:
+                self.template_knobs[knob] = line
+            else:
+                self.root_knobs.append(line)
+
+    @classmethod
+    def load(cls, template_path=NUKE_TEMPLATE):
+        if not os.path.exists(template_path):
+            print(f'Nuke template not found at {template_path}, using an empty script.')
+            return cls(MINIMAL_TEMPLATE)
+        with open(template_path, 'r') as file:
+            return cls(file.read())
+
+    def render(self, shot, script_path):
+        frame_range = (shot.frames if isinstance(shot, Shot) else parse_frame_range(shot.get('frame_range', ''))) or DEFAULT_FRAME_RANGE
+        knobs = [
+            f' name {quote_knob_value(script_path.replace(os.sep, "/"))}',
+            f' first_frame {frame_range[0]}',
+            f' last_frame {frame_range[1]}',
+        ]
+        format_value = shot.nuke_format if isinstance(shot, Shot) else nuke_format(shot.get('resolution', ''))
+        if format_value:
+            knobs.append(f' format {quote_knob_value(format_value)}')
+        elif 'format' in self.template_knobs:
+            knobs.append(self.template_knobs['format'])
+        label = f"Show: {shot.get('show', '')}  Shot: {shot.get('shot', '')}"
+        knobs.append(f' label {quote_knob_value(label)}')
+
+        # Nuke writes 'inputs' first in the Root block, keep it there
+        split = 1 if self.root_knobs and self.root_knobs[0].split()[:1] == ['inputs'] else 0
+        root = self.root_knobs[:split] + knobs + self.root_knobs[split:]
+        return '\n'.join(self.head + root + self.tail) + '\n'
+
+    def write(self, shot, overwrite=False):
+        """Write the v001 script of a shot and return (shot, path, status, message).
+
+        status is 'created', 'exists', 'error' or 'skipped', shots without a folder are skipped.
+        """
+        if not shot.get('path'):
+            return shot, '', 'skipped', 'the shot has no folder'
+        script_path = script_path_for(shot)
+        if os.path.exists(script_path) and not overwrite:
+            return shot, script_path, 'exists', ''
+
+        try:
+            os.makedirs(os.path.dirname(script_path), exist_ok=True)
+            temp_path = script_path + '.tmp'
+            with open(temp_path, 'w') as file:
+                file.write(self.render(shot, script_path))
+            os.replace(temp_path, script_path)  # Nobody opens a half written script
+        except OSError as e:
+            return shot, script_path, 'error', str(e)
+        return shot, script_path, 'created', ''
+
+
+@timed('nuke.generate_show_scripts', count=len)
+def generate_show_scripts(shots, template_path=NUKE_TEMPLATE, overwrite=False, workers=8):
+    """Write v001 Nuke scripts for many shots in parallel from one parsed template."""
+    template = NukeScriptTemplate.load(template_path)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda shot: template.write(shot, overwrite), shots))
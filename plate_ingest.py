@@ -0,0 +1,298 @@
+import os
+import csv
+import sys
+import errno
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from instrumentation import span
+
+# Shot folder plates and elements are copied into, per metadata field
+INGEST_FOLDERS = {'footage': 'footages', 'elements': 'elements'}
+MAPPING_COLUMNS = ['SHOW', 'SHOT', 'SOURCE']  # Plus an optional KIND column, footage or elements
+
+CHUNK_SIZE = 8 * 1024 * 1024
+MAX_WORKERS = 4  # Copies saturate the network with a few streams, more only make them seek
+PART_SUFFIX = '.part'
+PROGRESS_SECONDS = 0.1
+
+# Errors meaning a kernel copy method doesn't work for these two files, the next method is tried
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ENOTSUP}
+
+
+class IngestError(Exception):
+    """Raised when a file can't be ingested, e.g. its copy doesn't match the source."""
+
+
+def _copy_methods():
+    methods = []
+    if hasattr(os, 'copy_file_range'):
+        methods.append('copy_file_range')
+    if sys.platform.startswith('linux'):
+        methods.append('sendfile')  # Only Linux sends to regular files
+    methods.append('read')
+    return methods
+
+
+COPY_METHODS = _copy_methods()
+
+
+def _copy_chunk(method, source_fd, target_fd, offset, count):
+    # The target's file position is at offset, each method writes there and moves it on
+    if method == 'copy_file_range':
+        return os.copy_file_range(source_fd, target_fd, count, offset)
+    if method == 'sendfile':
+        return os.sendfile(target_fd, source_fd, offset, count)
+    data = os.pread(source_fd, count, offset) if hasattr(os, 'pread') else _read_at(source_fd, count, offset)
+    return os.write(target_fd, data)
+
+
+def _read_at(fd, count, offset):
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, count)
+
+
+def file_checksum(path, cancelled=None):
+    """Return the blake2b hex digest of a file, read in chunks, or None if cancelled was set."""
+    digest = hashlib.blake2b()
+    with open(path, 'rb', buffering=0) as file:
+        while True:
+            if cancelled is not None and cancelled.is_set():
+                return None
+            data = file.read(CHUNK_SIZE)
+            if not data:
+                return digest.hexdigest()
+            digest.update(data)
+
+
+def is_ingested(source, target):
+    """True if target is a finished copy of source: same size and modification time."""
+    try:
+        source_stat = os.stat(source)
+        target_stat = os.stat(target)
+    except FileNotFoundError:
+        return False
+    return source_stat.st_size == target_stat.st_size and source_stat.st_mtime_ns == target_stat.st_mtime_ns
+
+
+def _copy_to_part(source, part_path, size, progress, cancelled):
+    """Copy what is missing of a .part file, returns False if cancelled was set."""
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if offset > size:
+        offset = 0  # Not a partial copy of this source
+
+    if offset and progress:
+        progress(offset)  # Copied by an earlier attempt
+
+    methods = list(COPY_METHODS)
+    with open(source, 'rb', buffering=0) as source_file, \
+            open(part_path, 'r+b' if offset else 'wb', buffering=0) as part_file:
+        part_file.truncate(offset)
+        part_file.seek(offset)
+        source_fd, part_fd = source_file.fileno(), part_file.fileno()
+        while offset < size:
+            if cancelled is not None and cancelled.is_set():
+                return False
+            count = min(CHUNK_SIZE, size - offset)
+            try:
+                copied = _copy_chunk(methods[0], source_fd, part_fd, offset, count)
+            except OSError as e:
+                if e.errno in _UNSUPPORTED and len(methods) > 1:
+                    methods.pop(0)  # e.g. copy_file_range across file systems on older kernels
+                    part_file.seek(offset)
+                    continue
+                raise
+            if not copied:
+                raise IngestError(f'{source} ended before {size} bytes were copied')
+            offset += copied
+            if progress:
+                progress(copied)
+    return True
+
+
+def ingest_file(source, target, verify=True, progress=None, cancelled=None):
+    """Copy one file into place through a .part file that later calls resume.
+
+    Data is copied by the kernel where the platform allows it. With verify the
+    copy's checksum is compared to the source's and a resumed copy that doesn't
+    match is copied again from the start. progress is called with the number of
+    bytes each step copied. Returns False if cancelled was set, leaving the
+    .part file for the next attempt, True otherwise.
+    """
+    if is_ingested(source, target):
+        if progress:
+            progress(os.path.getsize(target))
+        return True
+
+    with span('ingest.file', file=os.path.basename(source)) as timing:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        part_path = target + PART_SUFFIX
+        stat = os.stat(source)
+        for attempt in range(2):
+            resumed = os.path.exists(part_path) and 0 < os.path.getsize(part_path) <= stat.st_size
+            if not _copy_to_part(source, part_path, stat.st_size, progress, cancelled):
+                return False
+            if not verify:
+                break
+
+            source_checksum = file_checksum(source, cancelled)
+            part_checksum = file_checksum(part_path, cancelled)
+            if source_checksum is None or part_checksum is None:
+                return False
+            if source_checksum == part_checksum:
+                break
+            os.remove(part_path)
+            if not resumed or attempt:
+                raise IngestError(f'Copy of {source} does not match the source')
+            if progress:
+                progress(-stat.st_size)  # Copied again from the start
+
+        # The source's times mark the copy as finished, see is_ingested
+        os.utime(part_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(part_path, target)
+        timing.add(nbytes=stat.st_size)
+        return True
+
+
+def _ancestor_folders(folder):
+    # A link to one of these would copy the source into itself again
+    ancestors = set()
+    folder = os.path.realpath(folder)
+    while True:
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            return ancestors
+        folder = parent
+        try:
+            stat = os.stat(folder)
+        except OSError:
+            continue
+        ancestors.add((stat.st_dev, stat.st_ino))
+
+
+def plan_ingest(sources, target_dir):
+    """Return (source file, target file) pairs for files and folders copied into target_dir.
+
+    A folder, e.g. an image sequence, is copied as a folder of the same name.
+    Symlinked folders are followed, but every folder is copied once, so links
+    to a folder copied already or to one containing the source are skipped.
+    """
+    jobs = []
+    for source in sources:
+        source = os.path.normpath(source)
+        if not os.path.isdir(source):
+            jobs.append((source, os.path.join(target_dir, os.path.basename(source))))
+            continue
+        base = os.path.join(target_dir, os.path.basename(source))
+        pending = [source]
+        visited = _ancestor_folders(source)  # (st_dev, st_ino) of the folders listed or containing the source
+        while pending:
+            folder = pending.pop()
+            stat = os.stat(folder)
+            if (stat.st_dev, stat.st_ino) in visited:
+                continue
+            visited.add((stat.st_dev, stat.st_ino))
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        pending.append(entry.path)
+                    elif entry.is_file() and not entry.name.endswith(PART_SUFFIX):
+                        jobs.append((entry.path, os.path.join(base, os.path.relpath(entry.path, source))))
+    return sorted(jobs)
+
+
+def ingested_path(sources, target_dir):
+    """Path to store in a shot's metadata: the copy of a single source, else the folder they were copied to."""
+    if len(sources) == 1:
+        return os.path.join(target_dir, os.path.basename(os.path.normpath(sources[0])))
+    return target_dir
+
+
+def ingest(jobs, workers=MAX_WORKERS, verify=True, progress=None, cancelled=None):
+    """Copy many (source, target) files on a bounded thread pool.
+
+    progress is called with (done, total) in KiB from the calling thread, a few
+    times a second. Returns a dict of target -> error message, '' for copies
+    that finished. Copies that weren't finished before cancelled was set are
+    left out and resume on the next call.
+    """
+    jobs = list(dict((target, source) for source, target in jobs).items())
+    total = sum(os.path.getsize(source) for target, source in jobs if os.path.exists(source))
+    copied = [0]
+    lock = threading.Lock()
+
+    def add_copied(count):
+        with lock:
+            copied[0] += count
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(ingest_file, source, target, verify, add_copied, cancelled): target
+                   for target, source in jobs}
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=PROGRESS_SECONDS, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future.cancelled():
+                    continue
+                try:
+                    if future.result():
+                        results[futures[future]] = ''
+                except (OSError, IngestError) as e:
+                    results[futures[future]] = str(e)
+            if progress:
+                progress(min(copied[0], total) // 1024, total // 1024)
+            if cancelled is not None and cancelled.is_set():
+                for future in pending:
+                    future.cancel()
+
+    return results
+
+
+def ingest_shots(requests, workers=MAX_WORKERS, verify=True, progress=None, cancelled=None):
+    """Ingest files and folders into many shots with one pool.
+
+    requests is a list of (shot path, kind, sources), kind being a key of
+    INGEST_FOLDERS. Returns one (ingested path or None, [error messages]) per
+    request, the path is None unless every file of the request was copied.
+    """
+    planned = []
+    for shot_path, kind, sources in requests:
+        target_dir = os.path.join(shot_path, INGEST_FOLDERS[kind])
+        try:
+            planned.append((target_dir, sources, plan_ingest(sources, target_dir), []))
+        except OSError as e:
+            planned.append((target_dir, sources, [], [str(e)]))
+
+    results = ingest([job for target_dir, sources, jobs, errors in planned for job in jobs],
+                     workers, verify, progress, cancelled)
+
+    reports = []
+    for target_dir, sources, jobs, errors in planned:
+        errors = errors + [f'{source}: {results[target]}' for source, target in jobs if results.get(target)]
+        finished = not errors and all(target in results for source, target in jobs)
+        reports.append((ingested_path(sources, target_dir) if finished else None, errors))
+    return reports
+
+
+def read_ingest_mapping(mapping_path):
+    """Read a CSV of SHOW, SHOT, SOURCE and optionally KIND columns, one row per file or folder to ingest."""
+    with open(mapping_path, 'r', newline='', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        columns = [column.strip().upper() for column in next(reader, [])]
+        missing = [column for column in MAPPING_COLUMNS if column not in columns]
+        if missing:
+            raise IngestError(f'Ingest mapping is missing the columns: {", ".join(missing)}. '
+                              f'Required columns are: {", ".join(MAPPING_COLUMNS)}, KIND is optional.')
+
+        rows = []
+        for values in reader:
+            row = dict(zip(columns, (value.strip() for value in values)))
+            if not any(row.values()):
+                continue
+            kind = (row.get('KIND') or 'footage').lower()
+            if kind not in INGEST_FOLDERS:
+                raise IngestError(f'Unknown KIND {kind!r} in {mapping_path}, use footage or elements.')
+            rows.append({'show': row.get('SHOW', ''), 'shot': row.get('SHOT', ''),
+                         'source': row.get('SOURCE', ''), 'kind': kind})
+        return rows
@@ -0,0 +1,218 @@
+import os
+import sys
+import time
+import subprocess
+from PySide6.QtCore import QObject, QTimer, Signal, QAbstractTableModel, QModelIndex, Qt
+from instrumentation import span
+
+SESSION_LOG_DIR = os.path.join(os.path.expanduser('~/.nuke'), 'show_manager', 'sessions')
+STDERR_TAIL_LINES = 20
+STDERR_TAIL_BYTES = 16 * 1024
+
+
+def _detach_options():
+    # Launched applications get their own session/process group so they outlive the launcher
+    if sys.platform == 'win32':
+        return {'creationflags': subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+
+def read_tail(path, max_lines=STDERR_TAIL_LINES, max_bytes=STDERR_TAIL_BYTES):
+    """Return the last lines of a log file without reading all of it."""
+    try:
+        with open(path, 'rb') as file:
+            file.seek(0, os.SEEK_END)
+            size = file.tell()
+            file.seek(max(size - max_bytes, 0))
+            data = file.read()
+    except OSError:
+        return []
+    lines = data.decode('utf-8', errors='replace').splitlines()
+    return lines[-max_lines:]
+
+
+class LaunchSession:
+    """One launched application and what is known about it."""
+
+    def __init__(self, show, shot, software, command, process, log_path, on_exit=None):
+        self.show = show
+        self.shot = shot
+        self.software = software
+        self.command = command
+        self.process = process
+        self.pid = process.pid
+        self.started = time.time()
+        self.exit_code = None
+        self.log_path = log_path
+        self.log_size = 0
+        self.stderr_tail = []
+        self.on_exit = on_exit
+
+    @property
+    def running(self):
+        return self.exit_code is None
+
+
+class LaunchManager(QObject):
+    """Starts applications without waiting for them and tracks them as sessions.
+
+    Processes are started detached with stderr going to a per-session log file,
+    a timer polls them for their exit code and the tail of that log.
+    """
+
+    # Rows in self.sessions, the about_to signals come before the list changes so models can wrap the change
+    session_about_to_be_added = Signal(int)
+    session_added = Signal(int)
+    session_about_to_be_removed = Signal(int)
+    session_removed = Signal(int)
+    session_changed = Signal(int)
+    session_finished = Signal(int)
+
+    def __init__(self, log_dir=SESSION_LOG_DIR, poll_interval=500, parent=None):
+        super().__init__(parent)
+        self.log_dir = log_dir
+        self.sessions = []
+        self._timer = QTimer(self)
+        self._timer.setInterval(poll_interval)
+        self._timer.timeout.connect(self.poll)
+
+    def launch(self, command, show='', shot='', software='', cwd=None, env=None, on_exit=None):
+        """Start a command and return its LaunchSession, raises OSError if it can't be started."""
+        os.makedirs(self.log_dir, exist_ok=True)
+        log_name = f"{show}_{shot}_{software}_{time.strftime('%Y%m%d_%H%M%S')}_{len(self.sessions)}.log"
+        log_path = os.path.join(self.log_dir, log_name.replace(' ', '_').replace(os.sep, '_'))
+
+        try:
+            with span('launch.start', software=software), open(log_path, 'wb') as stderr_file:
+                process = subprocess.Popen(command, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                                           stdout=subprocess.DEVNULL, stderr=stderr_file, **_detach_options())
+        except OSError:
+            try:
+                os.remove(log_path)
+            except OSError:
+                pass  # The launch error is the one to report
+            raise
+
+        session = LaunchSession(show, shot, software, command, process, log_path, on_exit)
+        row = len(self.sessions)
+        self.session_about_to_be_added.emit(row)
+        self.sessions.append(session)
+        self.session_added.emit(row)
+        if not self._timer.isActive():
+            self._timer.start()
+        return session
+
+    def running_sessions(self):
+        return [session for session in self.sessions if session.running]
+
+    def sessions_for_shot(self, show, shot):
+        return [session for session in self.sessions if session.show == show and session.shot == shot]
+
+    def clear_finished(self):
+        """Forget the sessions that have exited, their logs are kept."""
+        for row in reversed(range(len(self.sessions))):
+            if not self.sessions[row].running:
+                self.session_about_to_be_removed.emit(row)
+                del self.sessions[row]
+                self.session_removed.emit(row)
+
+    def poll(self):
+        for row, session in enumerate(self.sessions):
+            if not session.running:
+                continue
+
+            exit_code = session.process.poll()
+            try:
+                log_size = os.path.getsize(session.log_path)
+            except OSError:
+                log_size = session.log_size
+
+            log_changed = log_size != session.log_size
+            if log_changed or exit_code is not None:
+                session.log_size = log_size
+                session.stderr_tail = read_tail(session.log_path)
+
+            if exit_code is None:
+                if log_changed:
+                    self.session_changed.emit(row)
+                continue
+
+            session.exit_code = exit_code
+            if session.on_exit:
+                try:
+                    session.on_exit(session)
+                except Exception as e:
+                    print(f'Error in exit handler for {session.software}: {e}')
+            self.session_changed.emit(row)
+            self.session_finished.emit(row)
+
+        if not self.running_sessions():
+            self._timer.stop()
+
+
+class SessionTableModel(QAbstractTableModel):
+    """Live table of the sessions of a LaunchManager."""
+
+    HEADERS = ['Show', 'Shot', 'Software', 'PID', 'Started', 'Status', 'Stderr']
+
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        manager.session_about_to_be_added.connect(self._on_session_about_to_be_added)
+        manager.session_added.connect(self._on_session_added)
+        manager.session_about_to_be_removed.connect(self._on_session_about_to_be_removed)
+        manager.session_removed.connect(self._on_session_removed)
+        manager.session_changed.connect(self._on_session_changed)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.manager.sessions)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        session = self.manager.sessions[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return session.show
+            if column == 1:
+                return session.shot
+            if column == 2:
+                return session.software
+            if column == 3:
+                return str(session.pid)
+            if column == 4:
+                return time.strftime('%H:%M:%S', time.localtime(session.started))
+            if column == 5:
+                return 'Running' if session.running else f'Exited ({session.exit_code})'
+            if column == 6:
+                return session.stderr_tail[-1] if session.stderr_tail else ''
+        elif role == Qt.ToolTipRole:
+            if column == 6 and session.stderr_tail:
+                return '\n'.join(session.stderr_tail)
+            return ' '.join(str(part) for part in session.command)
+        return None
+
+    def _on_session_about_to_be_added(self, row):
+        self.beginInsertRows(QModelIndex(), row, row)
+
+    def _on_session_added(self, row):
+        self.endInsertRows()
+
+    def _on_session_about_to_be_removed(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+
+    def _on_session_removed(self, row):
+        self.endRemoveRows()
+
+    def _on_session_changed(self, row):
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
@@ -1,13 +1,22 @@
 import os
-import json
 import sys
-import subprocess
 from functools import partial
-from PySide6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget, QComboBox, QTableWidget, 
-                               QTableWidgetItem, QHeaderView, QPushButton, QMessageBox, QHBoxLayout, QLabel, 
-                               QMenu)
-from PySide6.QtGui import QIcon, QPixmap, QCursor
-from PySide6.QtCore import Qt, QSize, QPoint
+from PySide6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget, QComboBox, QTableView, 
+                               QAbstractItemView, QHeaderView, QMessageBox, QLabel, QMenu, QProgressBar,
+                               QDockWidget, QLineEdit, QPushButton)
+from PySide6.QtGui import QCursor
+from PySide6.QtCore import Qt, QSize
+from metadata_store import open_store, METADATA_DIR
+from shot_table_model import shot_key, ShotTableModel, ButtonDelegate, ThumbnailDelegate
+from show_loader import ShowLoader
+from process_manager import LaunchManager, SessionTableModel
+from shot_registry import ShotRegistry, FILTER_HELP
+from icon_cache import SOFTWARE_ICONS
+from metadata_watcher import MetadataWatcher
+from script_index import ScriptIndex, LatestScriptTableModel, comp_folder
+from background_task import BackgroundTask
+from launch_context import LaunchContextCache, LaunchError
+from thumbnail_cache import ThumbnailLoader, track_visible_rows
 
 class ProjectLauncher(QMainWindow):
     def __init__(self):
@@ -27,12 +36,35 @@ class ProjectLauncher(QMainWindow):
         self.show_dropdown.currentIndexChanged.connect(self.load_shots_for_show)
         self.layout.addWidget(self.show_dropdown)
 
-        # Table for displaying shots
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)  # 5 columns for data + 1 column for buttons
-        self.table.setHorizontalHeaderLabels(['Show', 'Shot', 'Frame Range', 'Comment', 'Resolution', 'Launch'])
+        # Type to filter the shots of the selected show
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText(FILTER_HELP)
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.apply_filter)
+        self.layout.addWidget(self.filter_input)
+
+        # Software buttons painted in the 'Launch' column, icons come from icons/ next to this file
+        self.launch_delegate = ButtonDelegate([(software, '', software) for software in SOFTWARE_ICONS],
+                                              QSize(32, 32), self)
+        self.launch_delegate.clicked.connect(self.on_launch_clicked)
+
+        # Table for displaying shots, with a plate thumbnail decoded in the background for rows in view
+        self.shot_model = ShotTableModel('Launch', self, preview=True)
+        self.thumbnails = ThumbnailLoader(parent=self)
+        self.thumbnail_delegate = ThumbnailDelegate(self.thumbnails, 40, self)
+        self.table = QTableView()
+        self.table.setModel(self.shot_model)
+        self.table.setItemDelegateForColumn(self.shot_model.action_column, self.launch_delegate)
+        self.table.setItemDelegateForColumn(self.shot_model.preview_column, self.thumbnail_delegate)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table.cellClicked.connect(self.on_table_cell_clicked)
+        self.table.horizontalHeader().setSectionResizeMode(self.shot_model.preview_column, QHeaderView.Fixed)
+        self.table.horizontalHeader().resizeSection(self.shot_model.preview_column, 40 * 16 // 9 + 4)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(40)  # Fits the 32px launch icons
+        self.thumbnails.thumbnail_ready.connect(lambda show_name, shot_name: self.table.viewport().update())
+        self.visible_rows_timer = track_visible_rows(self.thumbnails, self.table)
+        self.table.clicked.connect(self.on_table_cell_clicked)
         self.table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self.on_right_click)
         self.layout.addWidget(self.table)
@@ -49,212 +81,345 @@ class ProjectLauncher(QMainWindow):
         self.form_layout.addWidget(self.frame_range_label)
         self.form_layout.addWidget(self.resolution_label)
 
+        # Launched applications run detached and are listed in the sessions dock
+        self.launch_manager = LaunchManager(parent=self)
+        self.launch_manager.session_finished.connect(self.on_session_finished)
+        self.session_model = SessionTableModel(self.launch_manager, self)
+        self.session_table = QTableView()
+        self.session_table.setModel(self.session_model)
+        self.session_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.session_table.horizontalHeader().setStretchLastSection(True)
+        self.session_table.verticalHeader().hide()
+        self.session_table.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.session_table.customContextMenuRequested.connect(self.on_session_right_click)
+
+        # Commands, environments and Nuke startup scripts of the loaded shots, made in the background
+        self.launch_contexts = LaunchContextCache()
+        self.launch_context_tasks = []
+
+        self.session_dock = QDockWidget('Sessions', self)
+        self.session_dock.setWidget(self.session_table)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.session_dock)
+
+        # Comp scripts are listed on worker threads and cached until their folder changes
+        self.script_index = ScriptIndex()
+        self.script_tasks = []
+
+        # Newest comp script of every shot of the selected show, double-click one to open it
+        self.latest_model = LatestScriptTableModel(self)
+        self.latest_table = QTableView()
+        self.latest_table.setModel(self.latest_model)
+        self.latest_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.latest_table.horizontalHeader().setStretchLastSection(True)
+        self.latest_table.verticalHeader().hide()
+        self.latest_table.doubleClicked.connect(self.on_latest_double_clicked)
+        self.latest_button = QPushButton('Find Latest Comps')
+        self.latest_button.clicked.connect(self.find_latest_comps)
+
+        latest_widget = QWidget()
+        latest_layout = QVBoxLayout(latest_widget)
+        latest_layout.setContentsMargins(0, 0, 0, 0)
+        latest_layout.addWidget(self.latest_button)
+        latest_layout.addWidget(self.latest_table)
+        self.latest_dock = QDockWidget('Latest Comps', self)
+        self.latest_dock.setWidget(latest_widget)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.latest_dock)
+        self.tabifyDockWidget(self.session_dock, self.latest_dock)
+        self.session_dock.raise_()
+
         # Load project data
-        self.shows = {}
-        self.metadata_path = os.path.join(os.path.expanduser('~/.nuke'), 'metadata')
+        self.shows = {}  # Show name -> shot list, filled per show on first use
+        self.registry = ShotRegistry()  # Loaded shots by (show, shot), for lookups and filtering
+        self.metadata_path = METADATA_DIR
+        self.store = open_store(self.metadata_path)  # SQLite or per-show manifests, see SHOW_MANAGER_BACKEND
+
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(300)
+        self.load_progress.hide()
+        self.statusBar().addPermanentWidget(self.load_progress)
+
+        # Shows and shots are read on a worker thread so the window appears at once
+        self.loader = ShowLoader(self.store, parent=self)
+        self.loader.show_found.connect(self.on_show_found)
+        self.loader.shots_loaded.connect(self.on_shots_loaded)
+        self.loader.progress.connect(self.on_load_progress)
+        self.loader.finished.connect(self.on_load_finished)
+        self.load_requests = {}  # Show name -> id of the load filling its shot list
+
+        # Changes made by other windows and processes arrive as row updates
+        self.watcher = MetadataWatcher(self.store, publish=False, parent=self)
+        self.watcher.shots_changed.connect(self.on_shots_changed)
+        self.watcher.shots_removed.connect(self.on_shots_removed)
         self.load_shows()
 
     def load_shows(self):
-        if not os.path.exists(self.metadata_path):
-            QMessageBox.warning(self, 'Warning', 'Metadata directory does not exist.')
+        self.loader.load_shows()
+
+    def on_show_found(self, show_name):
+        if show_name in self.shows:
+            return
+        self.shows[show_name] = None
+
+        # Keep the dropdown sorted without re-selecting the current show
+        position = sorted(self.shows).index(show_name)
+        if self.show_dropdown.count():
+            self.show_dropdown.blockSignals(True)
+            self.show_dropdown.insertItem(position, show_name)
+            self.show_dropdown.blockSignals(False)
+        else:
+            self.show_dropdown.addItem(show_name)  # Selects the first show and starts loading it
+
+    def on_shots_loaded(self, request_id, show_name, shots):
+        if self.load_requests.get(show_name) != request_id:
+            return  # The show was reloaded since, these rows are stale
+        shots = [shot for shot in shots if shot_key(shot) not in self.registry]  # Already sent by the watcher
+        self.registry.add_shots(shots)
+        self.prepare_launches(shots)
+        if self.shot_model.shots() is self.shows.get(show_name):
+            self.shot_model.append_shots(shots)
+        elif self.shows.get(show_name) is not None:
+            self.shows[show_name].extend(shots)
+
+    def on_shots_changed(self, shots):
+        """Apply shots added or changed by any process row by row, without reloading the show."""
+        appended = []
+        changed = []
+        for shot in shots:
+            show_name = shot['show']
+            if show_name not in self.shows:
+                self.on_show_found(show_name)
+                continue
+            if self.shows[show_name] is None:
+                continue  # Not opened yet, it is read in full when it is
+
+            existing = self.registry.get(show_name, shot['shot'])
+            if existing is None:
+                if self.shot_model.shots() is self.shows[show_name]:
+                    appended.append(shot)
+                else:
+                    self.shows[show_name].append(shot)
+                self.registry.add(shot)
+                continue
+
+            row = self.shot_model.row_of(show_name, shot['shot'])
+            if row >= 0:
+                self.shot_model.update_shot(row, **shot)
+            else:
+                existing.update(shot)
+            self.registry.update(existing)
+            changed.append(shot_key(existing))
+        self.shot_model.append_shots(appended)
+
+        # A changed shot may have a new plate, rows in view ask for their thumbnail again when repainted
+        if changed:
+            self.thumbnails.invalidate(changed)
+            self.table.viewport().update()
+        self.prepare_launches([self.registry.get(*shot_key(shot)) for shot in shots if shot_key(shot) in self.registry])
+
+    def on_shots_removed(self, keys):
+        self.launch_contexts.invalidate(keys)
+        for show_name, shot_name in keys:
+            shot = self.registry.remove(show_name, shot_name)
+            if shot is None:
+                continue
+            row = self.shot_model.row_of(show_name, shot_name)
+            if row >= 0:
+                self.shot_model.remove_row(row)
+            elif self.shows.get(show_name):
+                self.shows[show_name].remove(shot)
+
+    def prepare_launches(self, shots):
+        """Make the launch contexts of shots on a worker thread, so launching them is just starting a process."""
+        if not shots:
             return
+        task = BackgroundTask(self.launch_contexts.precompute, list(shots), parent=self)
+        self.launch_context_tasks.append(task)
+        task.finished.connect(lambda count: self.launch_context_tasks.remove(task))
+        task.failed.connect(lambda message: self.launch_context_tasks.remove(task))
+        task.start()
 
-        # Load all metadata files
-        for metadata_file in os.listdir(self.metadata_path):
-            if metadata_file.endswith('_metadata.json'):
-                with open(os.path.join(self.metadata_path, metadata_file), 'r') as file:
-                    metadata = json.load(file)
-                    show_name = metadata['show']
-                    if show_name not in self.shows:
-                        self.shows[show_name] = []
-                    self.shows[show_name].append(metadata)
+    def on_load_progress(self, done, total, text):
+        self.load_progress.setMaximum(max(total, 1))
+        self.load_progress.setValue(done)
+        self.load_progress.setFormat(f'{text}: %v/%m')
+        self.load_progress.show()
 
-        self.show_dropdown.addItems(sorted(self.shows.keys()))
+    def on_load_finished(self, show_name):
+        self.load_progress.hide()
 
     def load_shots_for_show(self):
         show_name = self.show_dropdown.currentText()
         if show_name in self.shows:
+            if self.shows[show_name] is None:
+                self.shows[show_name] = []  # Filled in batches by the loader
+                self.load_requests[show_name] = self.loader.load_shots(show_name)
             self.update_table(self.shows[show_name])
         else:
-            self.table.setRowCount(0)
+            self.update_table([])
 
     def update_table(self, shots):
-        self.table.setRowCount(0)
+        self.shot_model.set_shots(shots)
+        if self.filter_input.text().strip():
+            self.apply_filter()
+
+    def apply_filter(self):
+        """Narrow the table to the shots of the selected show matching the filter text."""
+        text = self.filter_input.text().strip()
+        if not text:
+            self.shot_model.set_filter(None)
+            self.statusBar().clearMessage()
+            return
 
-        for shot in shots:
-            row_position = self.table.rowCount()
-            self.table.insertRow(row_position)
-
-            self.table.setItem(row_position, 0, QTableWidgetItem(shot.get('show', '')))
-            self.table.setItem(row_position, 1, QTableWidgetItem(shot.get('shot', '')))
-            self.table.setItem(row_position, 2, QTableWidgetItem(shot.get('frame_range', '')))
-            self.table.setItem(row_position, 3, QTableWidgetItem(shot.get('comment', '')))
-            self.table.setItem(row_position, 4, QTableWidgetItem(shot.get('resolution', '')))
-
-            # Add software buttons in the 'Launch' column
-            self.add_software_buttons(row_position, shot)
-
-    def add_software_buttons(self, row, shot):
-        # Clear previous buttons
-        widget = QWidget()
-        layout = QHBoxLayout()
-        layout.setContentsMargins(0, 0, 0, 0)
-
-        icons = {
-            'nuke': r'C:\Users\vishr\Documents\project manager python\pratap\show_manager\icons/oundry_n_icon.png',
-            'houdini': r'C:\Users\vishr\Documents\project manager python\pratap\show_manager\icons/houdini_icon.png',
-            'substance': r'C:\Users\vishr\Documents\project manager python\pratap\show_manager\icons/substance_icon.png',
-            'katana': r'C:\Users\vishr\Documents\project manager python\pratap\show_manager\icons/katana_icon.jpeg'
-        }
-
-        for software, icon_path in icons.items():
-            button = QPushButton()
-            button.setIcon(QIcon(icon_path))
-            button.setIconSize(QSize(32, 32))
-            button.clicked.connect(partial(self.launch_software, software, shot))
-            layout.addWidget(button)
-
-        widget.setLayout(layout)
-        self.table.setCellWidget(row, 5, widget)
-
-    def on_table_cell_clicked(self, row, column):
-        if column == 1:  # Show metadata when clicking on 'Shot' column
-            show_name = self.show_dropdown.currentText()
-            self.current_row = row
-            self.current_shot = next(shot for shot in self.shows[show_name] if shot.get('shot') == self.table.item(row, 1).text())
+        show_name = self.show_dropdown.currentText()
+        keys = self.registry.search(text, show_name)
+        self.shot_model.set_filter(keys, self.registry.matcher(text))
+        self.statusBar().showMessage(f'{len(keys)} of {len(self.registry.show_keys(show_name))} shots match')
+
+    def on_launch_clicked(self, row, software):
+        shot = self.shot_model.shot_at(row)
+        if shot is not None:
+            self.launch_software(software, shot)
+
+    def on_table_cell_clicked(self, index):
+        if index.column() == 1:  # Show metadata when clicking on 'Shot' column
+            self.current_row = index.row()
+            self.current_shot = self.shot_model.shot_at(index.row())
             self.frame_range_label.setText(f"Frame Range: {self.current_shot.get('frame_range', '')}")
             self.resolution_label.setText(f"Resolution: {self.current_shot.get('resolution', '')}")
 
     def on_right_click(self, position):
         index = self.table.indexAt(position)
         if index.isValid():
-            shot_name = self.table.item(index.row(), 1).text()
+            shot = self.shot_model.shot_at(index.row())
             menu = QMenu()
+            open_latest_action = menu.addAction("Open Latest Script")
+            open_latest_action.triggered.connect(partial(self.open_latest_script, shot))
             select_scripts_action = menu.addAction("Select Scripts")
-            select_scripts_action.triggered.connect(partial(self.show_scripts_in_comp_folder, shot_name))
+            select_scripts_action.triggered.connect(partial(self.show_scripts_in_comp_folder, shot))
             menu.exec(QCursor.pos())
 
-    def show_scripts_in_comp_folder(self, shot_name):
-        comp_folder = os.path.join(r'C:\Users\vishr\Documents\project manager python\pratap\projects\DIG', f'DIG_{shot_name}', 'comp')
-        
-        if not os.path.exists(comp_folder):
-            QMessageBox.warning(self, 'Error', f'Comp folder does not exist for shot: {shot_name}')
+    def list_comp_scripts(self, shot, on_listed):
+        """List a shot's comp scripts on a worker thread and call on_listed(folder, scripts) with them."""
+        folder = comp_folder(shot)
+        if not os.path.isdir(folder):
+            QMessageBox.warning(self, 'Error', f"Comp folder does not exist for shot: {shot.get('shot', '')}")
             return
 
-        scripts = [f for f in os.listdir(comp_folder) if f.endswith('.nk')]
-        
+        task = BackgroundTask(self.script_index.scan, [folder], parent=self)
+        self.script_tasks.append(task)
+
+        def finished(results):
+            self.script_tasks.remove(task)
+            on_listed(folder, results.get(folder, []))
+
+        task.finished.connect(finished)
+        task.failed.connect(lambda message: self.script_tasks.remove(task))
+        task.start()
+
+    def show_scripts_in_comp_folder(self, shot):
+        position = QCursor.pos()  # Where the menu was opened, the listing may take a moment
+        self.list_comp_scripts(shot, partial(self.show_script_menu, shot, position))
+
+    def show_script_menu(self, shot, position, folder, scripts):
         if not scripts:
             QMessageBox.information(self, 'No Scripts', 'No Nuke scripts found in the comp folder.')
             return
 
         script_menu = QMenu()
+        for script in scripts:  # Newest version first
+            script_action = script_menu.addAction(script.name)
+            script_action.triggered.connect(partial(self.open_nuke_script, script.path, shot))
+        script_menu.exec(position)
+
+    def open_latest_script(self, shot):
+        def open_latest(folder, scripts):
+            if scripts:
+                self.open_nuke_script(scripts[0].path, shot)
+            else:
+                QMessageBox.information(self, 'No Scripts', 'No Nuke scripts found in the comp folder.')
 
-        for script in scripts:
-            script_action = script_menu.addAction(script)
-            script_action.triggered.connect(partial(self.open_nuke_script, os.path.join(comp_folder, script)))
+        self.list_comp_scripts(shot, open_latest)
 
-        script_menu.exec(QCursor.pos())
+    def find_latest_comps(self):
+        """Fill the Latest Comps dock with the newest script of every shot of the selected show."""
+        show_name = self.show_dropdown.currentText()
+        # Read from the store, the table may still be loading the show
+        shots = [shot for shot in self.store.shots(show_name) if shot.get('path')]
+        if not shots:
+            self.latest_model.set_rows([])
+            return
+
+        task = BackgroundTask(self.script_index.scan, [comp_folder(shot) for shot in shots], parent=self)
+        self.script_tasks.append(task)
+        self.latest_button.setEnabled(False)
+
+        def finished(results):
+            self.script_tasks.remove(task)
+            self.latest_button.setEnabled(True)
+            self.latest_model.set_rows((shot, (results.get(comp_folder(shot)) or [None])[0]) for shot in shots)
+            self.statusBar().showMessage(f'Latest comps of {len(shots)} shots in {show_name}', 5000)
+
+        def failed(message):
+            self.script_tasks.remove(task)
+            self.latest_button.setEnabled(True)
+            QMessageBox.warning(self, 'Error', f'Could not list comp scripts: {message}')
 
-    def open_nuke_script(self, script_path):
+        task.progress.connect(lambda done, total: self.statusBar().showMessage(f'Listing comp folders: {done}/{total}'))
+        task.finished.connect(finished)
+        task.failed.connect(failed)
+        task.start()
+
+    def on_latest_double_clicked(self, index):
+        shot, script = self.latest_model.row_at(index.row())
+        if script is not None:
+            self.open_nuke_script(script.path, shot)
+
+    def open_nuke_script(self, script_path, shot):
         try:
-            subprocess.run([r'C:\Program Files\Nuke15.1v2\Nuke15.1.exe', script_path], check=True)
-        except subprocess.CalledProcessError as e:
+            context = self.launch_contexts.open_context('nuke', shot, script_path)
+            self.launch_manager.launch(context.command, shot.get('show', ''), shot.get('shot', ''), 'nuke',
+                                       env=context.environment())
+        except (LaunchError, OSError) as e:
             QMessageBox.warning(self, 'Error', f'Failed to open Nuke script: {e}')
 
+    def on_session_right_click(self, position):
+        menu = QMenu()
+        clear_action = menu.addAction('Clear Finished')
+        clear_action.setEnabled(len(self.launch_manager.running_sessions()) < len(self.launch_manager.sessions))
+        clear_action.triggered.connect(self.launch_manager.clear_finished)
+        menu.exec(QCursor.pos())
+
+    def on_session_finished(self, row):
+        session = self.launch_manager.sessions[row]
+        if session.exit_code:
+            self.statusBar().showMessage(
+                f'{session.software} for {session.show} {session.shot} exited with code {session.exit_code}', 10000)
+
     def launch_software(self, software_name, shot):
-        # Path to executable for each software
-        software_paths = {
-            'nuke': r'C:\Program Files\Nuke15.1v2\Nuke15.1.exe',
-            'houdini': r'C:\Program Files\Houdini_19.5\bin\houdinifx.exe',
-            'substance': r'C:\Program Files\Substance\SubstancePainter.exe',
-            'katana': r'C:\Program Files\Katana\katana.exe'
-        }
-
-        # Get metadata path
-        show_name = self.show_dropdown.currentText()
-        shot_number = shot.get('shot', '').replace(' ', '_')
-        metadata_file = f"{show_name}_{shot_number}_metadata.json"
-        metadata_path = os.path.join(self.metadata_path, metadata_file)
-
-        if software_name == 'nuke':
-            # Ensure metadata file exists
-            if os.path.exists(metadata_path):
-                # Load metadata
-                with open(metadata_path, 'r') as file:
-                    metadata = json.load(file)
-                
-                # Extract metadata values
-                frame_range = metadata.get('frame_range', '1001-1100')
-                resolution = metadata.get('resolution', '2K')
-                shot_path = metadata.get('path', '')
-
-                # Create a temporary script to set project settings in Nuke
-                temp_script_path = os.path.join(os.path.expanduser('~'), 'set_project_settings.py')
-
-                # Split frame range into start and end frames
-                try:
-                    start_frame, end_frame = map(int, frame_range.split('-'))
-                except ValueError:
-                    start_frame = 1001
-                    end_frame = 1100
-                    print('Error: Frame range format is incorrect. Using default values.')
-
-                # Write script content
-                script_content = f"""
-import nuke
-
-# Open the template
-nuke.scriptOpen('C:/Users/vishr/Documents/project manager python/pratap/nuke_templete/empty_templete_updated.nk')
-
-# Access project settings
-project_settings = nuke.root()
-
-# Set metadata values
-project_settings['first_frame'].setValue({start_frame})
-project_settings['last_frame'].setValue({end_frame})
-
-# Set resolution
-if "{resolution}" == "2K":
-    project_settings['format'].setValue('2K_DCP')
-elif "{resolution}" == "4K":
-    project_settings['format'].setValue('4K_DCP')
-elif "{resolution}" == "HD":
-    project_settings['format'].setValue('HD_1080')
-else:
-    print('Error: Resolution value is invalid.')
-
-# Set additional metadata
-project_settings['label'].setValue(f"Show: {metadata.get('show')}  Shot: {metadata.get('shot')}")
-
-# Save the modified script to the shot's Nuke script folder
-script_path = os.path.join("{shot_path}", "comp", "{shot_number}_v001.nk")
-nuke.scriptSaveAs(script_path)
-                """
-                with open(temp_script_path, 'w') as script_file:
-                    script_file.write(script_content)
-
-                # Launch Nuke with the metadata and run the script
-                command = [
-                    software_paths[software_name],
-                    '-run', temp_script_path
-                ]
-
-                try:
-                    subprocess.run(command, check=True)
-                except subprocess.CalledProcessError as e:
-                    QMessageBox.warning(self, 'Error', f'Failed to launch Nuke with metadata: {e}')
-                finally:
-                    os.remove(temp_script_path)  # Clean up the temporary script
-            else:
-                QMessageBox.warning(self, 'Error', 'Metadata file does not exist.')
+        # The row's record is the shot metadata, kept current by the watcher, no need to read it again
+        show_name = shot.get('show', '')
+        metadata = self.registry.get(show_name, shot.get('shot', '')) or shot
 
-        else:
-            if software_name in software_paths:
-                command = [software_paths[software_name]]
-                try:
-                    subprocess.run(command, check=True)
-                except subprocess.CalledProcessError as e:
-                    QMessageBox.warning(self, 'Error', f'Failed to launch {software_name}: {e}')
+        # Usually made when the show loaded, Nuke's startup script sets the shot's frames and format
+        try:
+            context = self.launch_contexts.context(software_name, metadata)
+        except (LaunchError, OSError) as e:
+            QMessageBox.warning(self, 'Error', str(e))
+            return
+
+        try:
+            self.launch_manager.launch(context.command, show_name, shot.get('shot', ''), software_name,
+                                       env=context.environment())
+        except OSError as e:
+            QMessageBox.warning(self, 'Error', f'Failed to launch {software_name}: {e}')
+
+    def closeEvent(self, event):
+        self.loader.cancel()
+        self.thumbnails.cancel()
+        self.watcher.close()
+        for task in self.script_tasks + self.launch_context_tasks:
+            task.cancel()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
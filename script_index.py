@@ -0,0 +1,172 @@
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+COMP_FOLDER = 'comp'
+MAX_WORKERS = 8  # Enough to hide network latency without flooding the file server
+
+_VERSION = re.compile(r'_v(\d+)\.nk$', re.IGNORECASE)
+
+
+def script_version(name):
+    """Return the version number of a 'SHOT_v012.nk' script name, or None if it has none."""
+    match = _VERSION.search(name)
+    return int(match.group(1)) if match else None
+
+
+def comp_folder(shot):
+    return os.path.join(shot.get('path', ''), COMP_FOLDER)
+
+
+class CompScript:
+    """One .nk script of a comp folder."""
+
+    __slots__ = ('name', 'path', 'version', 'mtime')
+
+    def __init__(self, name, path, version, mtime):
+        self.name = name
+        self.path = path
+        self.version = version
+        self.mtime = mtime
+
+    def sort_key(self):
+        # Versioned scripts come first by version, then by modification time
+        return (self.version is not None, self.version or 0, self.mtime)
+
+    def __repr__(self):
+        return f'CompScript({self.path!r})'
+
+
+def _scan_folder(folder):
+    scripts = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith('.nk') and entry.is_file():
+                scripts.append(CompScript(entry.name, entry.path, script_version(entry.name), entry.stat().st_mtime))
+    scripts.sort(key=CompScript.sort_key, reverse=True)
+    return scripts
+
+
+class ScriptIndex:
+    """Comp scripts per folder, newest first, cached until the folder's mtime changes.
+
+    Adding, removing or renaming a script changes the folder's mtime, so a cached
+    folder costs one stat instead of a listing over the network. Folders can be
+    scanned in parallel, e.g. every shot of a show for the latest comps.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._folders = {}  # folder -> (mtime_ns, [CompScript] newest first)
+
+    def scripts(self, folder):
+        """Return the scripts of a folder newest first, an empty list if the folder doesn't exist."""
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            with self._lock:
+                self._folders.pop(folder, None)
+            return []
+
+        with self._lock:
+            cached = self._folders.get(folder)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            scripts = _scan_folder(folder)
+        except OSError as e:
+            print(f'Could not list comp scripts in {folder}: {e}')
+            return []
+        with self._lock:
+            self._folders[folder] = (mtime, scripts)
+        return scripts
+
+    def latest(self, folder):
+        """Return the newest script of a folder, or None."""
+        scripts = self.scripts(folder)
+        return scripts[0] if scripts else None
+
+    def scan(self, folders, workers=MAX_WORKERS, progress=None, cancelled=None):
+        """Return {folder: scripts newest first} for many folders, listed on a bounded thread pool.
+
+        Folders that weren't reached before cancelled was set are left out.
+        """
+        results = {}
+        folders = list(dict.fromkeys(folders))
+        total = len(folders)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.scripts, folder): folder for folder in folders}
+            for done, future in enumerate(as_completed(futures), 1):
+                if future.cancelled():
+                    continue
+                results[futures[future]] = future.result()
+
+                if progress:
+                    progress(done, total)
+                if cancelled is not None and cancelled.is_set():
+                    for pending in futures:
+                        pending.cancel()
+
+        return results
+
+    def invalidate(self, folder=None):
+        with self._lock:
+            if folder is None:
+                self._folders.clear()
+            else:
+                self._folders.pop(folder, None)
+
+
+class LatestScriptTableModel(QAbstractTableModel):
+    """The newest comp script of every shot of a show."""
+
+    HEADERS = ['Shot', 'Latest Script', 'Version', 'Modified']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []  # (shot, CompScript or None)
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.endResetModel()
+
+    def row_at(self, row):
+        return self.rows[row] if 0 <= row < len(self.rows) else (None, None)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        shot, script = self.rows[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return shot.get('shot', '')
+            if script is None:
+                return 'No scripts' if column == 1 else ''
+            if column == 1:
+                return script.name
+            if column == 2:
+                return '' if script.version is None else f'v{script.version:03d}'
+            if column == 3:
+                return time.strftime('%Y-%m-%d %H:%M', time.localtime(script.mtime))
+        elif role == Qt.ToolTipRole and script is not None:
+            return script.path
+        return None
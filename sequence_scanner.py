@@ -0,0 +1,203 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from shot_record import parse_frame_range
+
+PLATE_FOLDER = 'footages'
+MAX_WORKERS = 8  # Enough to hide network latency without flooding the file server
+
+# 'plate.1001.exr', 'plate_1001.exr': prefix, frame number, extension
+_FRAME_FILE = re.compile(r'^(.*?)(\d+)(\.[A-Za-z][A-Za-z0-9]*)$')
+
+# Frame check statuses, in the order the check dialog lists them
+CHECK_STATUSES = ('mismatch', 'missing frames', 'unset', 'no plates', 'match')
+
+
+class Sequence:
+    """Numbered frames of one folder sharing a prefix and extension, e.g. plate.####.exr."""
+
+    __slots__ = ('folder', 'prefix', 'suffix', 'padding', 'first', 'last', 'count', 'gaps')
+
+    def __init__(self, folder, prefix, suffix, padding, frames):
+        frames = sorted(set(frames))
+        self.folder = folder
+        self.prefix = prefix
+        self.suffix = suffix
+        self.padding = padding
+        self.first = frames[0]
+        self.last = frames[-1]
+        self.count = len(frames)
+        # Missing frames as (first, last) runs, a plate usually has none or a few
+        self.gaps = [(previous + 1, frame - 1) for previous, frame in zip(frames, frames[1:]) if frame - previous > 1]
+
+    @property
+    def pattern(self):
+        return f"{self.prefix}{'#' * self.padding}{self.suffix}"
+
+    @property
+    def path(self):
+        """Nuke style path, e.g. /plates/plate.%04d.exr."""
+        return os.path.join(self.folder, f'{self.prefix}%0{self.padding}d{self.suffix}')
+
+    @property
+    def frame_range(self):
+        return f'{self.first}-{self.last}'
+
+    @property
+    def missing_count(self):
+        return sum(last - first + 1 for first, last in self.gaps)
+
+    def missing_text(self):
+        """Missing frames like '1005, 1010-1012'."""
+        return ', '.join(str(first) if first == last else f'{first}-{last}' for first, last in self.gaps)
+
+    def __repr__(self):
+        return f'Sequence({self.pattern!r}, {self.frame_range!r})'
+
+
+def collapse(folder, names):
+    """Group the file names of a folder into sequences, names without a frame number are skipped."""
+    groups = {}  # (prefix, extension) -> (frame numbers, digit counts)
+    for name in names:
+        match = _FRAME_FILE.match(name)
+        if not match:
+            continue
+        prefix, digits, suffix = match.groups()
+        frames, widths = groups.setdefault((prefix, suffix), ([], set()))
+        frames.append(int(digits))
+        widths.add(len(digits))
+    return sorted((Sequence(folder, prefix, suffix, min(widths), frames)
+                   for (prefix, suffix), (frames, widths) in groups.items()),
+                  key=lambda sequence: (sequence.folder, sequence.prefix, sequence.suffix))
+
+
+def main_plate(sequences):
+    """The sequence a shot's frame range comes from: the one with the most frames."""
+    return max(sequences, key=lambda sequence: (sequence.count, sequence.last - sequence.first), default=None)
+
+
+class SequenceScanner:
+    """Finds image sequences in folder trees, cached per folder until its mtime changes.
+
+    A folder's mtime changes when files are added, removed or renamed in it,
+    so a rescan lists only the folders that changed and only stats the others,
+    however many frames they hold.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._folders = {}  # folder -> (mtime_ns, sequences, subfolders)
+
+    def _folder(self, folder):
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            with self._lock:
+                self._folders.pop(folder, None)
+            return [], []
+
+        with self._lock:
+            cached = self._folders.get(folder)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        names = []
+        subfolders = []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        subfolders.append(entry.path)
+                    else:
+                        names.append(entry.name)
+        except OSError as e:
+            print(f'Could not list plates in {folder}: {e}')
+            return [], []
+
+        sequences = collapse(folder, names)
+        with self._lock:
+            self._folders[folder] = (mtime, sequences, subfolders)
+        return sequences, subfolders
+
+    def scan(self, folder):
+        """Return the sequences in a folder and its subfolders."""
+        sequences = []
+        pending = [folder]
+        while pending:
+            folder_sequences, subfolders = self._folder(pending.pop())
+            sequences.extend(folder_sequences)
+            pending.extend(subfolders)
+        return sequences
+
+    def scan_many(self, folders, workers=MAX_WORKERS, progress=None, cancelled=None):
+        """Return {folder: sequences} for many folder trees, scanned on a bounded thread pool.
+
+        Folders that weren't reached before cancelled was set are left out.
+        """
+        results = {}
+        folders = list(dict.fromkeys(folders))
+        total = len(folders)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.scan, folder): folder for folder in folders}
+            for done, future in enumerate(as_completed(futures), 1):
+                if future.cancelled():
+                    continue
+                results[futures[future]] = future.result()
+
+                if progress:
+                    progress(done, total)
+                if cancelled is not None and cancelled.is_set():
+                    for pending in futures:
+                        pending.cancel()
+
+        return results
+
+    def invalidate(self, folder=None):
+        with self._lock:
+            if folder is None:
+                self._folders.clear()
+            else:
+                self._folders.pop(folder, None)
+
+
+def plate_folder(shot):
+    return os.path.join(shot.get('path', ''), PLATE_FOLDER)
+
+
+def check_frame_ranges(shots, scanner=None, workers=MAX_WORKERS, progress=None, cancelled=None):
+    """Compare each shot's frame range with the main plate in its footages folder.
+
+    Returns one row dict per shot with show, shot, frame_range, plate_range,
+    missing, plate and a status from CHECK_STATUSES. Shots whose folder wasn't
+    scanned before cancelled was set are left out.
+    """
+    scanner = scanner or SequenceScanner()
+    shots = [shot for shot in shots if shot.get('path')]
+    scanned = scanner.scan_many([plate_folder(shot) for shot in shots], workers, progress, cancelled)
+
+    rows = []
+    for shot in shots:
+        folder = plate_folder(shot)
+        if folder not in scanned:
+            continue
+        plate = main_plate(scanned[folder])
+        frame_range = shot.get('frame_range', '')
+        row = {'show': shot.get('show', ''), 'shot': shot.get('shot', ''), 'frame_range': frame_range,
+               'plate_range': '', 'missing': '', 'plate': ''}
+        if plate is None:
+            row['status'] = 'no plates'
+        else:
+            row.update(plate_range=plate.frame_range, missing=plate.missing_text(),
+                       plate=os.path.relpath(plate.path, folder))
+            if not frame_range:
+                row['status'] = 'unset'
+            elif parse_frame_range(frame_range) != (plate.first, plate.last):
+                row['status'] = 'mismatch'
+            elif plate.gaps:
+                row['status'] = 'missing frames'
+            else:
+                row['status'] = 'match'
+        rows.append(row)
+    return rows
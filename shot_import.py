@@ -0,0 +1,248 @@
+import os
+import numpy as np
+import pandas as pd
+from instrumentation import span, timed
+
+REQUIRED_COLUMNS = ['SHOW', 'SHOT', 'RESOLUTION', 'FRAME-RANGE', 'COMMENTS']
+CHUNK_SIZE = 2000
+
+NAMED_RESOLUTIONS = ('2K', '4K', 'HD')
+DUPLICATE_ERROR = 'duplicate of an earlier SHOW/SHOT row'
+
+# Fields that are compared, in this order, when a shot list is imported again
+COMPARED_FIELDS = ('frame_range', 'comment', 'resolution')
+COMPARED_COLUMNS = ['FRAME-RANGE', 'COMMENTS', 'RESOLUTION']
+
+# Shot list column -> shot metadata key
+COLUMN_FIELDS = {
+    'SHOW': 'show',
+    'SHOT': 'shot',
+    'FRAME-RANGE': 'frame_range',
+    'COMMENTS': 'comment',
+    'RESOLUTION': 'resolution',
+}
+
+
+class ShotListError(Exception):
+    """Raised when a shot list can't be read at all, e.g. a required column is missing."""
+
+
+class ShotListImport:
+    """Validated result of reading a shot list.
+
+    records holds one dict per valid row, errors one dict per rejected row with
+    the same keys plus 'error'. Both carry the sheet row number in 'row' and a
+    hash of the compared fields in 'hash'.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.records = []
+        self.errors = []
+        self.row_count = 0
+
+
+def _normalize_columns(columns):
+    return [str(column).strip().upper() if column is not None else '' for column in columns]
+
+
+def _check_columns(columns):
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ShotListError(f'Shot list is missing the columns: {", ".join(missing)}. '
+                            f'Required columns are: {", ".join(REQUIRED_COLUMNS)}.')
+
+
+def _iter_excel_chunks(file_path, chunk_size):
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        columns = _normalize_columns(next(rows, ()))
+        _check_columns(columns)
+
+        batch = []
+        for row in rows:
+            batch.append(row[:len(columns)])
+            if len(batch) == chunk_size:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _iter_csv_chunks(file_path, chunk_size):
+    reader = pd.read_csv(file_path, chunksize=chunk_size, dtype=str, keep_default_na=False, skipinitialspace=True)
+    for chunk in reader:
+        chunk.columns = _normalize_columns(chunk.columns)
+        _check_columns(chunk.columns)
+        yield chunk
+
+
+def iter_chunks(file_path, chunk_size=CHUNK_SIZE):
+    """Yield the rows of an .xlsx or .csv shot list as DataFrames of up to chunk_size rows."""
+    if os.path.splitext(file_path)[1].lower() == '.csv':
+        return _iter_csv_chunks(file_path, chunk_size)
+    return _iter_excel_chunks(file_path, chunk_size)
+
+
+def _as_text(column):
+    # Excel gives numbers for numeric looking cells, 10.0 should still read as '10'
+    def to_text(value):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return ''
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    return column.map(to_text).str.strip()
+
+
+def validate_chunk(chunk, first_row, seen_keys):
+    """Validate one chunk of rows, returns (records, errors) as lists of dicts.
+
+    first_row is the sheet row number of the chunk's first row, seen_keys holds
+    the (show, shot) keys of earlier chunks and is updated in place.
+    """
+    text = pd.DataFrame({column: _as_text(chunk[column]) for column in REQUIRED_COLUMNS})
+    text['ROW'] = np.arange(first_row, first_row + len(text))
+
+    # Completely empty rows are padding, not errors
+    text = text[(text[REQUIRED_COLUMNS] != '').any(axis=1)]
+    if text.empty:
+        return [], []
+
+    resolution = text['RESOLUTION'].str.upper().str.replace(r'^(\d+)\s*X\s*(\d+)$', r'\1x\2', regex=True)
+    text['RESOLUTION'] = resolution
+    frames = text['FRAME-RANGE'].str.extract(r'^(\d+)\s*-\s*(\d+)$')
+    first_frame = pd.to_numeric(frames[0])
+    last_frame = pd.to_numeric(frames[1])
+    text['FRAME-RANGE'] = (frames[0] + '-' + frames[1]).fillna(text['FRAME-RANGE'])
+
+    text['HASH'] = pd.util.hash_pandas_object(text[COMPARED_COLUMNS], index=False)
+
+    keys = text['SHOW'] + '\x1f' + text['SHOT']
+    checks = [
+        (text['SHOW'] == '', 'missing SHOW'),
+        (text['SHOT'] == '', 'missing SHOT'),
+        (frames[0].isna() & (text['FRAME-RANGE'] != ''), 'FRAME-RANGE must look like 1001-1100'),
+        (first_frame > last_frame, 'FRAME-RANGE ends before it starts'),
+        (~resolution.isin(NAMED_RESOLUTIONS) & ~resolution.str.fullmatch(r'\d+x\d+') & (resolution != ''),
+         'RESOLUTION must be 2K, 4K, HD or WIDTHxHEIGHT'),
+        (keys.duplicated() | keys.isin(seen_keys), DUPLICATE_ERROR),
+    ]
+
+    messages = pd.Series('', index=text.index)
+    for mask, message in checks:
+        mask = mask.fillna(False).astype(bool)
+        messages = messages.where(~mask, messages + '; ' + message)
+    messages = messages.str.lstrip('; ')
+
+    seen_keys.update(keys[(text['SHOW'] != '') & (text['SHOT'] != '')])
+
+    renamed = text.rename(columns=COLUMN_FIELDS).rename(columns={'ROW': 'row', 'HASH': 'hash'})
+    valid = messages == ''
+    records = renamed[valid].to_dict('records')
+    errors = renamed[~valid].assign(error=messages[~valid]).to_dict('records')
+    return records, errors
+
+
+def read_shot_list(file_path, chunk_size=CHUNK_SIZE, progress=None):
+    """Stream an .xlsx or .csv shot list in chunks and return a ShotListImport."""
+    result = ShotListImport(file_path)
+    seen_keys = set()
+    first_row = 2  # Row 1 holds the column names
+
+    with span('import.read_shot_list', file=os.path.basename(file_path)) as timing:
+        try:
+            timing.add(nbytes=os.path.getsize(file_path))
+            for chunk in iter_chunks(file_path, chunk_size):
+                records, errors = validate_chunk(chunk, first_row, seen_keys)
+                result.records.extend(records)
+                result.errors.extend(errors)
+                first_row += len(chunk)
+                result.row_count = first_row - 2
+                if progress:
+                    progress(result.row_count)
+        except ShotListError:
+            raise
+        except Exception as e:  # openpyxl and pandas raise many kinds of errors for broken files
+            raise ShotListError(f'Could not read {file_path}: {e}')
+        timing.add(count=result.row_count)
+
+    return result
+
+
+
+def row_hashes(rows):
+    """Hash the compared fields of many metadata dicts the same way validate_chunk does."""
+    if not rows:
+        return []
+    frame = pd.DataFrame([[str(row.get(field) or '') for field in COMPARED_FIELDS] for row in rows])
+    return pd.util.hash_pandas_object(frame, index=False).tolist()
+
+
+class ShotListDiff:
+    """What importing a shot list would change.
+
+    inserts are new shot records, updates are existing records with the sheet's
+    values merged in, missing are existing shots of the sheet's shows that the
+    sheet no longer lists.
+    """
+
+    def __init__(self):
+        self.inserts = []
+        self.updates = []
+        self.unchanged = []
+        self.missing = []
+
+
+@timed('import.diff_shot_list', count=lambda diff: len(diff.inserts) + len(diff.updates) + len(diff.missing))
+def diff_shot_list(shot_list, existing):
+    """Diff the valid rows of a shot list against existing metadata by row hash.
+
+    existing maps (show, shot) to the current metadata of every shot of the
+    shows in the sheet. Each valid record also gets its 'status'.
+    """
+    existing_hashes = dict(zip(existing.keys(), row_hashes(list(existing.values()))))
+    diff = ShotListDiff()
+    sheet_keys = set()
+
+    for record in shot_list.records:
+        key = (record['show'], record['shot'])
+        sheet_keys.add(key)
+        current_hash = existing_hashes.get(key)
+
+        if current_hash is None:
+            record['status'] = 'new'
+            diff.inserts.append(record)
+        elif current_hash != record['hash']:
+            record['status'] = 'changed'
+            merged = dict(existing[key])
+            merged.update((field, record[field]) for field in COMPARED_FIELDS)
+            diff.updates.append(merged)
+        else:
+            record['status'] = 'unchanged'
+            diff.unchanged.append(record)
+
+    diff.missing = [shot for key, shot in existing.items() if key not in sheet_keys]
+    return diff
+
+
+REVIEW_STATUSES = ('new', 'changed', 'unchanged', 'missing', 'duplicate', 'invalid')
+
+
+def review_rows(shot_list, diff):
+    """Return every row of a diffed shot list with its 'status', for review before importing.
+
+    Valid rows are 'new', 'changed' or 'unchanged', rejected rows 'duplicate' or
+    'invalid', and existing shots the sheet no longer lists are added as 'missing'.
+    """
+    for error in shot_list.errors:
+        error['status'] = 'duplicate' if error['error'] == DUPLICATE_ERROR else 'invalid'
+
+    missing = [dict(shot, row='', status='missing') for shot in diff.missing]
+    return shot_list.records + shot_list.errors + missing
@@ -0,0 +1,170 @@
+import re
+import sys
+
+# Metadata fields of a shot in storage order, (show, shot) is the key
+FIELDS = ('show', 'shot', 'frame_range', 'comment', 'resolution', 'footage', 'elements', 'path')
+
+# Named resolutions: (width, height, Nuke format name)
+NAMED_RESOLUTIONS = {
+    '2K': (2048, 1080, '2K_DCP'),
+    '4K': (4096, 2160, '4K_DCP'),
+    'HD': (1920, 1080, 'HD_1080'),
+}
+
+_FRAME_RANGE = re.compile(r'^\s*(\d+)\s*-\s*(\d+)\s*$')
+_SIZE = re.compile(r'^\s*(\d+)\s*[xX]\s*(\d+)\s*$')
+_frame_numbers = {}  # Shots share a handful of frame numbers, keep one int object for each
+
+
+def parse_frame_range(frame_range):
+    """Return (first, last) from a '1001-1100' string, or None if it can't be parsed."""
+    match = _FRAME_RANGE.match(str(frame_range or ''))
+    if not match:
+        return None
+    first, last = int(match.group(1)), int(match.group(2))
+    return _frame_numbers.setdefault(first, first), _frame_numbers.setdefault(last, last)
+
+
+def parse_resolution(resolution):
+    """Return (name, width, height) for '2K', '4K', 'HD' or 'WIDTHxHEIGHT', or None if it can't be parsed."""
+    resolution = str(resolution or '').strip()
+    if resolution.upper() in NAMED_RESOLUTIONS:
+        width, height, _ = NAMED_RESOLUTIONS[resolution.upper()]
+        return resolution.upper(), width, height
+    match = _SIZE.match(resolution)
+    if not match:
+        return None
+    width, height = int(match.group(1)), int(match.group(2))
+    return f'{width}x{height}', width, height
+
+
+class Shot:
+    """One shot's metadata, with the frame range and resolution parsed once when set.
+
+    Frames are kept as ints and the resolution as its normalized name plus width
+    and height, text that doesn't parse is kept as it is and listed in problems.
+    Shots read like the metadata dicts they replace (shot['comment'],
+    shot.get(...), dict(shot), **shot), so code written for those keeps working.
+    """
+
+    __slots__ = ('show', 'shot', 'comment', 'footage', 'elements', 'path',
+                 'first_frame', 'last_frame', 'width', 'height', '_frame_text', '_resolution')
+
+    def __init__(self, show='', shot='', frame_range='', comment='', resolution='', footage='', elements='', path=''):
+        self.show = sys.intern(str(show))  # A few show names are shared by many shots
+        self.shot = str(shot)
+        self.comment = str(comment)
+        self.footage = str(footage)
+        self.elements = str(elements)
+        self.path = str(path)
+        self.frame_range = frame_range
+        self.resolution = resolution
+
+    @classmethod
+    def from_dict(cls, record):
+        """Build a Shot from a metadata dict, keys that aren't metadata fields are ignored."""
+        return cls(**{field: '' if record.get(field) is None else record.get(field, '') for field in FIELDS})
+
+    # Parsed fields
+
+    @property
+    def frame_range(self):
+        if self.first_frame is None:
+            return self._frame_text
+        return f'{self.first_frame}-{self.last_frame}'
+
+    @frame_range.setter
+    def frame_range(self, frame_range):
+        frames = parse_frame_range(frame_range)
+        self.first_frame, self.last_frame = frames or (None, None)
+        self._frame_text = None if frames else str(frame_range or '').strip()
+
+    @property
+    def frames(self):
+        return None if self.first_frame is None else (self.first_frame, self.last_frame)
+
+    @property
+    def resolution(self):
+        return self._resolution
+
+    @resolution.setter
+    def resolution(self, resolution):
+        parsed = parse_resolution(resolution)
+        if parsed:
+            self._resolution, self.width, self.height = parsed
+        else:
+            self._resolution, self.width, self.height = str(resolution or '').strip(), None, None
+
+    @property
+    def format_name(self):
+        """Nuke format name, e.g. '2K_DCP', or None if the resolution isn't known."""
+        if self._resolution in NAMED_RESOLUTIONS:
+            return NAMED_RESOLUTIONS[self._resolution][2]
+        return self._resolution if self.width else None
+
+    @property
+    def nuke_format(self):
+        """Full Nuke format string (width height x y right top pixel_aspect name), or None."""
+        if not self.width:
+            return None
+        return f'{self.width} {self.height} 0 0 {self.width} {self.height} 1 {self.format_name}'
+
+    @property
+    def problems(self):
+        """What is wrong with the frame range and resolution, empty values aren't problems."""
+        problems = []
+        if self.first_frame is None and self._frame_text:
+            problems.append(f'frame range {self._frame_text!r} must look like 1001-1100')
+        elif self.first_frame is not None and self.first_frame > self.last_frame:
+            problems.append('frame range ends before it starts')
+        if self.width is None and self._resolution:
+            problems.append(f'resolution {self._resolution!r} must be 2K, 4K, HD or WIDTHxHEIGHT')
+        return problems
+
+    # Mapping access, like the metadata dicts
+
+    def __getitem__(self, field):
+        if field not in FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field not in FIELDS:
+            raise KeyError(field)
+        if value is None:
+            value = ''
+        if field == 'show':
+            value = sys.intern(str(value))
+        elif field not in ('frame_range', 'resolution'):  # Those two are parsed by their setters
+            value = str(value)
+        setattr(self, field, value)
+
+    def __contains__(self, field):
+        return field in FIELDS
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __repr__(self):
+        return f'Shot({self.show!r}, {self.shot!r})'
+
+    def get(self, field, default=None):
+        return getattr(self, field) if field in FIELDS else default
+
+    def keys(self):
+        return FIELDS
+
+    def items(self):
+        return [(field, getattr(self, field)) for field in FIELDS]
+
+    def update(self, other=(), **fields):
+        pairs = [(field, other[field]) for field in other.keys()] if hasattr(other, 'keys') else list(other)
+        for field, value in pairs + list(fields.items()):
+            if field in FIELDS:  # Import bookkeeping like 'row' or 'status' isn't shot metadata
+                self[field] = value
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
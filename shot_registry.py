@@ -0,0 +1,199 @@
+import re
+import math
+import bisect
+from shot_record import parse_frame_range
+
+FILTER_HELP = 'Filter: any text, res:4K, frame:1050, frame:1001-1100, comment:word'
+
+_WORD = re.compile(r'\w+')
+
+
+def _words(text):
+    return set(_WORD.findall(str(text or '').lower()))
+
+
+def _search_text(shot):
+    return ' '.join(str(shot.get(field) or '') for field in ('show', 'shot', 'comment', 'resolution', 'frame_range')).lower()
+
+
+def parse_query(text):
+    """Split filter text into (kind, value) terms, kind is 'res', 'frame', 'comment' or 'text'."""
+    terms = []
+    for token in text.split():
+        kind, _, value = token.partition(':')
+        kind = kind.lower()
+        if not value or kind not in ('res', 'frame', 'comment'):
+            terms.append(('text', token.lower()))
+        elif kind == 'res':
+            terms.append(('res', value.upper()))
+        elif kind == 'comment':
+            terms.append(('comment', value.lower()))
+        else:
+            frames = parse_frame_range(value) if '-' in value else None
+            if frames is None and value.isdigit():
+                frames = (int(value), int(value))
+            terms.append(('frame', frames))  # None matches nothing
+    return terms
+
+
+class ShotRegistry:
+    """In-memory index of Shot records keyed on (show, shot).
+
+    Besides the key lookup it keeps secondary indexes on resolution, comment
+    words and frame range bounds, so a filter only scans the shots its indexed
+    terms leave over. The registry holds the same records as the shot lists,
+    call update() after changing one.
+    """
+
+    def __init__(self, shots=()):
+        self._shots = {}  # (show, shot) -> Shot
+        self._by_show = {}  # show -> {key: search text}, ordered like the shots were added
+        self._by_resolution = {}  # resolution -> set of keys
+        self._by_word = {}  # comment word -> set of keys
+        self._frames = []  # sorted (first, last, show, shot)
+        self._indexed = {}  # key -> (resolution, words, frame entry) as indexed
+        self.add_shots(shots)
+
+    def __len__(self):
+        return len(self._shots)
+
+    def __contains__(self, key):
+        return key in self._shots
+
+    def get(self, show_name, shot_name):
+        return self._shots.get((show_name, shot_name))
+
+    def shows(self):
+        return sorted(self._by_show)
+
+    def show_keys(self, show_name):
+        return self._by_show.get(show_name, {}).keys()
+
+    # Changes
+
+    def add(self, shot, keep_sorted=True):
+        key = (shot.get('show', ''), shot.get('shot', ''))
+        if key in self._shots:
+            self._unindex(key)
+        self._shots[key] = shot
+        self._by_show.setdefault(key[0], {})[key] = _search_text(shot)
+        self._index(key, shot, keep_sorted)
+
+    def add_shots(self, shots):
+        # Frame entries are appended and sorted once, instead of one insort per shot
+        for shot in shots:
+            self.add(shot, keep_sorted=False)
+        self._frames.sort()
+
+    def update(self, shot):
+        """Re-index a shot after its fields changed."""
+        self.add(shot)
+
+    def remove(self, show_name, shot_name):
+        key = (show_name, shot_name)
+        shot = self._shots.pop(key, None)
+        if shot is None:
+            return None
+        self._unindex(key)
+        keys = self._by_show[show_name]
+        del keys[key]
+        if not keys:
+            del self._by_show[show_name]
+        return shot
+
+    def remove_show(self, show_name):
+        for key in list(self.show_keys(show_name)):
+            self.remove(*key)
+
+    def _index(self, key, shot, keep_sorted=True):
+        resolution = shot.resolution.upper()
+        words = _words(shot.comment)
+        frames = shot.frames  # Parsed once when the Shot was made
+        entry = (frames[0], frames[1]) + key if frames else None
+
+        self._by_resolution.setdefault(resolution, set()).add(key)
+        for word in words:
+            self._by_word.setdefault(word, set()).add(key)
+        if entry and keep_sorted:
+            bisect.insort(self._frames, entry)
+        elif entry:
+            self._frames.append(entry)
+        self._indexed[key] = (resolution, words, entry)
+
+    def _unindex(self, key):
+        resolution, words, entry = self._indexed.pop(key)
+        self._by_resolution[resolution].discard(key)
+        for word in words:
+            self._by_word[word].discard(key)
+        if entry:
+            position = bisect.bisect_left(self._frames, entry)
+            if position < len(self._frames) and self._frames[position] == entry:
+                del self._frames[position]
+            else:
+                self._frames.remove(entry)  # Added earlier in a batch that isn't sorted yet
+
+    # Queries
+
+    def with_resolution(self, resolution):
+        return set(self._by_resolution.get(str(resolution).upper(), ()))
+
+    def with_comment_word(self, word):
+        return set(self._by_word.get(word.lower(), ()))
+
+    def in_frames(self, first, last):
+        """Keys of shots whose frame range overlaps first-last."""
+        end = bisect.bisect_right(self._frames, (last, math.inf))
+        return {(show, shot) for start, stop, show, shot in self._frames[:end] if stop >= first}
+
+    def search(self, text, show_name=None):
+        """Return the keys of the shots matching filter text, within one show if given."""
+        if show_name is not None:
+            texts = self._by_show.get(show_name, {})
+        else:
+            texts = {key: text for show_texts in self._by_show.values() for key, text in show_texts.items()}
+
+        keys = None  # None stands for every key in texts
+        text_terms = []
+        for kind, value in parse_query(text):
+            if kind == 'res':
+                found = self.with_resolution(value)
+            elif kind == 'comment':
+                found = self.with_comment_word(value)
+            elif kind == 'frame':
+                found = self.in_frames(*value) if value else set()
+            else:
+                text_terms.append(value)
+                continue
+            keys = found if keys is None else keys & found
+        if keys is not None:
+            keys &= texts.keys()
+
+        # Indexed terms narrowed the candidates first, free text is a substring scan of what is left
+        for term in text_terms:
+            if keys is None:
+                keys = {key for key, shot_text in texts.items() if term in shot_text}
+            else:
+                keys = {key for key in keys if term in texts[key]}
+        return set(texts) if keys is None else keys
+
+    def matcher(self, text):
+        """Return a function telling if a Shot matches filter text, for shots added after a search."""
+        terms = parse_query(text)
+
+        def matches(shot):
+            resolution = shot.resolution.upper()
+            words = _words(shot.comment)
+            frames = shot.frames
+            search_text = _search_text(shot)
+            for kind, value in terms:
+                if kind == 'res' and resolution != value:
+                    return False
+                if kind == 'comment' and value not in words:
+                    return False
+                if kind == 'frame' and not (value and frames and frames[0] <= value[1] and frames[1] >= value[0]):
+                    return False
+                if kind == 'text' and value not in search_text:
+                    return False
+            return True
+
+        return matches
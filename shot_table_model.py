@@ -0,0 +1,471 @@
+from functools import partial
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle, QStyleOptionButton, QApplication
+from PySide6.QtGui import QColor, QPainter
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, QPoint, QRect, QSize, QTimer, Signal
+import time
+import icon_cache
+from instrumentation import span
+from disk_stats import format_size, usage_key
+
+PROBLEM_COLOR = QColor(200, 40, 40)
+PARSED_FIELDS = ('frame_range', 'resolution')  # Columns a Shot validates
+
+# (metadata key, header label) for every data column, the action column comes last
+SHOT_COLUMNS = [
+    ('show', 'Show'),
+    ('shot', 'Shot'),
+    ('frame_range', 'Frame Range'),
+    ('comment', 'Comment'),
+    ('resolution', 'Resolution'),
+]
+
+
+def shot_key(shot):
+    return (shot.get('show', ''), shot.get('shot', ''))
+
+
+class ShotTableModel(QAbstractTableModel):
+    """Table model over a list of shot dicts with a trailing column for row actions.
+
+    The model works on the list it is given instead of a copy, so inserts and
+    removals made through it are also seen by whoever owns the list. A filter
+    only changes which of those shots are shown, rows are always view rows.
+    With preview a 'Preview' column painted by a ThumbnailDelegate comes
+    before the action column.
+    """
+
+    def __init__(self, action_header='Actions', parent=None, preview=False):
+        super().__init__(parent)
+        self.action_header = action_header
+        self.preview_column = len(SHOT_COLUMNS) if preview else -1
+        self.action_column = len(SHOT_COLUMNS) + (1 if preview else 0)
+        self._shots = []
+        self._view = self._shots  # Shown shots, the list itself unless filtered
+        self._match = None  # Filter function for shots added while filtered
+        self._rows = {}  # (show, shot) -> row
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._view)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.action_column + 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.column() >= len(SHOT_COLUMNS):
+            return None
+
+        shot = self._view[index.row()]
+        field = SHOT_COLUMNS[index.column()][0]
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            if role == Qt.ToolTipRole and field in PARSED_FIELDS and getattr(shot, 'problems', None):
+                return '\n'.join(shot.problems)
+            value = shot.get(field, '')
+            return '' if value is None else str(value)
+        if role == Qt.ForegroundRole and field in PARSED_FIELDS and getattr(shot, 'problems', None):
+            return PROBLEM_COLOR  # Flagged when the shot was loaded, not when it is launched
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or orientation != Qt.Horizontal:
+            return None
+        if section < len(SHOT_COLUMNS):
+            return SHOT_COLUMNS[section][1]
+        if section == self.preview_column:
+            return 'Preview'
+        return self.action_header
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # Shot access
+
+    def shots(self):
+        return self._shots
+
+    def shot_at(self, row):
+        if 0 <= row < len(self._view):
+            return self._view[row]
+        return None
+
+    def is_filtered(self):
+        return self._match is not None
+
+    def row_of(self, show_name, shot_name):
+        return self._rows.get((show_name, shot_name), -1)
+
+    def _reindex(self, start=0):
+        rows = self._rows
+        for row in range(start, len(self._view)):
+            shot = self._view[row]
+            rows[(shot.get('show', ''), shot.get('shot', ''))] = row  # shot_key inlined, this runs for every row
+
+    # Changes
+
+    def set_shots(self, shots):
+        """Show a new, unfiltered shot list."""
+        with span('table.set_shots') as timing:
+            self.beginResetModel()
+            self._shots = shots if shots is not None else []
+            self._view = self._shots
+            self._match = None
+            self._rows = {}
+            self._reindex()
+            self.endResetModel()
+            timing.add(count=len(self._shots))
+
+    def set_filter(self, keys, match=None):
+        """Only show the shots whose (show, shot) key is in keys, or all of them if keys is None.
+
+        match(shot) decides for shots inserted or appended while the filter is on.
+        """
+        with span('table.set_filter') as timing:
+            self.beginResetModel()
+            if keys is None:
+                self._view = self._shots
+                self._match = None
+            else:
+                self._view = [shot for shot in self._shots if (shot.get('show', ''), shot.get('shot', '')) in keys]
+                self._match = match or (lambda shot: shot_key(shot) in keys)
+            self._rows = {}
+            self._reindex()
+            self.endResetModel()
+            timing.add(count=len(self._view))
+
+    def insert_shot(self, shot, row=None):
+        """Insert a shot and return its row, or -1 if the filter hides it."""
+        if self._match is not None:
+            self._shots.append(shot)
+            if not self._match(shot):
+                return -1
+        row = len(self._view) if row is None else row
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._view.insert(row, shot)
+        self._reindex(row)
+        self.endInsertRows()
+        return row
+
+    def append_shots(self, shots):
+        """Append a batch of shots with a single insert notification."""
+        if self._match is not None:
+            self._shots.extend(shots)
+            shots = [shot for shot in shots if self._match(shot)]
+        if not shots:
+            return
+        with span('table.append_shots') as timing:
+            first = len(self._view)
+            self.beginInsertRows(QModelIndex(), first, first + len(shots) - 1)
+            self._view.extend(shots)
+            self._reindex(first)
+            self.endInsertRows()
+            timing.add(count=len(shots))
+
+    def update_shot(self, row, **fields):
+        shot = self._view[row]
+        old_key = shot_key(shot)
+        shot.update(fields)
+        if shot_key(shot) != old_key:
+            del self._rows[old_key]
+            self._rows[shot_key(shot)] = row
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.action_column))
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        shot = self._view.pop(row)
+        if self._view is not self._shots:
+            self._shots.remove(shot)
+        del self._rows[shot_key(shot)]
+        self._reindex(row)
+        self.endRemoveRows()
+        return shot
+
+    def remove_rows(self, rows):
+        """Remove many rows, one notification per run of adjacent rows, and return their shots."""
+        rows = sorted(set(rows), reverse=True)
+        runs = []  # (first, last) from the bottom up, so earlier removals don't move later ones
+        for row in rows:
+            if runs and runs[-1][0] == row + 1:
+                runs[-1] = (row, runs[-1][1])
+            else:
+                runs.append((row, row))
+
+        removed = []
+        for position, (first, last) in enumerate(runs):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            shots = self._view[first:last + 1]
+            del self._view[first:last + 1]
+            for shot in shots:
+                del self._rows[shot_key(shot)]
+            removed[:0] = shots  # Runs come bottom up, the shots are returned in row order
+            if position == len(runs) - 1:
+                self._reindex(first)  # Once, from the topmost removed row
+            self.endRemoveRows()
+
+        if removed and self._view is not self._shots:
+            gone = set(map(id, removed))
+            self._shots[:] = [shot for shot in self._shots if id(shot) not in gone]  # In place, the list is shared
+        return removed
+
+
+class ReviewTableModel(QAbstractTableModel):
+    """Read-only model over the rows of an import review, with sorting and a status filter.
+
+    Sorting and filtering only reorder a list of row numbers, so the views stay
+    fast for sheets with tens of thousands of rows.
+    """
+
+    COLUMNS = [
+        ('row', 'Row'),
+        ('status', 'Status'),
+        ('show', 'Show'),
+        ('shot', 'Shot'),
+        ('frame_range', 'Frame Range'),
+        ('comment', 'Comment'),
+        ('resolution', 'Resolution'),
+        ('error', 'Problem'),
+    ]
+    STATUS_COLORS = {
+        'new': QColor(40, 140, 40),
+        'changed': QColor(30, 100, 200),
+        'duplicate': QColor(200, 120, 0),
+        'invalid': QColor(200, 30, 30),
+    }
+    NUMERIC_KEYS = ('row',)  # Sorted as numbers instead of text
+
+    def __init__(self, rows, parent=None):
+        super().__init__(parent)
+        self._rows = rows
+        self._visible = list(range(len(rows)))
+        self._status_filter = None
+        self._sort = None  # (column, order)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section][1]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[self._visible[index.row()]]
+        key = self.COLUMNS[index.column()][0]
+
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            value = row.get(key, '')
+            return '' if value is None else str(value)
+        if role == Qt.ForegroundRole and key == 'status':
+            return self.STATUS_COLORS.get(row.get('status'))
+        return None
+
+    def status_counts(self):
+        counts = {}
+        for row in self._rows:
+            counts[row.get('status')] = counts.get(row.get('status'), 0) + 1
+        return counts
+
+    def set_status_filter(self, status=None):
+        """Only show rows with the given status, None shows every row."""
+        self.beginResetModel()
+        self._status_filter = status
+        self._visible = [position for position, row in enumerate(self._rows)
+                         if status is None or row.get('status') == status]
+        self._apply_sort()
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        try:
+            self._sort = (column, order)
+            self._apply_sort()
+        finally:
+            self.layoutChanged.emit()  # Views are left in a broken state if this is skipped
+
+    def _apply_sort(self):
+        if self._sort is None:
+            return
+        column, order = self._sort
+        key = self.COLUMNS[column][0]
+        if key in self.NUMERIC_KEYS:
+            # Rows that aren't in the sheet, like missing shots, have no row number
+            sort_key = lambda position: self._rows[position].get(key) or 0
+        else:
+            sort_key = lambda position: str(self._rows[position].get(key, '')).lower()
+        self._visible.sort(key=sort_key, reverse=order == Qt.DescendingOrder)
+
+
+class FrameCheckTableModel(ReviewTableModel):
+    """Rows of a frame range check, shot frame ranges next to the ranges of their plates."""
+
+    COLUMNS = [
+        ('status', 'Status'),
+        ('show', 'Show'),
+        ('shot', 'Shot'),
+        ('frame_range', 'Frame Range'),
+        ('plate_range', 'Plate Frames'),
+        ('missing', 'Missing Frames'),
+        ('plate', 'Plate'),
+    ]
+    STATUS_COLORS = {
+        'match': QColor(40, 140, 40),
+        'unset': QColor(30, 100, 200),
+        'missing frames': QColor(200, 120, 0),
+        'mismatch': QColor(200, 30, 30),
+    }
+
+
+class DiskUsageTableModel(ReviewTableModel):
+    """Rows of disk_stats.shot_disk_usage, one size column per template folder, sizes sort by bytes."""
+
+    STATUS_COLORS = {}
+
+    def __init__(self, rows, folder_names, parent=None):
+        self.COLUMNS = [
+            ('show', 'Show'),
+            ('shot', 'Shot'),
+            ('size', 'Size'),
+            ('files', 'Files'),
+            ('latest', 'Last Change'),
+        ] + [(usage_key(name), name.capitalize()) for name in folder_names]
+        self.NUMERIC_KEYS = {key for key, label in self.COLUMNS[2:]}
+        super().__init__(rows, parent)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[self._visible[index.row()]]
+        key = self.COLUMNS[index.column()][0]
+
+        if role == Qt.DisplayRole and key in self.NUMERIC_KEYS:
+            if row['missing']:
+                return 'no folder' if key == 'size' else ''
+            value = row.get(key, 0)
+            if key == 'files':
+                return f'{value:,}'
+            if key == 'latest':
+                return time.strftime('%Y-%m-%d %H:%M', time.localtime(value)) if value else ''
+            return format_size(value)
+        if role == Qt.ToolTipRole and key in self.NUMERIC_KEYS and key != 'latest':
+            return f"{row.get(key, 0):,}{'' if key == 'files' else ' bytes'}"
+        if role == Qt.TextAlignmentRole and key in self.NUMERIC_KEYS:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.ForegroundRole and row['missing']:
+            return PROBLEM_COLOR
+        return super().data(index, role)
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Paints a row of push buttons in a cell and emits clicked(row, name) on a click.
+
+    Nothing is created per row, the buttons are drawn by the style with icons
+    from the shared icon cache and clicks are resolved by hit-testing the cell
+    rectangle.
+    """
+
+    clicked = Signal(int, str)
+
+    def __init__(self, buttons, icon_size=None, parent=None):
+        super().__init__(parent)
+        self.buttons = buttons  # list of (name, text, icon_cache icon name or None)
+        self.icon_size = icon_size or QSize(0, 0)
+        self._pressed = None  # (row, name) under the mouse while pressed
+
+    def _button_rects(self, rect):
+        width = rect.width() // max(len(self.buttons), 1)
+        rects = []
+        for position, button in enumerate(self.buttons):
+            button_rect = QRect(rect.x() + position * width, rect.y(), width, rect.height())
+            rects.append((button[0], button_rect.adjusted(2, 2, -2, -2)))
+        return rects
+
+    def button_at(self, rect, pos):
+        for name, button_rect in self._button_rects(rect):
+            if button_rect.contains(pos):
+                return name
+        return None
+
+    def _repaint(self, option):
+        if hasattr(option.widget, 'viewport'):
+            option.widget.viewport().update(option.rect)
+
+    def paint(self, painter, option, index):
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+
+        pixel_ratio = widget.devicePixelRatioF() if widget else 1.0
+
+        for (name, text, icon_name), (_, button_rect) in zip(self.buttons, self._button_rects(option.rect)):
+            button_option = QStyleOptionButton()
+            button_option.rect = button_rect
+            button_option.state = QStyle.State_Enabled | QStyle.State_Raised
+            if self._pressed == (index.row(), name):
+                button_option.state |= QStyle.State_Sunken
+
+            pixmap = icon_cache.pixmap(icon_name, self.icon_size, pixel_ratio) if icon_name else None
+            if pixmap is None or pixmap.isNull():
+                button_option.text = text or name  # Without its icon a button shows its name
+                style.drawControl(QStyle.CE_PushButton, button_option, painter, widget)
+                continue
+
+            # Same decoded, pre-scaled pixmap for every row
+            style.drawControl(QStyle.CE_PushButtonBevel, button_option, painter, widget)
+            target = QRect(0, 0, round(pixmap.width() / pixel_ratio), round(pixmap.height() / pixel_ratio))
+            target.moveCenter(button_rect.center())
+            painter.drawPixmap(target.topLeft(), pixmap)
+
+    def sizeHint(self, option, index):
+        width = max(self.icon_size.width() + 12, 72 if any(text for _, text, _ in self.buttons) else 0)
+        return QSize(width * len(self.buttons), self.icon_size.height() + 8)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            name = self.button_at(option.rect, event.position().toPoint())
+            self._pressed = (index.row(), name) if name else None
+            self._repaint(option)
+            return name is not None
+
+        if event.type() == QEvent.MouseButtonRelease and self._pressed is not None:
+            name = self.button_at(option.rect, event.position().toPoint())
+            pressed, self._pressed = self._pressed, None
+            self._repaint(option)
+            if pressed == (index.row(), name):
+                # Emit after the view has finished with the event, slots may remove the row
+                QTimer.singleShot(0, partial(self.clicked.emit, index.row(), name))
+            return True
+
+        return super().editorEvent(event, model, option, index)
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """Paints the thumbnail of a row's shot from a thumbnail_cache.ThumbnailLoader.
+
+    Only painted cells ask for their thumbnail, so only rows in view are decoded.
+    """
+
+    def __init__(self, loader, row_height, parent=None):
+        super().__init__(parent)
+        self.loader = loader
+        self.row_height = row_height
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        shot = index.model().shot_at(index.row())
+        pixmap = self.loader.thumbnail(shot) if shot is not None else None
+        if pixmap is None:
+            return
+
+        area = option.rect.adjusted(2, 2, -2, -2)
+        target = QRect(QPoint(0, 0), pixmap.size().scaled(area.size(), Qt.KeepAspectRatio))
+        target.moveCenter(area.center())
+        painter.save()
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawPixmap(target, pixmap)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(self.row_height * 16 // 9 + 4, self.row_height)
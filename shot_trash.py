@@ -0,0 +1,127 @@
+import os
+import time
+import shutil
+
+TRASH_DIRNAME = '.trash'
+UNDO_SECONDS = 10 * 60  # Removed shots can be restored this long, then their folders are deleted
+# Every trash folder shots were moved to, by any session or the command line, so later sessions purge them
+TRASH_INDEX_FILE = os.path.join(os.path.expanduser('~/.nuke'), 'show_manager', 'trash_folders.txt')
+
+_recorded = set()  # Trash folders this process already found in the index
+
+
+def trash_folder(shot_path):
+    """The show-level trash folder of a shot: <project>/<show>/.trash."""
+    return os.path.join(os.path.dirname(os.path.normpath(shot_path)), TRASH_DIRNAME)
+
+
+def known_trash_folders(index_file=TRASH_INDEX_FILE):
+    """Trash folders recorded by record_trash_folder."""
+    try:
+        with open(index_file, 'r', encoding='utf-8') as file:
+            return {line.rstrip('\n') for line in file if line.strip()}
+    except FileNotFoundError:
+        return set()
+    except OSError as e:
+        print(f'Could not read the trash index {index_file}: {e}')
+        return set()
+
+
+def record_trash_folder(trash, index_file=TRASH_INDEX_FILE):
+    """Add a trash folder to the index, so any later session purges it even if its show isn't loaded."""
+    if trash in _recorded:
+        return
+    if trash not in known_trash_folders(index_file):
+        try:
+            os.makedirs(os.path.dirname(index_file), exist_ok=True)
+            with open(index_file, 'a', encoding='utf-8') as file:
+                file.write(trash + '\n')  # One short append, processes recording at once don't mix their lines
+        except OSError as e:
+            print(f'Could not record trash folder {trash} in {index_file}: {e}')
+            return
+    _recorded.add(trash)
+
+
+def trashed_at(trashed_path):
+    """When a folder was moved to the trash, read from its 'SHOT.<milliseconds>' name, or None."""
+    stamp = os.path.basename(trashed_path).rpartition('.')[2]
+    return int(stamp) / 1000 if stamp.isdigit() else None
+
+
+def move_to_trash(shot_path):
+    """Move a shot folder into its show's trash and return the new path, or None if it doesn't exist.
+
+    This is a rename within the show folder, instant however many plates the
+    shot holds.
+    """
+    shot_path = os.path.normpath(shot_path)
+    if not os.path.isdir(shot_path):
+        return None
+    trash = trash_folder(shot_path)
+    os.makedirs(trash, exist_ok=True)
+    record_trash_folder(trash)
+
+    stamp = time.time_ns() // 1000000
+    while True:
+        trashed_path = os.path.join(trash, f'{os.path.basename(shot_path)}.{stamp}')
+        if not os.path.exists(trashed_path):
+            break
+        stamp += 1
+    os.rename(shot_path, trashed_path)
+    return trashed_path
+
+
+def restore_from_trash(trashed_path, shot_path):
+    """Move a trashed shot folder back, fails if a folder was created at its place since."""
+    if os.path.exists(shot_path):
+        raise FileExistsError(f'{shot_path} exists again, {trashed_path} was left in the trash')
+    os.rename(trashed_path, shot_path)
+
+
+def expired_trash(trash_folders, older_than=UNDO_SECONDS):
+    """Trashed folders in the given trash folders that were moved there more than older_than seconds ago.
+
+    Finds what an earlier session left behind when it was closed before its
+    removals expired.
+    """
+    limit = time.time() - older_than
+    expired = []
+    for trash in set(trash_folders):
+        try:
+            entries = list(os.scandir(trash))
+        except OSError:
+            continue
+        for entry in entries:
+            removed = trashed_at(entry.path)
+            if removed is not None and removed < limit:
+                expired.append(entry.path)
+    return expired
+
+
+def purge(trashed_paths, progress=None, cancelled=None):
+    """Delete trashed shot folders, returns a dict of path -> error message for the ones that failed."""
+    errors = {}
+    total = len(trashed_paths)
+    for done, path in enumerate(trashed_paths, 1):
+        if cancelled is not None and cancelled.is_set():
+            break  # What is left stays in the trash and is purged next time
+        try:
+            shutil.rmtree(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            errors[path] = str(e)
+        if progress:
+            progress(done, total)
+    return errors
+
+
+def purge_expired_trash(trash_folders=(), shot_paths=(), older_than=UNDO_SECONDS, progress=None, cancelled=None):
+    """Delete what expired in the given trash folders, the recorded ones and the trash folders of shot_paths.
+
+    Returns (expired paths, {path: error message}), run it on a worker thread.
+    """
+    folders = set(trash_folders) | known_trash_folders()
+    folders.update(trash_folder(path) for path in shot_paths if path)
+    expired = expired_trash(folders, older_than)
+    return expired, purge(expired, progress, cancelled)
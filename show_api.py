@@ -0,0 +1,368 @@
+"""Show and shot operations without a GUI, for pipeline scripts and farm jobs.
+
+    from show_api import ShowAPI
+    api = ShowAPI()
+    api.create_shot('DIG', 'sh010', '/projects', frame_range='1001-1100', resolution='4K')
+
+The same operations are available on the command line, see main(). Only the
+metadata store is imported up front, so listing shots starts quickly. pandas
+and openpyxl are imported when a shot list is imported, PySide6 never.
+"""
+import os
+import sys
+import json
+import argparse
+from metadata_store import open_store, METADATA_DIR, STORE_BACKEND, VALUE_FIELDS
+from shot_record import Shot
+
+
+class ShowAPIError(Exception):
+    """Raised when an operation can't be done, e.g. a shot doesn't exist or its values don't parse."""
+
+
+def shot_path(project_path, show_name, shot_name):
+    return os.path.join(project_path, show_name, shot_name)
+
+
+def apply_shot_list_diff(store, diff, project_path, remove_missing=False):
+    """Write the inserts, updates and optionally the removals of a shot list diff.
+
+    Returns the new records and the set of show names that were written to.
+    Folders of the new records are left to the caller.
+    """
+    from instrumentation import span
+
+    with span('import.apply_shot_list_diff') as timing:
+        records = []
+        for row in diff.inserts:
+            show_name = row['show']
+            shot_name = row['shot']
+
+            records.append({
+                'show': show_name,
+                'shot': shot_name,
+                'frame_range': row['frame_range'],
+                'comment': row['comment'],
+                'resolution': row['resolution'],
+                'footage': '',
+                'elements': '',
+                'path': shot_path(project_path, show_name, shot_name)
+            })
+
+        store.add_shots(records + diff.updates)  # All rows in one transaction
+        touched = {record['show'] for record in records + diff.updates}
+
+        if remove_missing and diff.missing:
+            store.remove_shots((shot['show'], shot['shot']) for shot in diff.missing)
+            touched.update(shot['show'] for shot in diff.missing)
+        timing.add(count=len(records))
+    return records, touched
+
+
+class ShowAPI:
+    """Create, import, update, remove, query and launch shots of the metadata store."""
+
+    def __init__(self, metadata_path=METADATA_DIR, backend=STORE_BACKEND, store=None):
+        self.store = store or open_store(metadata_path, backend)
+        if self.store.needs_migration:
+            self.store.import_json_dir()  # Legacy per-shot JSON files, only on the very first run
+        self._launch_contexts = None
+
+    @property
+    def launch_contexts(self):
+        """LaunchContextCache of this API, made on first use, startup scripts are shared with the launcher."""
+        if self._launch_contexts is None:
+            from launch_context import LaunchContextCache
+
+            self._launch_contexts = LaunchContextCache()
+        return self._launch_contexts
+
+    def close(self):
+        self.store.close()
+
+    # Queries
+
+    def shows(self):
+        return self.store.shows()
+
+    def shots(self, show_name, query=''):
+        """Shots of a show, narrowed by a filter query like the apps' Filter Shots box."""
+        shots = self.store.shots(show_name)
+        if not query.strip():
+            return shots
+        from shot_registry import ShotRegistry
+
+        registry = ShotRegistry()
+        registry.add_shots(shots)
+        keys = registry.search(query, show_name)
+        return [shot for shot in shots if (shot.show, shot.shot) in keys]
+
+    def get_shot(self, show_name, shot_name):
+        shot = self.store.get_shot(show_name, shot_name)
+        if shot is None:
+            raise ShowAPIError(f'No shot {shot_name} in show {show_name}')
+        return shot
+
+    # Changes
+
+    def create_shot(self, show_name, shot_name, project_path, frame_range='', comment='', resolution='',
+                    folders=True):
+        """Add a shot and create its template folders, returns the Shot."""
+        if not show_name or not shot_name:
+            raise ShowAPIError('A shot needs a show name and a shot name')
+        if self.store.get_shot(show_name, shot_name) is not None:
+            raise ShowAPIError(f'{show_name} {shot_name} already exists')
+        shot = Shot(show_name, shot_name, frame_range, comment, resolution,
+                    path=shot_path(project_path, show_name, shot_name))
+        if shot.problems:
+            raise ShowAPIError('Please fix the ' + ' and the '.join(shot.problems))
+
+        if folders:
+            from folder_builder import load_folder_template, build_shot_folders
+            build_shot_folders(shot.path, load_folder_template())
+        self.store.add_shot(shot)
+        return shot
+
+    def import_shot_list(self, file_path, project_path, remove_missing=False, folders=True, dry_run=False):
+        """Import an .xlsx or .csv shot list like Load from Excel, returns (ShotListImport, ShotListDiff)."""
+        from shot_import import read_shot_list, diff_shot_list, ShotListError
+
+        try:
+            shot_list = read_shot_list(file_path)
+        except ShotListError as e:
+            raise ShowAPIError(str(e))
+        existing = {}
+        for show_name in {record['show'] for record in shot_list.records}:
+            for shot in self.store.shots(show_name):
+                existing[(show_name, shot['shot'])] = shot
+        diff = diff_shot_list(shot_list, existing)
+        if dry_run:
+            return shot_list, diff
+
+        records, touched = apply_shot_list_diff(self.store, diff, project_path, remove_missing)
+        if folders and records:
+            from folder_builder import load_folder_template, build_folders
+            errors = [f'{path}: {error}' for path, (created, error)
+                      in build_folders([record['path'] for record in records], load_folder_template()).items() if error]
+            if errors:
+                raise ShowAPIError('Could not create folders for:\n' + '\n'.join(errors))
+        return shot_list, diff
+
+    def update_shot(self, show_name, shot_name, **fields):
+        """Set metadata fields of a shot, frame_range and resolution are checked first."""
+        shot = self.get_shot(show_name, shot_name)
+        unknown = set(fields) - set(VALUE_FIELDS)
+        if unknown:
+            raise ShowAPIError(f'Unknown metadata fields: {", ".join(sorted(unknown))}')
+        shot.update(fields)
+        if shot.problems:
+            raise ShowAPIError('Please fix the ' + ' and the '.join(shot.problems))
+        self.store.update_shot(show_name, shot_name, **{field: shot[field] for field in fields})
+        return shot
+
+    def remove_shots(self, show_name, shot_names):
+        """Remove shots and move their folders to the show's .trash folder, returns (trashed paths, {shot: error}).
+
+        A shot whose folder can't be moved keeps its metadata and is reported in the errors.
+        """
+        from shot_trash import move_to_trash
+
+        shots = [self.get_shot(show_name, shot_name) for shot_name in shot_names]
+        removed = []
+        trashed = []
+        errors = {}
+        for shot in shots:
+            try:
+                trashed_path = move_to_trash(shot.path) if shot.path else None
+            except OSError as e:
+                errors[shot.shot] = str(e)
+                continue
+            if trashed_path:
+                trashed.append(trashed_path)
+            removed.append((shot.show, shot.shot))
+        if removed:
+            self.store.remove_shots(removed)
+        return trashed, errors
+
+    def purge_trash(self, older_than=None):
+        """Delete trashed shot folders that can no longer be undone, returns (deleted paths, {path: error}).
+
+        Looks in every trash folder recorded by any session and in the .trash
+        folders of every show's shots. older_than defaults to the show manager's
+        undo time, so folders a running manager can still restore are kept.
+        """
+        from shot_trash import purge_expired_trash, UNDO_SECONDS
+
+        shot_paths = [shot.path for show_name in self.shows() for shot in self.store.shots(show_name)]
+        expired, errors = purge_expired_trash(shot_paths=shot_paths,
+                                              older_than=UNDO_SECONDS if older_than is None else older_than)
+        return [path for path in expired if path not in errors], errors
+
+    # Disk usage
+
+    def disk_usage(self, show_names=None, full=False):
+        """Measure the shot folders of shows, all shows by default, returns (rows, folder names).
+
+        Uses the cache of the show manager's Disk Usage, so only folders that
+        changed since either last measured them are listed again.
+        """
+        from folder_builder import load_folder_template
+        from disk_stats import DiskStatsScanner, shot_disk_usage, folder_columns, STATS_CACHE_FILE
+
+        shots = [shot for show_name in (show_names or self.shows()) for shot in self.store.shots(show_name)]
+        folder_names = folder_columns(load_folder_template())
+        return shot_disk_usage(shots, folder_names, DiskStatsScanner(STATS_CACHE_FILE), full), folder_names
+
+    # Launching
+
+    def launch(self, show_name, shot_name, software):
+        """Run software for a shot and wait for it, returns its exit code."""
+        import subprocess
+        from instrumentation import span
+        from launch_context import LaunchError
+
+        try:
+            context = self.launch_contexts.context(software, self.get_shot(show_name, shot_name))
+        except LaunchError as e:
+            raise ShowAPIError(str(e))
+        with span('launch.wait', software=software):
+            return subprocess.call(context.command, env=context.environment())
+
+
+def _print_shots(shots, as_json):
+    if as_json:
+        print(json.dumps([shot.to_dict() for shot in shots], indent=2))
+        return
+    for shot in shots:
+        print('\t'.join((shot.show, shot.shot, shot.frame_range, shot.resolution, shot.comment)))
+
+
+def _parse_assignments(assignments):
+    fields = {}
+    for assignment in assignments:
+        field, separator, value = assignment.partition('=')
+        if not separator:
+            raise ShowAPIError(f'Expected FIELD=VALUE, got {assignment!r}')
+        fields[field.strip()] = value
+    return fields
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='show-manager', description='Create, import, update, remove, list and '
+                                                                      'launch shots without the GUI.')
+    parser.add_argument('--metadata-dir', default=METADATA_DIR, help='Directory of the metadata store')
+    parser.add_argument('--backend', default=STORE_BACKEND, choices=['sqlite', 'manifest'])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('shows', help='List the shows')
+
+    list_parser = commands.add_parser('list', help='List the shots of a show')
+    list_parser.add_argument('show')
+    list_parser.add_argument('--filter', default='', help='Filter query, e.g. "res:4K frame:1050"')
+    list_parser.add_argument('--json', action='store_true')
+
+    get_parser = commands.add_parser('get', help='Print the metadata of a shot as JSON')
+    get_parser.add_argument('show')
+    get_parser.add_argument('shot')
+
+    create_parser = commands.add_parser('create', help='Add a shot and create its folders')
+    create_parser.add_argument('show')
+    create_parser.add_argument('shot')
+    create_parser.add_argument('--project', required=True, help='Project directory the show folders are in')
+    create_parser.add_argument('--frame-range', default='')
+    create_parser.add_argument('--comment', default='')
+    create_parser.add_argument('--resolution', default='2K')
+    create_parser.add_argument('--no-folders', action='store_true')
+
+    import_parser = commands.add_parser('import', help='Import an .xlsx or .csv shot list')
+    import_parser.add_argument('file')
+    import_parser.add_argument('--project', required=True, help='Project directory the show folders are in')
+    import_parser.add_argument('--remove-missing', action='store_true',
+                               help="Remove shots of the list's shows that the list no longer has")
+    import_parser.add_argument('--no-folders', action='store_true')
+    import_parser.add_argument('--dry-run', action='store_true', help='Only report what would change')
+
+    update_parser = commands.add_parser('update', help='Set metadata fields of a shot')
+    update_parser.add_argument('show')
+    update_parser.add_argument('shot')
+    update_parser.add_argument('fields', nargs='+', metavar='FIELD=VALUE', help=f'One of {", ".join(VALUE_FIELDS)}')
+
+    remove_parser = commands.add_parser('remove', help="Remove shots, their folders go to the show's .trash folder")
+    remove_parser.add_argument('show')
+    remove_parser.add_argument('shots', nargs='+')
+
+    purge_parser = commands.add_parser('purge', help='Delete removed shot folders from the trash once they '
+                                                     'can no longer be undone')
+    purge_parser.add_argument('--older-than', type=float, metavar='MINUTES',
+                              help='Only folders removed this long ago, defaults to the undo time of 10 minutes')
+
+    usage_parser = commands.add_parser('usage', help='Disk usage and activity of shows, all shows by default')
+    usage_parser.add_argument('shows', nargs='*')
+    usage_parser.add_argument('--full', action='store_true', help='Measure every folder again, not only changed ones')
+    usage_parser.add_argument('--json', action='store_true', help='Per shot rows as JSON')
+
+    launch_parser = commands.add_parser('launch', help='Run software for a shot and wait for it to exit')
+    launch_parser.add_argument('show')
+    launch_parser.add_argument('shot')
+    launch_parser.add_argument('software', help='nuke, houdini, substance, katana or software named in the software config')
+
+    args = parser.parse_args(argv)
+    try:
+        api = ShowAPI(args.metadata_dir, args.backend)
+        if args.command == 'shows':
+            for show_name in api.shows():
+                print(show_name)
+        elif args.command == 'list':
+            _print_shots(api.shots(args.show, args.filter), args.json)
+        elif args.command == 'get':
+            print(json.dumps(api.get_shot(args.show, args.shot).to_dict(), indent=2))
+        elif args.command == 'create':
+            shot = api.create_shot(args.show, args.shot, args.project, args.frame_range, args.comment,
+                                   args.resolution, folders=not args.no_folders)
+            print(f'Created {shot.show} {shot.shot} at {shot.path}')
+        elif args.command == 'import':
+            shot_list, diff = api.import_shot_list(args.file, args.project, args.remove_missing,
+                                                   folders=not args.no_folders, dry_run=args.dry_run)
+            removed = len(diff.missing) if args.remove_missing else 0
+            print(f'{len(diff.inserts)} new, {len(diff.updates)} changed, {len(diff.unchanged)} unchanged, '
+                  f'{removed} removed, {len(shot_list.errors)} rejected rows' + (' (dry run)' if args.dry_run else ''))
+            for error in shot_list.errors:
+                print(f"Row {error.get('row')}: {error.get('error')}", file=sys.stderr)
+        elif args.command == 'update':
+            shot = api.update_shot(args.show, args.shot, **_parse_assignments(args.fields))
+            print(json.dumps(shot.to_dict(), indent=2))
+        elif args.command == 'remove':
+            trashed, errors = api.remove_shots(args.show, args.shots)
+            for trashed_path in trashed:
+                print(f'Moved to trash: {trashed_path}')
+            for shot_name, error in errors.items():
+                print(f'Could not remove {args.show} {shot_name}, its folder was not moved: {error}', file=sys.stderr)
+            if errors:
+                return 1
+        elif args.command == 'purge':
+            deleted, errors = api.purge_trash(None if args.older_than is None else args.older_than * 60)
+            for path in deleted:
+                print(f'Deleted: {path}')
+            for path, error in errors.items():
+                print(f'Could not delete {path}: {error}', file=sys.stderr)
+            if errors:
+                return 1
+        elif args.command == 'usage':
+            from disk_stats import show_summaries, summary_text
+
+            rows, folder_names = api.disk_usage(args.shows, args.full)
+            if args.json:
+                print(json.dumps(rows, indent=2))
+            else:
+                for show_name, summary in sorted(show_summaries(rows, folder_names).items()):
+                    print(summary_text(show_name, summary))
+        elif args.command == 'launch':
+            return api.launch(args.show, args.shot, args.software)
+    except (ShowAPIError, OSError) as e:
+        print(f'show-manager: error: {e}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
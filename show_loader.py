@@ -0,0 +1,94 @@
+import itertools
+import threading
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from instrumentation import span
+
+
+class ShowLoader(QObject):
+    """Reads show names and shots from the metadata store on a worker thread.
+
+    Results are streamed back to the GUI thread through signals: every show name
+    as soon as it is known and the shots of a show in batches, so the window can
+    appear before anything has been read.
+    """
+
+    show_found = Signal(str)
+    shots_loaded = Signal(int, str, list)  # request id, show name, batch of shot dicts
+    progress = Signal(int, int, str)  # done, total, what is being loaded
+    finished = Signal(str)  # show name, '' once the show list is complete
+
+    def __init__(self, store, batch_size=500, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.batch_size = batch_size
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)  # Jobs run in order, a show's shots are never read mid-import
+        self._cancelled = threading.Event()
+        self._request_ids = itertools.count(1)
+
+    def load_shows(self):
+        self.pool.start(_LoaderJob(self._run_load_shows))
+
+    def load_shots(self, show_name):
+        """Queue loading a show's shots, returns the request id its batches are sent with."""
+        request_id = next(self._request_ids)
+        self.pool.start(_LoaderJob(self._run_load_shots, request_id, show_name))
+        return request_id
+
+    def cancel(self, wait_msecs=2000):
+        """Stop running jobs after their current batch, used when the window closes."""
+        self._cancelled.set()
+        self.pool.clear()
+        self.pool.waitForDone(wait_msecs)
+
+    def _run_load_shows(self):
+        try:
+            if self.store.needs_migration:
+                found = set()
+
+                def report(done, total, metadata):
+                    show_name = metadata.get('show')
+                    if show_name and show_name not in found:
+                        found.add(show_name)
+                        self.show_found.emit(show_name)
+                    self.progress.emit(done, total, 'Importing metadata')
+
+                with span('metadata.import_json'):
+                    self.store.import_json_dir(progress=report)
+
+            with span('metadata.load_shows') as timing:
+                for show_name in self.store.shows():
+                    if self._cancelled.is_set():
+                        return
+                    self.show_found.emit(show_name)
+                    timing.add(count=1)
+            self.finished.emit('')
+        finally:
+            self.store.close()  # Connections are per thread, don't leave one on the pool thread
+
+    def _run_load_shots(self, request_id, show_name):
+        try:
+            with span('metadata.load_shots', show=show_name) as timing:
+                total = self.store.shot_count(show_name)
+                done = 0
+                self.progress.emit(done, total, f'Loading {show_name}')
+                for batch in self.store.iter_shots(show_name, self.batch_size):
+                    if self._cancelled.is_set():
+                        return
+                    done += len(batch)
+                    self.shots_loaded.emit(request_id, show_name, batch)
+                    self.progress.emit(done, total, f'Loading {show_name}')
+                timing.add(count=done)
+            self.finished.emit(show_name)
+        finally:
+            self.store.close()
+
+
+class _LoaderJob(QRunnable):
+    def __init__(self, function, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+
+    def run(self):
+        self.function(*self.args)
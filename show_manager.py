@@ -1,41 +1,76 @@
 import os
-import json
-import shutil
+import time
 import sys
-import pandas as pd
 from PySide6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget, QLineEdit, QPushButton, 
-                               QFormLayout, QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox, 
-                               QComboBox, QDialog, QHBoxLayout, QLabel)
-from PySide6.QtCore import Qt
+                               QFormLayout, QTableView, QAbstractItemView, QHeaderView, QFileDialog, QMessageBox, 
+                               QComboBox, QDialog, QHBoxLayout, QLabel, QProgressBar, QCheckBox, QProgressDialog)
+from PySide6.QtGui import QKeySequence, QShortcut
+from PySide6.QtCore import Qt, QTimer
+from metadata_store import open_store, METADATA_DIR
+from shot_table_model import (shot_key, ShotTableModel, ReviewTableModel, FrameCheckTableModel, DiskUsageTableModel,
+                              ButtonDelegate, ThumbnailDelegate)
+from show_loader import ShowLoader
+from nuke_script_generator import generate_show_scripts
+from folder_builder import load_folder_template, build_shot_folders, build_folders
+from background_task import BackgroundTask
+from sequence_scanner import SequenceScanner, check_frame_ranges, CHECK_STATUSES
+from thumbnail_cache import ThumbnailLoader, track_visible_rows
+from disk_stats import DiskStatsScanner, shot_disk_usage, folder_columns, show_summaries, summary_text, STATS_CACHE_FILE
+from shot_trash import move_to_trash, restore_from_trash, purge_expired_trash, UNDO_SECONDS
+from plate_ingest import ingest_shots, read_ingest_mapping, IngestError
+from shot_registry import ShotRegistry, FILTER_HELP
+from show_api import apply_shot_list_diff
+from instrumentation import span
+from shot_record import Shot
+from metadata_watcher import MetadataWatcher
+from metadata_writer import MetadataWriter
 
 class ReviewDialog(QDialog):
-    def __init__(self, data, parent=None):
+    def __init__(self, rows, parent=None):
         super().__init__(parent)
+        from shot_import import REVIEW_STATUSES
 
         self.setWindowTitle('Review Excel Data')
-        self.setGeometry(100, 100, 600, 400)
+        self.setGeometry(100, 100, 900, 500)
 
         self.layout = QVBoxLayout()
         self.setLayout(self.layout)
 
-        self.form_layout = QFormLayout()
-        self.layout.addLayout(self.form_layout)
+        # One model over all rows, the view only paints what is on screen
+        self.model = ReviewTableModel(rows, self)
+        counts = self.model.status_counts()
+
+        self.summary_label = QLabel('   '.join(f'{status.capitalize()}: {counts.get(status, 0)}'
+                                               for status in REVIEW_STATUSES))
+        self.layout.addWidget(self.summary_label)
+
+        self.filter_dropdown = QComboBox()
+        self.filter_dropdown.addItem(f'All rows ({len(rows)})', None)
+        for status in REVIEW_STATUSES:
+            self.filter_dropdown.addItem(f'{status.capitalize()} ({counts.get(status, 0)})', status)
+        self.filter_dropdown.currentIndexChanged.connect(
+            lambda index: self.model.set_status_filter(self.filter_dropdown.itemData(index)))
+        self.layout.addWidget(self.filter_dropdown)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.AscendingOrder)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.layout.addWidget(self.table)
 
-        for index, row in data.iterrows():
-            show_name = row.get('SHOW', '')
-            shot_name = row.get('SHOT', '')
-            resolution = row.get('RESOLUTION', '')
-            frame_range = row.get('FRAME-RANGE', '')
-            comment = row.get('COMMENTS', '')  # Added to review comments
-
-            form_row = QHBoxLayout()
-            form_row.addWidget(QLabel(f'Show: {show_name}'))
-            form_row.addWidget(QLabel(f'Shot: {shot_name}'))
-            form_row.addWidget(QLabel(f'Resolution: {resolution}'))
-            form_row.addWidget(QLabel(f'Frame Range: {frame_range}'))
-            form_row.addWidget(QLabel(f'Comments: {comment}'))  # Display comments
-            
-            self.form_layout.addRow(form_row)
+        # Shots of the sheet's shows that the sheet no longer lists are only removed when asked to
+        self.remove_missing_checkbox = QCheckBox(
+            f"Remove the {counts.get('missing', 0)} missing shots from the metadata (their folders are kept)")
+        self.remove_missing_checkbox.setVisible(counts.get('missing', 0) > 0)
+        self.layout.addWidget(self.remove_missing_checkbox)
+
+        self.import_label = QLabel('Only new and changed rows are written, duplicate and invalid rows are skipped. Import?')
+        self.layout.addWidget(self.import_label)
 
         button_layout = QHBoxLayout()
         self.layout.addLayout(button_layout)
@@ -48,6 +83,138 @@ class ReviewDialog(QDialog):
         self.no_button.clicked.connect(self.reject)
         button_layout.addWidget(self.no_button)
 
+class BulkEditDialog(QDialog):
+    """Asks for one field and the value to set it to on all selected shots."""
+
+    FIELDS = [('frame_range', 'Frame Range'), ('comment', 'Comment'), ('resolution', 'Resolution')]
+
+    def __init__(self, shot_count, parent=None):
+        super().__init__(parent)
+
+        self.setWindowTitle('Edit Selected Shots')
+        self.layout = QFormLayout()
+        self.setLayout(self.layout)
+
+        self.field_dropdown = QComboBox()
+        for field, label in self.FIELDS:
+            self.field_dropdown.addItem(label, field)
+        self.layout.addRow('Field:', self.field_dropdown)
+
+        self.value_input = QLineEdit()
+        self.layout.addRow('Value:', self.value_input)
+
+        button_layout = QHBoxLayout()
+        self.apply_button = QPushButton(f'Apply to {shot_count} shots')
+        self.apply_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.apply_button)
+        self.cancel_button = QPushButton('Cancel')
+        self.cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.cancel_button)
+        self.layout.addRow(button_layout)
+
+    def field(self):
+        return self.field_dropdown.currentData()
+
+    def value(self):
+        return self.value_input.text().strip()
+
+class FrameCheckDialog(QDialog):
+    """Lists shot frame ranges next to the frames of their plates, and can take over the plate frames."""
+
+    def __init__(self, rows, parent=None):
+        super().__init__(parent)
+
+        self.setWindowTitle('Check Frame Ranges')
+        self.setGeometry(100, 100, 900, 500)
+
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+
+        self.model = FrameCheckTableModel(rows, self)
+        counts = self.model.status_counts()
+
+        self.filter_dropdown = QComboBox()
+        self.filter_dropdown.addItem(f'All shots ({len(rows)})', None)
+        for status in CHECK_STATUSES:
+            self.filter_dropdown.addItem(f'{status.capitalize()} ({counts.get(status, 0)})', status)
+        self.filter_dropdown.currentIndexChanged.connect(
+            lambda index: self.model.set_status_filter(self.filter_dropdown.itemData(index)))
+        self.layout.addWidget(self.filter_dropdown)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.layout.addWidget(self.table)
+
+        fillable = counts.get('unset', 0) + counts.get('mismatch', 0)
+        self.fill_checkbox = QCheckBox(f'Set the frame range of the {fillable} unset and mismatched shots from their plates')
+        self.fill_checkbox.setVisible(fillable > 0)
+        self.layout.addWidget(self.fill_checkbox)
+
+        button_layout = QHBoxLayout()
+        self.layout.addLayout(button_layout)
+
+        self.ok_button = QPushButton('OK')
+        self.ok_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.ok_button)
+
+        self.cancel_button = QPushButton('Cancel')
+        self.cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.cancel_button)
+
+class DiskUsageDialog(QDialog):
+    """Per shot sizes of a show's folders, sortable by any column, with the show's totals on top."""
+
+    def __init__(self, show_name, rows, folder_names, parent=None):
+        super().__init__(parent)
+
+        self.setWindowTitle(f'Disk Usage - {show_name}')
+        self.setGeometry(100, 100, 1100, 600)
+        self.measure_again = False
+
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+
+        summaries = show_summaries(rows, folder_names)
+        self.summary_label = QLabel('\n'.join(summary_text(name, summary) for name, summary in summaries.items()))
+        self.summary_label.setWordWrap(True)
+        self.summary_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.layout.addWidget(self.summary_label)
+
+        self.model = DiskUsageTableModel(rows, folder_names, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(2, Qt.DescendingOrder)  # Largest shots first
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.layout.addLayout(button_layout)
+
+        self.measure_button = QPushButton('Measure Everything Again')
+        self.measure_button.setToolTip('Only folders with added, removed or renamed files are measured again normally, '
+                                       'this also finds files that were overwritten in place')
+        self.measure_button.clicked.connect(self.on_measure_again)
+        button_layout.addWidget(self.measure_button)
+
+        self.close_button = QPushButton('Close')
+        self.close_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.close_button)
+
+    def on_measure_again(self):
+        self.measure_again = True
+        self.accept()
+
 class ShowShotManager(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -103,22 +270,136 @@ class ShowShotManager(QMainWindow):
         self.add_elements_button.clicked.connect(self.add_elements)
         self.form_layout.addWidget(self.add_elements_button)
 
+        self.ingest_mapping_button = QPushButton('Ingest From CSV')
+        self.ingest_mapping_button.setToolTip('Copy plates and elements into many shots, '
+                                              'from a CSV with SHOW, SHOT, SOURCE and KIND columns')
+        self.ingest_mapping_button.clicked.connect(self.ingest_from_mapping)
+        self.form_layout.addWidget(self.ingest_mapping_button)
+
+        self.generate_scripts_button = QPushButton('Generate Nuke Scripts')
+        self.generate_scripts_button.clicked.connect(lambda: self.generate_nuke_scripts())
+        self.form_layout.addWidget(self.generate_scripts_button)
+
+        self.edit_selected_button = QPushButton('Edit Selected')
+        self.edit_selected_button.setToolTip('Set frame range, comment or resolution on all selected shots')
+        self.edit_selected_button.clicked.connect(self.edit_selected)
+        self.form_layout.addWidget(self.edit_selected_button)
+
+        self.sync_folders_button = QPushButton('Sync Folders')
+        self.sync_folders_button.setToolTip('Create any missing template folders for every shot of the selected show')
+        self.sync_folders_button.clicked.connect(self.sync_folders)
+        self.form_layout.addWidget(self.sync_folders_button)
+
+        self.remove_selected_button = QPushButton('Remove Selected')
+        self.remove_selected_button.setToolTip("Remove the selected shots, their folders are moved to the show's .trash folder")
+        self.remove_selected_button.clicked.connect(self.remove_selected)
+        self.form_layout.addWidget(self.remove_selected_button)
+
+        self.undo_remove_button = QPushButton('Undo Remove')
+        self.undo_remove_button.setToolTip(f'Bring back the last removed shots, possible for {UNDO_SECONDS // 60} minutes')
+        self.undo_remove_button.setEnabled(False)
+        self.undo_remove_button.clicked.connect(self.undo_remove)
+        self.form_layout.addWidget(self.undo_remove_button)
+
+        self.check_frames_button = QPushButton('Check Frame Ranges')
+        self.check_frames_button.setToolTip("Compare every shot's frame range with the plates in its footages folder")
+        self.check_frames_button.clicked.connect(self.check_frame_ranges)
+        self.form_layout.addWidget(self.check_frames_button)
+
+        self.disk_usage_button = QPushButton('Disk Usage')
+        self.disk_usage_button.setToolTip("Size, file count and last change of every shot's folders in the selected show")
+        self.disk_usage_button.clicked.connect(lambda: self.check_disk_usage())
+        self.form_layout.addWidget(self.disk_usage_button)
+
         self.show_dropdown = QComboBox()
         self.show_dropdown.currentIndexChanged.connect(self.show_dropdown_changed)
         self.form_layout.addRow('Select Show:', self.show_dropdown)
 
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText(FILTER_HELP)
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.apply_filter)
+        self.form_layout.addRow('Filter Shots:', self.filter_input)
+
         self.layout.addLayout(self.form_layout)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(['Show', 'Shot', 'Frame Range', 'Comment', 'Resolution', 'Actions'])
+        self.shot_model = ShotTableModel('Actions', self, preview=True)
+        self.remove_delegate = ButtonDelegate([('remove', 'Remove', None)], parent=self)
+        self.remove_delegate.clicked.connect(lambda row, name: self.remove_shot(row))
+
+        # Plate thumbnails are decoded in the background, for the rows in view only
+        self.sequence_scanner = SequenceScanner()  # Plate folders are only listed again once they change
+        self.thumbnails = ThumbnailLoader(scanner=self.sequence_scanner, parent=self)
+
+        self.table = QTableView()
+        self.table.setModel(self.shot_model)
+        self.table.setItemDelegateForColumn(self.shot_model.action_column, self.remove_delegate)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)  # No per-row size measuring
+        row_height = self.table.verticalHeader().defaultSectionSize()
+        self.table.setItemDelegateForColumn(self.shot_model.preview_column, ThumbnailDelegate(self.thumbnails, row_height, self))
+        self.table.horizontalHeader().setSectionResizeMode(self.shot_model.preview_column, QHeaderView.Fixed)
+        self.table.horizontalHeader().resizeSection(self.shot_model.preview_column, row_height * 16 // 9 + 4)
+        self.thumbnails.thumbnail_ready.connect(lambda show_name, shot_name: self.table.viewport().update())
+        self.visible_rows_timer = track_visible_rows(self.thumbnails, self.table)
         self.layout.addWidget(self.table)
 
-        self.shows = {}  # Store shows and shots
+        self.remove_shortcut = QShortcut(QKeySequence.Delete, self.table)
+        self.remove_shortcut.activated.connect(self.remove_selected)
+        self.undo_shortcut = QShortcut(QKeySequence.Undo, self)
+        self.undo_shortcut.activated.connect(self.undo_remove)
+
+        self.shows = {}  # Show name -> shot list, filled per show on first use
+        self.registry = ShotRegistry()  # Loaded shots by (show, shot), for lookups and filtering
         self.project_path = ''
-        self.metadata_path = os.path.join(os.path.expanduser('~/.nuke'), 'metadata')
-        os.makedirs(self.metadata_path, exist_ok=True)
+        self.metadata_path = METADATA_DIR
+        self.store = open_store(self.metadata_path)  # SQLite or per-show manifests, see SHOW_MANAGER_BACKEND
+
+        # Edits are journaled and written in batches, edits a crash kept from being written are applied first
+        self.writer = MetadataWriter(self.store)
+        recovered = self.writer.recover()
+        if recovered:
+            print(f'Recovered unsaved edits of {recovered} shots.')
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(500)  # Edits made in quick succession share one write
+        self.flush_timer.timeout.connect(self.flush_edits)
+        self.folder_template = load_folder_template()
+        self.folder_task = None
+        self.ingest_task = None
+        self.frame_check_task = None
+        self.disk_scanner = DiskStatsScanner(STATS_CACHE_FILE)  # Only folders that changed are listed again
+        self.disk_usage_task = None
+
+        # Removed shot folders wait in their show's .trash folder until they can no longer be undone
+        self.removed_batches = []  # (time, shots, [(shot path, trashed path)]), the last one is undone first
+        self.trash_folders = set()  # Trash folders used this session, expired folders in them are purged
+        self.trash_searched = False  # Whether the trash folders of every show were looked at yet
+        self.purge_task = None
+        self.purge_timer = QTimer(self)
+        self.purge_timer.setInterval(60 * 1000)
+        self.purge_timer.timeout.connect(self.purge_expired)
+        self.purge_timer.start()
+        QTimer.singleShot(0, self.purge_expired)  # Trash that earlier sessions and the command line left behind
+
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(300)
+        self.load_progress.hide()
+        self.statusBar().addPermanentWidget(self.load_progress)
+
+        self.loader = ShowLoader(self.store, parent=self)
+        self.loader.show_found.connect(self.on_show_found)
+        self.loader.shots_loaded.connect(self.on_shots_loaded)
+        self.loader.progress.connect(self.on_load_progress)
+        self.loader.finished.connect(self.on_load_finished)
+        self.load_requests = {}  # Show name -> id of the load filling its shot list
+
+        # Changes made by other windows and processes arrive as row updates
+        self.watcher = MetadataWatcher(self.store, publish=True, parent=self)
+        self.watcher.shots_changed.connect(self.on_shots_changed)
+        self.watcher.shots_removed.connect(self.on_shots_removed)
 
         self.load_existing_shows()
 
@@ -146,38 +427,94 @@ class ShowShotManager(QMainWindow):
             QMessageBox.warning(self, 'Warning', 'Please enter both show name and shot name.')
             return
 
+        record = Shot(show_name, shot_name, frame_range, comment, resolution,
+                      path=os.path.join(self.project_path, show_name, shot_name))
+        if record.problems:
+            QMessageBox.warning(self, 'Warning', 'Please fix the ' + ' and the '.join(record.problems) + '.')
+            return
+        frame_range = record.frame_range  # Normalized, e.g. '1001 - 1100' becomes '1001-1100'
+        resolution = record.resolution
+
+        # The store also knows shots of shows the loader hasn't reached yet
+        if (show_name, shot_name) in self.registry or self.store.get_shot(show_name, shot_name) is not None:
+            QMessageBox.warning(self, 'Warning', f'{show_name} {shot_name} already exists.')
+            return
+
         if show_name not in self.shows:
-            self.shows[show_name] = []
+            self.get_shots(show_name)  # The show may exist but not have been reported by the loader yet
+            self.update_show_dropdown()
 
-        self.shows[show_name].append({
-            'shot': shot_name,
-            'frame_range': frame_range,
-            'comment': comment,
-            'resolution': resolution,
-            'footage': '',  
-            'elements': '',  
-            'path': os.path.join(self.project_path, show_name, shot_name)
-        })
+        if show_name == self.show_dropdown.currentText():
+            self.shot_model.insert_shot(record)  # Single row insert, the model shares the show's list
+        else:
+            self.get_shots(show_name).append(record)
+        self.registry.add(record)
 
         self.create_folder_structure(show_name, shot_name)
         self.create_metadata_file(show_name, shot_name, frame_range, comment, resolution, '', '')
 
-        self.update_table()
+        self.show_dropdown.setCurrentText(show_name)
         self.clear_inputs()
-        self.update_show_dropdown()
 
     def create_folder_structure(self, show_name, shot_name):
-        folders = ['comp', 'fx', 'lighting', 'roto', 'prep', 'footages', 'elements']
-        software_folders = ['nuke', 'houdini', 'silhouette', 'mari', 'substance', 'katana']
-        
         shot_path = os.path.join(self.project_path, show_name, shot_name)
+        build_shot_folders(shot_path, self.folder_template)
 
-        if not os.path.exists(shot_path):
-            os.makedirs(shot_path)
+    def start_folder_task(self, shot_paths, title, on_finished=None):
+        """Create missing template folders for many shots in the background, with progress and cancel."""
+        if self.folder_task:
+            QMessageBox.warning(self, 'Warning', 'Folders are already being created, please wait for it to finish.')
+            return
 
-        for folder in folders + software_folders:
-            folder_path = os.path.join(shot_path, folder)
-            os.makedirs(folder_path, exist_ok=True)
+        progress_dialog = QProgressDialog(title, 'Cancel', 0, len(shot_paths), self)
+        progress_dialog.setWindowTitle('Folders')
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(300)  # Small batches finish before the dialog shows up
+
+        task = BackgroundTask(build_folders, shot_paths, self.folder_template, parent=self)
+        progress_dialog.canceled.connect(task.cancel)
+        task.progress.connect(lambda done, total: progress_dialog.setValue(done))
+
+        def finish(results):
+            cancelled = task.cancelled.is_set()
+            self.folder_task = None
+            progress_dialog.canceled.disconnect(task.cancel)  # Closing the dialog emits canceled
+            progress_dialog.close()
+            task.deleteLater()
+            if on_finished:
+                on_finished(results, cancelled)
+
+        def fail(message):
+            finish({})
+            QMessageBox.warning(self, 'Warning', f'Could not create folders: {message}')
+
+        task.finished.connect(finish)
+        task.failed.connect(fail)
+        self.folder_task = task.start()
+
+    def sync_folders(self):
+        """Check every shot of the selected show and create the template folders it is missing."""
+        show_name = self.show_dropdown.currentText()
+        if show_name not in self.shows:
+            QMessageBox.warning(self, 'Warning', 'Please select a show.')
+            return
+
+        # Read from the store, the table may still be loading the show
+        shot_paths = [shot['path'] for shot in self.store.shots(show_name) if shot.get('path')]
+        self.start_folder_task(shot_paths, f'Checking folders of {len(shot_paths)} shots in {show_name}...',
+                               lambda results, cancelled: self.report_folder_sync(show_name, results, cancelled))
+
+    def report_folder_sync(self, show_name, results, cancelled):
+        repaired = sum(1 for created, error in results.values() if created)
+        folder_count = sum(len(created) for created, error in results.values())
+        errors = [f'{path}: {error}' for path, (created, error) in results.items() if error]
+
+        message = f'Checked {len(results)} shots of {show_name}, created {folder_count} missing folders in {repaired} shots.'
+        if cancelled:
+            message = 'Cancelled. ' + message
+        if errors:
+            message += '\n\nFailed:\n' + '\n'.join(errors[:20])
+        QMessageBox.information(self, 'Sync Folders', message)
 
     def create_metadata_file(self, show_name, shot_name, frame_range, comment, resolution, footage_path, elements_path):
         metadata = {
@@ -191,103 +528,408 @@ class ShowShotManager(QMainWindow):
             'path': os.path.join(self.project_path, show_name, shot_name)
         }
 
-        metadata_file = os.path.join(self.metadata_path, f'{show_name}_{shot_name}_metadata.json')
-
-        with open(metadata_file, 'w') as file:
-            json.dump(metadata, file, indent=4)
+        self.store.add_shot(metadata)
 
     def add_footage(self):
-        selected_row = self.table.currentRow()
+        selected_row = self.table.currentIndex().row()
         if selected_row < 0:
             QMessageBox.warning(self, 'Warning', 'Please select a row in the table.')
             return
         
-        show_name = self.table.item(selected_row, 0).text()
-        shot_name = self.table.item(selected_row, 1).text()
-
-        footage_path, _ = QFileDialog.getOpenFileName(self, 'Select Footage File')
-        if footage_path:
-            self.shows[show_name][selected_row]['footage'] = footage_path
-            metadata_file = os.path.join(self.metadata_path, f'{show_name}_{shot_name}_metadata.json')
+        shot = self.shot_model.shot_at(selected_row)
+        show_name = shot['show']
+        shot_name = shot['shot']
 
-            with open(metadata_file, 'r') as file:
-                metadata = json.load(file)
-
-            metadata['footage'] = footage_path
-
-            with open(metadata_file, 'w') as file:
-                json.dump(metadata, file, indent=4)
-
-            self.update_table()
+        # Several files can be picked, e.g. the frames of a sequence
+        footage_paths, _ = QFileDialog.getOpenFileNames(self, 'Select Footage Files')
+        if footage_paths:
+            self.ingest_into_shot(show_name, shot_name, 'footage', footage_paths)
 
     def add_elements(self):
-        selected_row = self.table.currentRow()
+        selected_row = self.table.currentIndex().row()
         if selected_row < 0:
             QMessageBox.warning(self, 'Warning', 'Please select a row in the table.')
             return
         
-        show_name = self.table.item(selected_row, 0).text()
-        shot_name = self.table.item(selected_row, 1).text()
+        shot = self.shot_model.shot_at(selected_row)
+        show_name = shot['show']
+        shot_name = shot['shot']
 
-        elements_path, _ = QFileDialog.getExistingDirectory(self, 'Select Elements Directory')
+        elements_path = QFileDialog.getExistingDirectory(self, 'Select Elements Directory')
         if elements_path:
-            self.shows[show_name][selected_row]['elements'] = elements_path
-            metadata_file = os.path.join(self.metadata_path, f'{show_name}_{shot_name}_metadata.json')
-
-            with open(metadata_file, 'r') as file:
-                metadata = json.load(file)
-
-            metadata['elements'] = elements_path
-
-            with open(metadata_file, 'w') as file:
-                json.dump(metadata, file, indent=4)
+            self.ingest_into_shot(show_name, shot_name, 'elements', [elements_path])
+
+    def set_shot_fields(self, edits):
+        """Apply {(show, shot): {field: value}} edits to the table and the registry, and queue them for the store."""
+        self.writer.set_many(edits)
+        for (show_name, shot_name), fields in edits.items():
+            row = self.shot_model.row_of(show_name, shot_name)
+            if row >= 0:
+                self.shot_model.update_shot(row, **fields)
+            shot = self.registry.get(show_name, shot_name)
+            if shot is not None:
+                if row < 0:
+                    shot.update(fields)
+                self.registry.update(shot)
+        self.flush_timer.start()
+
+    def ingest_into_shot(self, show_name, shot_name, field, sources):
+        """Copy plates or elements into the shot's folder and point its metadata at the copy."""
+        shot_path = (self.registry.get(show_name, shot_name) or {}).get('path')
+        if not shot_path:
+            # A shot without a folder keeps pointing at the files where they are
+            path = sources[0] if len(sources) == 1 else os.path.dirname(sources[0])
+            self.set_shot_fields({(show_name, shot_name): {field: path}})
+            return
+        self.start_ingest_task([(show_name, shot_name, shot_path, field, sources)],
+                               f'Copying {field} into {show_name} {shot_name}...')
 
-            self.update_table()
+    def ingest_from_mapping(self):
+        """Copy plates and elements into many shots, listed in a CSV file."""
+        mapping_path, _ = QFileDialog.getOpenFileName(self, 'Open Ingest Mapping', '', 'CSV Files (*.csv)')
+        if not mapping_path:
+            return
+        try:
+            rows = read_ingest_mapping(mapping_path)
+        except (OSError, IngestError) as e:
+            QMessageBox.warning(self, 'Warning', f'Could not read the ingest mapping: {e}')
+            return
 
-    def update_table(self, selected_show=None):
-        """Update the table with shots, optionally filtered by the selected show."""
-        self.table.setRowCount(0)  # Clear the table
+        # Sources of the same shot and kind are copied as one request
+        grouped = {}
+        skipped = set()
+        for row in rows:
+            shot = self.store.get_shot(row['show'], row['shot'])
+            if shot is None or not shot.get('path'):
+                skipped.add(f"{row['show']} {row['shot']}")
+                continue
+            grouped.setdefault((row['show'], row['shot'], shot['path'], row['kind']), []).append(row['source'])
+        if skipped:
+            QMessageBox.warning(self, 'Warning', f'{len(skipped)} shots of the mapping are unknown or have no folder '
+                                                 'and are skipped: ' + ', '.join(sorted(skipped)[:10]))
+        if grouped:
+            self.start_ingest_task([key + (sources,) for key, sources in grouped.items()],
+                                   f'Copying plates and elements into {len(grouped)} shots...')
+
+    def start_ingest_task(self, requests, title):
+        """Copy (show, shot, shot path, field, sources) requests in the background, with progress and cancel."""
+        if self.ingest_task:
+            QMessageBox.warning(self, 'Warning', 'Plates are already being copied, please wait for it to finish.')
+            return
 
-        for show_name, shots in self.shows.items():
-            if selected_show and show_name != selected_show:
-                continue  # Skip shots not belonging to the selected show
+        progress_dialog = QProgressDialog(title, 'Cancel', 0, 0, self)
+        progress_dialog.setWindowTitle('Ingest')
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(300)  # Small copies finish before the dialog shows up
+
+        task = BackgroundTask(ingest_shots, [(path, field, sources) for _, _, path, field, sources in requests],
+                              parent=self)
+        progress_dialog.canceled.connect(task.cancel)
+
+        def show_progress(done, total):
+            progress_dialog.setMaximum(max(total, 1))
+            progress_dialog.setValue(done)
+            progress_dialog.setLabelText(f'{title}\n{done // 1024} of {total // 1024} MB')
+
+        def finish(reports):
+            cancelled = task.cancelled.is_set()
+            self.ingest_task = None
+            progress_dialog.canceled.disconnect(task.cancel)  # Closing the dialog emits canceled
+            progress_dialog.close()
+            task.deleteLater()
+            self.report_ingest(requests, reports, cancelled)
+
+        def fail(message):
+            finish([])
+            QMessageBox.warning(self, 'Warning', f'Could not copy plates: {message}')
+
+        task.progress.connect(show_progress)
+        task.finished.connect(finish)
+        task.failed.connect(fail)
+        self.ingest_task = task.start()
+
+    def report_ingest(self, requests, reports, cancelled):
+        edits = {}
+        errors = []
+        for (show_name, shot_name, path, field, sources), (ingested, request_errors) in zip(requests, reports):
+            if ingested:
+                edits.setdefault((show_name, shot_name), {})[field] = ingested
+            errors.extend(request_errors)
+        self.set_shot_fields(edits)
+        self.thumbnails.invalidate(edits)  # New plates get a thumbnail
+
+        copied = sum(1 for ingested, request_errors in reports if ingested)
+        message = f'Copied into {copied} of {len(requests)} shots.'
+        if cancelled:
+            message += ' Cancelled, copying again resumes where it stopped.'
+        if errors:
+            QMessageBox.warning(self, 'Ingest', f'{message} {len(errors)} files failed:\n' + '\n'.join(errors[:10]))
+        elif reports:
+            self.statusBar().showMessage(message, 10000)
+
+    def check_frame_ranges(self):
+        """Scan the plates of every shot of the selected show and compare them with the shots' frame ranges."""
+        show_name = self.show_dropdown.currentText()
+        if show_name not in self.shows:
+            QMessageBox.warning(self, 'Warning', 'Please select a show.')
+            return
+        if self.frame_check_task:
+            return
 
-            for shot in shots:
-                row_position = self.table.rowCount()
-                self.table.insertRow(row_position)
+        self.flush_edits()
+        shots = self.store.shots(show_name)  # The table may still be loading the show
+        progress_dialog = QProgressDialog(f'Scanning the plates of {len(shots)} shots in {show_name}...', 'Cancel',
+                                          0, len(shots), self)
+        progress_dialog.setWindowTitle('Check Frame Ranges')
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(300)  # Rescans of unchanged folders finish before it shows up
+
+        task = BackgroundTask(check_frame_ranges, shots, self.sequence_scanner, parent=self)
+        progress_dialog.canceled.connect(task.cancel)
+        task.progress.connect(lambda done, total: progress_dialog.setValue(done))
+
+        def finish(rows):
+            cancelled = task.cancelled.is_set()
+            self.frame_check_task = None
+            progress_dialog.canceled.disconnect(task.cancel)  # Closing the dialog emits canceled
+            progress_dialog.close()
+            task.deleteLater()
+            if not cancelled:
+                self.review_frame_check(rows)
+
+        def fail(message):
+            finish([])
+            QMessageBox.warning(self, 'Warning', f'Could not scan the plates: {message}')
+
+        task.finished.connect(finish)
+        task.failed.connect(fail)
+        self.frame_check_task = task.start()
+
+    def review_frame_check(self, rows):
+        if not rows:
+            QMessageBox.information(self, 'Check Frame Ranges', 'There are no shots with a folder to check.')
+            return
+        dialog = FrameCheckDialog(rows, self)
+        if dialog.exec_() == QDialog.Accepted and dialog.fill_checkbox.isChecked():
+            self.set_shot_fields({(row['show'], row['shot']): {'frame_range': row['plate_range']}
+                                  for row in rows if row['status'] in ('unset', 'mismatch')})
+
+    def check_disk_usage(self, full=False):
+        """Measure the folders of every shot of the selected show in the background, then list them."""
+        show_name = self.show_dropdown.currentText()
+        if show_name not in self.shows:
+            QMessageBox.warning(self, 'Warning', 'Please select a show.')
+            return
+        if self.disk_usage_task:
+            return
 
-                self.table.setItem(row_position, 0, QTableWidgetItem(show_name))
-                self.table.setItem(row_position, 1, QTableWidgetItem(shot['shot']))
-                self.table.setItem(row_position, 2, QTableWidgetItem(shot['frame_range']))
-                self.table.setItem(row_position, 3, QTableWidgetItem(shot['comment']))  # Comment in table
-                self.table.setItem(row_position, 4, QTableWidgetItem(shot['resolution']))
+        self.flush_edits()
+        shots = self.store.shots(show_name)  # The table may still be loading the show
+        folder_names = folder_columns(self.folder_template)
+        progress_dialog = QProgressDialog(f'Measuring the folders of {len(shots)} shots in {show_name}...', 'Cancel',
+                                          0, len(shots), self)
+        progress_dialog.setWindowTitle('Disk Usage')
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(300)  # Refreshes of unchanged folders finish before it shows up
+
+        task = BackgroundTask(shot_disk_usage, shots, folder_names, self.disk_scanner, full, parent=self)
+        progress_dialog.canceled.connect(task.cancel)
+        task.progress.connect(lambda done, total: progress_dialog.setValue(done))
+
+        def finish(rows):
+            cancelled = task.cancelled.is_set()
+            self.disk_usage_task = None
+            progress_dialog.canceled.disconnect(task.cancel)  # Closing the dialog emits canceled
+            progress_dialog.close()
+            task.deleteLater()
+            if not cancelled:
+                self.review_disk_usage(show_name, rows, folder_names)
+
+        def fail(message):
+            finish([])
+            QMessageBox.warning(self, 'Warning', f'Could not measure the shot folders: {message}')
+
+        task.finished.connect(finish)
+        task.failed.connect(fail)
+        self.disk_usage_task = task.start()
+
+    def review_disk_usage(self, show_name, rows, folder_names):
+        if not rows:
+            QMessageBox.information(self, 'Disk Usage', 'There are no shots with a folder to measure.')
+            return
+        dialog = DiskUsageDialog(show_name, rows, folder_names, self)
+        dialog.exec_()
+        if dialog.measure_again:
+            self.check_disk_usage(full=True)
+
+    def edit_selected(self):
+        """Set one field on every selected shot, written with a single flush."""
+        rows = sorted(index.row() for index in self.table.selectionModel().selectedRows())
+        if not rows:
+            QMessageBox.warning(self, 'Warning', 'Please select one or more rows in the table.')
+            return
 
-                remove_button = QPushButton('Remove')
-                remove_button.clicked.connect(lambda ch, row=row_position: self.remove_shot(row))
-                self.table.setCellWidget(row_position, 5, remove_button)
+        dialog = BulkEditDialog(len(rows), self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        field = dialog.field()
+        checked = Shot(**{field: dialog.value()})  # Frame ranges and resolutions are checked as the API does
+        if checked.problems:
+            QMessageBox.warning(self, 'Warning', 'Please fix the ' + ' and the '.join(checked.problems))
+            return
+        value = checked[field]
+
+        shots = [self.shot_model.shot_at(row) for row in rows]
+        self.writer.set_field([shot_key(shot) for shot in shots], field, value)
+        for row, shot in zip(rows, shots):
+            self.shot_model.update_shot(row, **{field: value})
+            self.registry.update(shot)
+        self.flush_edits()
+
+    def flush_edits(self):
+        self.flush_timer.stop()
+        try:
+            self.writer.flush()
+        except Exception as e:  # The edits stay pending and journaled, the next flush tries again
+            QMessageBox.warning(self, 'Warning', f'Could not save metadata changes: {e}')
 
-        
+    def update_table(self, selected_show=None):
+        """Point the table model at the shots of the selected show."""
+        show_name = selected_show or self.show_dropdown.currentText()
+        if show_name in self.shows and self.shows[show_name] is None:
+            self.shows[show_name] = []  # Filled in batches by the loader
+            self.load_requests[show_name] = self.loader.load_shots(show_name)
+        self.shot_model.set_shots(self.shows[show_name] if show_name in self.shows else [])
+        if self.filter_input.text().strip():
+            self.apply_filter()
+
+    def apply_filter(self):
+        """Narrow the table to the shots of the selected show matching the filter text."""
+        text = self.filter_input.text().strip()
+        if not text:
+            self.shot_model.set_filter(None)
+            self.statusBar().clearMessage()
+            return
 
+        show_name = self.show_dropdown.currentText()
+        keys = self.registry.search(text, show_name)
+        self.shot_model.set_filter(keys, self.registry.matcher(text))
+        self.statusBar().showMessage(f'{len(keys)} of {len(self.registry.show_keys(show_name))} shots match')
 
     def remove_shot(self, row):
-        show_name = self.table.item(row, 0).text()
-        shot_name = self.table.item(row, 1).text()
+        # The Remove button of a selected row removes the whole selection
+        selected = [index.row() for index in self.table.selectionModel().selectedRows()]
+        self.remove_rows(selected if row in selected else [row])
+
+    def remove_selected(self):
+        rows = [index.row() for index in self.table.selectionModel().selectedRows()]
+        if not rows:
+            QMessageBox.warning(self, 'Warning', 'Please select one or more rows in the table.')
+            return
+        self.remove_rows(rows)
 
-        confirm = QMessageBox.question(self, 'Confirm', f'Are you sure you want to remove {show_name} - {shot_name}?',
+    def remove_rows(self, rows):
+        """Remove shots from the metadata and move their folders to the trash, undone by undo_remove."""
+        shots = [shot for shot in map(self.shot_model.shot_at, sorted(set(rows))) if shot is not None]
+        if not shots:
+            return
+        if len(shots) == 1:
+            question = f"Are you sure you want to remove {shots[0]['show']} - {shots[0]['shot']}?"
+        else:
+            question = f'Are you sure you want to remove the {len(shots)} selected shots?'
+        confirm = QMessageBox.question(self, 'Confirm', question + ' This can be undone for a while with Undo Remove.',
                                        QMessageBox.Yes | QMessageBox.No)
+        if confirm != QMessageBox.Yes:
+            return
 
-        if confirm == QMessageBox.Yes:
-            shot_path = self.shows[show_name][row]['path']
-
-            if os.path.exists(shot_path):
-                shutil.rmtree(shot_path)  # Delete entire folder structure
-            
-            metadata_file = os.path.join(self.metadata_path, f'{show_name}_{shot_name}_metadata.json')
+        self.flush_edits()
+        removed_rows = []
+        trashed = []
+        errors = []
+        for row, shot in zip(sorted(set(rows)), shots):
+            try:
+                trashed_path = move_to_trash(shot['path']) if shot.get('path') else None
+            except OSError as e:
+                errors.append(f"{shot['show']} {shot['shot']}: {e}")
+                continue  # A shot whose folder couldn't be moved keeps its metadata
+            if trashed_path:
+                trashed.append((shot['path'], trashed_path))
+                self.trash_folders.add(os.path.dirname(trashed_path))
+            removed_rows.append(row)
+
+        removed = self.shot_model.remove_rows(removed_rows)
+        self.store.remove_shots([shot_key(shot) for shot in removed])
+        for shot in removed:
+            self.registry.remove(shot['show'], shot['shot'])
+            metadata_file = os.path.join(self.metadata_path, f"{shot['show']}_{shot['shot']}_metadata.json")
             if os.path.exists(metadata_file):
-                os.remove(metadata_file)  # Remove metadata file
+                os.remove(metadata_file)  # Remove legacy metadata file so it isn't imported again
+
+        if removed:
+            self.removed_batches.append((time.time(), removed, trashed))
+            self.undo_remove_button.setEnabled(True)
+            self.statusBar().showMessage(f'Removed {len(removed)} shots, Undo Remove brings them back.', 10000)
+        if errors:
+            QMessageBox.warning(self, 'Warning', 'Could not move these shot folders to the trash:\n' + '\n'.join(errors[:20]))
+
+    def undo_remove(self):
+        """Bring back the shots of the last removal, with their folders."""
+        if not self.removed_batches:
+            return
+        removed_time, shots, trashed = self.removed_batches.pop()
+        self.undo_remove_button.setEnabled(bool(self.removed_batches))
 
-            del self.shows[show_name][row]
-            self.update_table()
+        errors = []
+        for shot_path, trashed_path in trashed:
+            try:
+                restore_from_trash(trashed_path, shot_path)
+            except OSError as e:
+                errors.append(str(e))
+
+        self.store.add_shots(shots)
+        current_show = self.show_dropdown.currentText()
+        for shot in shots:
+            if shot['show'] == current_show:
+                self.shot_model.insert_shot(shot)
+            elif self.shows.get(shot['show']) is not None:
+                self.shows[shot['show']].append(shot)
+            self.registry.add(shot)
+        self.statusBar().showMessage(f'Restored {len(shots)} shots.', 10000)
+        if errors:
+            QMessageBox.warning(self, 'Warning', 'Could not restore these shot folders:\n' + '\n'.join(errors[:20]))
+
+    def purge_expired(self):
+        """Delete trashed folders that can no longer be undone, on a worker thread."""
+        limit = time.time() - UNDO_SECONDS
+        while self.removed_batches and self.removed_batches[0][0] < limit:
+            self.removed_batches.pop(0)
+        self.undo_remove_button.setEnabled(bool(self.removed_batches))
+        if self.purge_task:
+            return
+
+        # Trash folders of this session and the recorded ones, the first time also those of every show's shots
+        shot_paths = () if self.trash_searched else self.all_shot_paths()
+        self.trash_searched = True
+        task = BackgroundTask(purge_expired_trash, set(self.trash_folders), shot_paths, UNDO_SECONDS, parent=self)
+
+        def finish(result):
+            self.purge_task = None
+            task.deleteLater()
+            expired, errors = result
+            for path, error in errors.items():
+                print(f'Could not delete trashed shot folder {path}: {error}')
+            if len(expired) > len(errors):
+                self.statusBar().showMessage(f'Deleted {len(expired) - len(errors)} removed shot folders from the trash.', 5000)
+
+        task.finished.connect(finish)
+        task.failed.connect(lambda message: finish(([], {})))
+        self.purge_task = task.start()
+
+    def all_shot_paths(self):
+        """Yield the folder of every shot in the store, read when iterated, e.g. on the purge's worker thread."""
+        for show_name in self.store.shows():
+            for shot in self.store.shots(show_name):
+                yield shot.get('path', '')
 
     def clear_inputs(self):
         self.show_input.clear()
@@ -298,92 +940,220 @@ class ShowShotManager(QMainWindow):
         self.custom_resolution_input.clear()
 
     def load_existing_shows(self):
-        if not os.path.exists(self.metadata_path):
-            return
+        # Show names arrive through on_show_found, shots are read when a show is opened
+        self.loader.load_shows()
 
-        for metadata_file in os.listdir(self.metadata_path):
-            if metadata_file.endswith('_metadata.json'):
-                with open(os.path.join(self.metadata_path, metadata_file), 'r') as file:
-                    metadata = json.load(file)
-
-                show_name = metadata['show']
-                shot_name = metadata['shot']
-                frame_range = metadata['frame_range']
-                comment = metadata.get('comment', '')  # Load comment
-                resolution = metadata['resolution']
-                footage = metadata.get('footage', '')
-                elements = metadata.get('elements', '')
-                path = metadata['path']
-
-                if show_name not in self.shows:
-                    self.shows[show_name] = []
-
-                self.shows[show_name].append({
-                    'shot': shot_name,
-                    'frame_range': frame_range,
-                    'comment': comment,
-                    'resolution': resolution,
-                    'footage': footage,
-                    'elements': elements,
-                    'path': path
-                })
+    def on_show_found(self, show_name):
+        if show_name not in self.shows:
+            self.shows[show_name] = None
+            self.update_show_dropdown()
 
-        self.update_table()
-        self.update_show_dropdown()
+    def on_shots_loaded(self, request_id, show_name, shots):
+        if self.load_requests.get(show_name) != request_id:
+            return  # The show was reloaded since, these rows are stale
+        shots = [shot for shot in shots if shot_key(shot) not in self.registry]  # Already sent by the watcher
+        self.registry.add_shots(shots)
+        if self.shot_model.shots() is self.shows.get(show_name):
+            self.shot_model.append_shots(shots)
+        elif self.shows.get(show_name) is not None:
+            self.shows[show_name].extend(shots)
+
+    def on_shots_changed(self, shots):
+        """Apply shots added or changed by any process row by row, without reloading the show."""
+        appended = []
+        changed = []
+        for shot in shots:
+            show_name = shot['show']
+            if show_name not in self.shows:
+                self.on_show_found(show_name)
+                continue
+            if self.shows[show_name] is None:
+                continue  # Not opened yet, it is read in full when it is
+
+            shot.update(self.writer.pending_fields(show_name, shot['shot']))  # Local edits not written yet win
+            existing = self.registry.get(show_name, shot['shot'])
+            if existing is None:
+                if self.shot_model.shots() is self.shows[show_name]:
+                    appended.append(shot)
+                else:
+                    self.shows[show_name].append(shot)
+                self.registry.add(shot)
+                continue
+
+            row = self.shot_model.row_of(show_name, shot['shot'])
+            if row >= 0:
+                self.shot_model.update_shot(row, **shot)
+            else:
+                existing.update(shot)
+            self.registry.update(existing)
+            changed.append(shot_key(existing))
+        self.shot_model.append_shots(appended)
+
+        # A changed shot may have a new plate, rows in view ask for their thumbnail again when repainted
+        if changed:
+            self.thumbnails.invalidate(changed)
+            self.table.viewport().update()
+
+    def on_shots_removed(self, keys):
+        for show_name, shot_name in keys:
+            shot = self.registry.remove(show_name, shot_name)
+            if shot is None:
+                continue
+            row = self.shot_model.row_of(show_name, shot_name)
+            if row >= 0:
+                self.shot_model.remove_row(row)
+            elif self.shows.get(show_name):
+                self.shows[show_name].remove(shot)
+
+    def on_load_progress(self, done, total, text):
+        self.load_progress.setMaximum(max(total, 1))
+        self.load_progress.setValue(done)
+        self.load_progress.setFormat(f'{text}: %v/%m')
+        self.load_progress.show()
+
+    def on_load_finished(self, show_name):
+        self.load_progress.hide()
+
+    def get_shots(self, show_name):
+        """Return the shot list of a show, reading its rows from the store on first use."""
+        if self.shows.get(show_name) is None:
+            with span('metadata.read_show', show=show_name) as timing:
+                self.shows[show_name] = self.store.shots(show_name)
+                timing.add(count=len(self.shows[show_name]))
+            self.load_requests.pop(show_name, None)  # Drop batches of any load still running
+            self.registry.remove_show(show_name)
+            self.registry.add_shots(self.shows[show_name])
+        return self.shows[show_name]
 
     def load_from_excel(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, 'Select Excel File', '', 'Excel Files (*.xlsx)')
+        file_path, _ = QFileDialog.getOpenFileName(self, 'Select Shot List', '', 'Shot Lists (*.xlsx *.csv)')
 
         if not file_path:
             return
 
-        df = pd.read_excel(file_path)
-        required_columns = ['SHOW', 'SHOT', 'RESOLUTION', 'FRAME-RANGE', 'COMMENTS']
-        if not all(column in df.columns for column in required_columns):
-            QMessageBox.warning(self, 'Warning', 'Excel file must contain the columns: SHOW, SHOT, RESOLUTION, FRAME-RANGE, COMMENTS.')
+        # pandas is only imported when a shot list is read, not when the app starts
+        from shot_import import read_shot_list, diff_shot_list, review_rows, ShotListError
+
+        # Rows are streamed and validated in chunks, only valid rows come back as records
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            shot_list = read_shot_list(file_path)
+        except ShotListError as e:
+            QMessageBox.warning(self, 'Warning', str(e))
             return
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        # Existing metadata of the shows in the sheet, to tell new shots from changed ones
+        self.flush_edits()
+        existing = {}
+        for show_name in {record['show'] for record in shot_list.records}:
+            for shot in self.store.shots(show_name):
+                existing[(show_name, shot['shot'])] = shot
 
-        review_dialog = ReviewDialog(df, self)
+        diff = diff_shot_list(shot_list, existing)
+
+        review_dialog = ReviewDialog(review_rows(shot_list, diff), self)
         if review_dialog.exec_() == QDialog.Accepted:
-            for _, row in df.iterrows():
-                show_name = row['SHOW']
-                shot_name = row['SHOT']
-                resolution = row['RESOLUTION']
-                frame_range = row['FRAME-RANGE']
-                comment = row['COMMENTS']  # Load comment from Excel
-
-                if show_name not in self.shows:
-                    self.shows[show_name] = []
-
-                self.shows[show_name].append({
-                    'shot': shot_name,
-                    'frame_range': frame_range,
-                    'comment': comment,  # Add comment field
-                    'resolution': resolution,
-                    'footage': '',
-                    'elements': '',
-                    'path': os.path.join(self.project_path, show_name, shot_name)
-                })
-
-                self.create_folder_structure(show_name, shot_name)
-                self.create_metadata_file(show_name, shot_name, frame_range, comment, resolution, '', '')
+            records = self.apply_shot_list_diff(diff, review_dialog.remove_missing_checkbox.isChecked())
 
-            self.update_table()
-            self.update_show_dropdown()
+            if records:
+                # Changed shots already have their folders, only new shots get them
+                self.start_folder_task([record['path'] for record in records], f'Creating folders for {len(records)} new shots...',
+                                       lambda results, cancelled: self.on_import_folders_created(records, results))
+
+    def on_import_folders_created(self, records, results):
+        errors = [f'{path}: {error}' for path, (created, error) in results.items() if error]
+        if errors:
+            QMessageBox.warning(self, 'Warning', 'Could not create folders for:\n' + '\n'.join(errors[:20]))
+
+        confirm = QMessageBox.question(self, 'Nuke Scripts', f'Generate v001 Nuke scripts for the {len(records)} new shots?',
+                                       QMessageBox.Yes | QMessageBox.No)
+        if confirm == QMessageBox.Yes:
+            self.generate_nuke_scripts(records)
+
+    def apply_shot_list_diff(self, diff, remove_missing=False):
+        """Write only the inserts, updates and optional removals of a shot list diff, returns the new records.
+
+        Folders of the new records are left to the caller, see start_folder_task.
+        """
+        records, touched = apply_shot_list_diff(self.store, diff, self.project_path, remove_missing)
+
+        # Touched shows are read again when shown, shows left without shots are dropped
+        for show_name in touched:
+            self.registry.remove_show(show_name)
+            if self.store.shot_count(show_name):
+                self.shows[show_name] = None
+            else:
+                self.shows.pop(show_name, None)
+
+        self.update_show_dropdown()
+        self.update_table()
+        return records
+
+    def generate_nuke_scripts(self, shots=None):
+        """Write v001 Nuke scripts from the template for the given shots, or for the selected show."""
+        if shots is None:
+            show_name = self.show_dropdown.currentText()
+            if show_name not in self.shows:
+                QMessageBox.warning(self, 'Warning', 'Please select a show.')
+                return
+            shots = self.get_shots(show_name)
+
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            results = generate_show_scripts(shots)
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        created = sum(1 for _, _, status, _ in results if status == 'created')
+        existing = sum(1 for _, _, status, _ in results if status == 'exists')
+        errors = [f"{shot['shot']}: {message}" for shot, _, status, message in results if status == 'error']
+        skipped = [shot['shot'] for shot, _, status, _ in results if status == 'skipped']
+
+        message = f'Created {created} scripts, {existing} shots already had a v001 script.'
+        if skipped:
+            message += f"\n\nSkipped {len(skipped)} shots without a folder: {', '.join(skipped[:20])}"
+        if errors:
+            message += '\n\nFailed:\n' + '\n'.join(errors[:20])
+        QMessageBox.information(self, 'Nuke Scripts', message)
 
     def update_show_dropdown(self):
         current_show = self.show_dropdown.currentText()
+        self.show_dropdown.blockSignals(True)
         self.show_dropdown.clear()
-        self.show_dropdown.addItems(self.shows.keys())
+        self.show_dropdown.addItems(sorted(self.shows.keys()))
 
         if current_show in self.shows:
             self.show_dropdown.setCurrentText(current_show)
+        self.show_dropdown.blockSignals(False)
+
+        # Only reload the table when the selection actually moved to another show
+        if self.show_dropdown.currentText() != current_show:
+            self.update_table()
 
     def show_dropdown_changed(self, index):
         """Filter the shots based on the selected show in the dropdown."""
         selected_show = self.show_dropdown.currentText()
         self.update_table(selected_show)  # Update table with shots from selected show
 
+    def closeEvent(self, event):
+        self.flush_edits()
+        self.loader.cancel()
+        self.thumbnails.cancel()
+        self.watcher.close()
+        if self.folder_task:
+            self.folder_task.cancel()
+        if self.ingest_task:
+            self.ingest_task.cancel()  # Unfinished copies are kept as .part files and resumed next time
+        if self.frame_check_task:
+            self.frame_check_task.cancel()
+        if self.disk_usage_task:
+            self.disk_usage_task.cancel()
+        if self.purge_task:
+            self.purge_task.cancel()  # Folders not deleted yet stay in the trash, a later session purges them
+        super().closeEvent(event)
+
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     manager = ShowShotManager()
@@ -0,0 +1,427 @@
+import os
+import sys
+import json
+import argparse
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
+from metadata_store import METADATA_DIR, FIELDS, VALUE_FIELDS, CHANGES_KEPT, read_json_dir
+from shot_record import Shot
+
+MANIFEST_DIRNAME = 'manifests'
+MANIFEST_SUFFIX = '.jsonl'
+IMPORTED_MARKER = '.json_imported'
+COMPACT_MIN_LINES = 1000  # Logs shorter than this are never compacted
+LOCK_SUFFIX = '.lock'
+TAIL_BYTES = 65536  # Read to find where the last complete line of a manifest ends
+
+
+def manifest_name(show_name):
+    # Show names can hold characters file systems don't like, the file name is the quoted show name
+    return quote(show_name, safe='') + MANIFEST_SUFFIX
+
+
+def _record(record):
+    return {field: '' if record.get(field) is None else str(record.get(field, '')) for field in FIELDS}
+
+
+def write_atomic(path, text):
+    """Write a file through a temporary file and os.replace, readers never see it half written."""
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+@contextmanager
+def locked(lock_path):
+    """Hold an exclusive lock on a lock file, shared by every process using it, for the with block."""
+    with open(lock_path, 'a+b') as file:
+        if sys.platform == 'win32':
+            import msvcrt
+
+            file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)  # Gives up after 10 seconds
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+class _Manifest:
+    """What has been read of one show's manifest file."""
+
+    def __init__(self, complete=True):
+        self.shots = {}  # shot name -> record, only the shots of lines read since offset if not complete
+        self.identity = None  # (device, inode) of the file the offset belongs to
+        self.offset = 0
+        self.lines = 0
+        self.complete = complete  # False when it is only followed for the change feed
+
+
+class ManifestStore:
+    """Shot metadata kept in one append-only JSON Lines manifest per show.
+
+    Each line sets the fields of a shot or deletes it, later lines win. A show
+    is read with one sequential read and afterwards only the lines appended
+    since are read, whoever appended them. The change feed follows shows
+    nobody opened from the end of their manifest, so it reads only new lines,
+    until the manifest is compacted and is read once in full.
+    A manifest is compacted into one line per shot once most of its lines are
+    outdated. Appends and compaction hold a lock file per show, so a line
+    appended by another process is never lost to a compaction. The methods
+    match MetadataStore, so either can back the apps.
+    """
+
+    def __init__(self, metadata_path=METADATA_DIR, manifest_dir=None):
+        self.metadata_path = metadata_path
+        self.manifest_dir = manifest_dir or os.path.join(metadata_path, MANIFEST_DIRNAME)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        self._lock = threading.RLock()  # The loader reads on a worker thread
+        self._manifests = {}  # show name -> _Manifest
+        self._log = []  # (id, show, shot, op) seen since the store was opened
+        self._next_change = 1
+        self._existing = set(self._manifest_names())  # Manifests from before, their first read isn't a change
+
+    def close(self):
+        pass  # Nothing is kept open between calls
+
+    def watch_paths(self):
+        """Directories and files a watcher should follow to see changes of other processes."""
+        with self._lock:
+            files = [self._path(show_name) for show_name in self._manifests]
+        return [self.metadata_path, self.manifest_dir] + [path for path in files if os.path.exists(path)]
+
+    def _path(self, show_name):
+        return os.path.join(self.manifest_dir, manifest_name(show_name))
+
+    # Reading manifests
+
+    def _log_change(self, show_name, shot_name, op):
+        self._log.append((self._next_change, show_name, shot_name, op))
+        self._next_change += 1
+
+    def _apply_line(self, show_name, manifest, line, log):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return  # A line cut short by a crash, the shot's next line repairs it
+        shot_name = entry.get('shot', '')
+        if entry.get('op') == 'del':
+            removed = manifest.shots.pop(shot_name, None) is not None
+            if log and (removed or not manifest.complete):  # A followed manifest doesn't know all its shots
+                self._log_change(show_name, shot_name, 'delete')
+            return
+
+        record = manifest.shots.get(shot_name)
+        if record is None:
+            record = _record({'show': show_name, 'shot': shot_name})
+            manifest.shots[shot_name] = record
+        record.update((field, entry[field]) for field in VALUE_FIELDS if field in entry)
+        if log:
+            self._log_change(show_name, shot_name, 'upsert')
+
+    def _refresh(self, show_name, full=True):
+        """Read what was appended to a show's manifest since it was last read.
+
+        With full=False a manifest from before the store was opened that wasn't
+        read yet is only followed from its end, enough for the change feed.
+        """
+        manifest = self._manifests.get(show_name)
+        known = manifest is not None
+        try:
+            stat = os.stat(self._path(show_name))
+        except FileNotFoundError:
+            self._existing.discard(show_name)  # A manifest created again later is new
+            if known:
+                del self._manifests[show_name]
+                for shot_name in manifest.shots:
+                    self._log_change(show_name, shot_name, 'delete')
+            return None
+
+        identity = (stat.st_dev, stat.st_ino)
+        if known and not manifest.complete and (manifest.identity != identity or stat.st_size < manifest.offset):
+            # Compacted or replaced, lines appended since can't be told from the compacted ones. It is read
+            # in full and the shots seen while following are compared, the others were there before.
+            seen = manifest.shots
+            manifest = _Manifest()
+            manifest.identity = identity
+            self._manifests[show_name] = manifest
+            self._read_from(show_name, manifest, log=False)
+            for shot_name, record in seen.items():
+                if shot_name not in manifest.shots:
+                    self._log_change(show_name, shot_name, 'delete')
+                elif manifest.shots[shot_name] != record:
+                    self._log_change(show_name, shot_name, 'upsert')
+            return manifest
+
+        if known and not manifest.complete:
+            if stat.st_size > manifest.offset:
+                self._read_from(show_name, manifest, log=True)
+            if not full:
+                return manifest
+            # The lines up to the followed offset are read without logging them, the rest were appended since
+            followed = manifest.offset
+            manifest = _Manifest()
+            manifest.identity = identity
+            self._manifests[show_name] = manifest
+            self._read_from(show_name, manifest, log=False, end=followed)
+            self._read_from(show_name, manifest, log=True)
+            return manifest
+
+        if not known and not full and show_name in self._existing:
+            manifest = _Manifest(complete=False)
+            manifest.identity = identity
+            manifest.offset = self._line_end(show_name, stat.st_size)
+            self._manifests[show_name] = manifest
+            return manifest
+
+        if known and manifest.identity == identity and stat.st_size == manifest.offset:
+            return manifest
+
+        if not known or manifest.identity != identity or stat.st_size < manifest.offset:
+            # First read, compacted or replaced: read it all and log the difference to what was known,
+            # a manifest created since the store was opened is all new
+            previous = manifest.shots if known else None
+            manifest = _Manifest()
+            manifest.identity = identity
+            self._manifests[show_name] = manifest
+            self._read_from(show_name, manifest, log=show_name not in self._existing and previous is None)
+            self._existing.add(show_name)
+            if previous is not None:
+                for shot_name, record in manifest.shots.items():
+                    if previous.get(shot_name) != record:
+                        self._log_change(show_name, shot_name, 'upsert')
+                for shot_name in previous.keys() - manifest.shots.keys():
+                    self._log_change(show_name, shot_name, 'delete')
+            return manifest
+
+        self._read_from(show_name, manifest, log=True)
+        return manifest
+
+    def _read_from(self, show_name, manifest, log, end=None):
+        with open(self._path(show_name), 'rb') as file:
+            file.seek(manifest.offset)
+            data = file.read() if end is None else file.read(end - manifest.offset)
+        end = data.rfind(b'\n') + 1  # A line still being written is read next time
+        for line in data[:end].decode('utf-8').splitlines():
+            if line.strip():
+                self._apply_line(show_name, manifest, line, log)
+                manifest.lines += 1
+        manifest.offset += end
+
+    def _line_end(self, show_name, size):
+        """Offset just past the last complete line in the first size bytes of a manifest."""
+        start = max(size - TAIL_BYTES, 0)
+        try:
+            with open(self._path(show_name), 'rb') as file:
+                file.seek(start)
+                data = file.read(size - start)
+        except OSError:
+            return size
+        return start + data.rfind(b'\n') + 1
+
+    def _manifest_names(self):
+        for entry in os.scandir(self.manifest_dir):
+            if entry.name.endswith(MANIFEST_SUFFIX) and entry.is_file():
+                yield unquote(entry.name[:-len(MANIFEST_SUFFIX)])
+
+    def _refresh_all(self, full=True):
+        for show_name in set(self._manifest_names()) | set(self._manifests):
+            self._refresh(show_name, full)
+
+    # Writing manifests
+
+    def _append(self, show_name, entries):
+        if not entries:
+            return
+        with self._lock, locked(self._path(show_name) + LOCK_SUFFIX):
+            self._refresh(show_name)
+            text = ''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries)
+            with open(self._path(show_name), 'a', encoding='utf-8') as file:
+                file.write(text)
+            manifest = self._refresh(show_name)  # Reads the appended lines back like anyone else's
+            if manifest and manifest.lines > max(COMPACT_MIN_LINES, 2 * len(manifest.shots)):
+                self._compact(show_name)
+
+    def compact(self, show_name):
+        """Rewrite a show's manifest with one line per shot."""
+        with self._lock, locked(self._path(show_name) + LOCK_SUFFIX):
+            self._compact(show_name)
+
+    def _compact(self, show_name):
+        # Called with the show's lock file held, no other process can append between the read and the replace
+        manifest = self._refresh(show_name)
+        if manifest is None:
+            return
+        text = ''.join(json.dumps(dict(record, op='set'), separators=(',', ':')) + '\n'
+                       for shot_name, record in sorted(manifest.shots.items()))
+        write_atomic(self._path(show_name), text)
+        self._refresh(show_name)
+
+    # Legacy per-shot JSON files
+
+    @property
+    def needs_migration(self):
+        return not os.path.exists(os.path.join(self.manifest_dir, IMPORTED_MARKER))
+
+    def import_json_dir(self, json_dir=None, progress=None):
+        records = read_json_dir(json_dir or self.metadata_path, progress)
+        self.add_shots(records)
+        write_atomic(os.path.join(self.manifest_dir, IMPORTED_MARKER), '1\n')
+        return len(records)
+
+    # Queries
+
+    def shows(self):
+        with self._lock:
+            self._refresh_all()
+            return sorted(show_name for show_name, manifest in self._manifests.items() if manifest.shots)
+
+    def shots(self, show_name):
+        with self._lock:
+            manifest = self._refresh(show_name)
+            if manifest is None:
+                return []
+            return [Shot(**record) for shot_name, record in sorted(manifest.shots.items())]
+
+    def iter_shots(self, show_name, batch_size=500):
+        shots = self.shots(show_name)
+        for start in range(0, len(shots), batch_size):
+            yield shots[start:start + batch_size]
+
+    def get_shot(self, show_name, shot_name):
+        with self._lock:
+            manifest = self._refresh(show_name)
+            record = manifest.shots.get(shot_name) if manifest else None
+            return Shot(**record) if record else None
+
+    def shot_count(self, show_name=None):
+        with self._lock:
+            if show_name is None:
+                self._refresh_all()
+                return sum(len(manifest.shots) for manifest in self._manifests.values())
+            manifest = self._refresh(show_name)
+            return len(manifest.shots) if manifest else 0
+
+    # Change feed
+
+    def last_change_id(self):
+        with self._lock:
+            self._refresh_all(full=False)
+            return self._next_change - 1
+
+    def changes_since(self, change_id):
+        with self._lock:
+            self._refresh_all(full=False)
+            return [change for change in self._log if change[0] > change_id]
+
+    def prune_changes(self, keep=CHANGES_KEPT):
+        with self._lock:
+            del self._log[:-keep]
+
+    # Writes
+
+    def add_shot(self, record):
+        self.add_shots([record])
+
+    def add_shots(self, records):
+        by_show = {}
+        for record in records:
+            by_show.setdefault(str(record.get('show', '')), []).append(dict(_record(record), op='set'))
+        for show_name, entries in by_show.items():
+            self._append(show_name, entries)
+
+    def update_shot(self, show_name, shot_name, **fields):
+        self.update_shots({(show_name, shot_name): fields})
+
+    def update_shots(self, edits):
+        by_show = {}
+        for (show_name, shot_name), fields in edits.items():
+            unknown = set(fields) - set(VALUE_FIELDS)
+            if unknown:
+                raise KeyError(f'Unknown metadata fields: {", ".join(sorted(unknown))}')
+            if fields and self.get_shot(show_name, shot_name) is not None:  # Like UPDATE, missing shots stay missing
+                entry = {'op': 'set', 'show': show_name, 'shot': shot_name}
+                entry.update((field, str(value)) for field, value in fields.items())
+                by_show.setdefault(show_name, []).append(entry)
+        for show_name, entries in by_show.items():
+            self._append(show_name, entries)
+
+    def remove_shot(self, show_name, shot_name):
+        self.remove_shots([(show_name, shot_name)])
+
+    def remove_shots(self, keys):
+        by_show = {}
+        for show_name, shot_name in keys:
+            by_show.setdefault(show_name, []).append({'op': 'del', 'show': show_name, 'shot': shot_name})
+        for show_name, entries in by_show.items():
+            self._append(show_name, entries)
+
+
+# Converting between formats
+
+def write_json_dir(store, json_dir):
+    """Write every shot of a store as a {show}_{shot}_metadata.json file, returns the number written."""
+    os.makedirs(json_dir, exist_ok=True)
+    count = 0
+    for show_name in store.shows():
+        for shot in store.shots(show_name):
+            path = os.path.join(json_dir, f"{shot['show']}_{shot['shot']}_metadata.json")
+            write_atomic(path, json.dumps(shot.to_dict(), indent=4))
+            count += 1
+    return count
+
+
+def copy_store(source, target):
+    """Copy every shot from one store to another, one batch per show."""
+    count = 0
+    for show_name in source.shows():
+        shots = source.shots(show_name)
+        target.add_shots(shots)
+        count += len(shots)
+    return count
+
+
+def main(argv=None):
+    from metadata_store import MetadataStore
+
+    parser = argparse.ArgumentParser(description='Convert shot metadata between per-shot JSON files, '
+                                                 'the SQLite database and per-show manifests.')
+    parser.add_argument('conversion', choices=['json-to-manifest', 'manifest-to-json', 'db-to-manifest', 'manifest-to-db'])
+    parser.add_argument('--metadata-dir', default=METADATA_DIR, help='Directory of the database and the manifests')
+    parser.add_argument('--json-dir', help='Directory of the per-shot JSON files, defaults to the metadata directory')
+    args = parser.parse_args(argv)
+
+    json_dir = args.json_dir or args.metadata_dir
+    manifests = ManifestStore(args.metadata_dir)
+    if args.conversion == 'json-to-manifest':
+        count = manifests.import_json_dir(json_dir)
+    elif args.conversion == 'manifest-to-json':
+        count = write_json_dir(manifests, json_dir)
+    elif args.conversion == 'db-to-manifest':
+        count = copy_store(MetadataStore(args.metadata_dir), manifests)
+    else:
+        count = copy_store(manifests, MetadataStore(args.metadata_dir))
+    print(f'{args.conversion}: {count} shots')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
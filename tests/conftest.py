@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# The modules live at the top of the repo and are imported by name, like the apps do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Modules put their caches and indexes under ~/.nuke when imported, keep the tests out of the real one
+os.environ['HOME'] = os.environ['USERPROFILE'] = tempfile.mkdtemp(prefix='show_manager_tests_')
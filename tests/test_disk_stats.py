@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+from disk_stats import DiskStatsScanner, shot_disk_usage, show_summaries, usage_key, OTHER_FOLDER
+
+OLD_NS = 1000000000 * 1000000000  # Folder times are set back to this, so any change moves them on
+
+
+def write(path, nbytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(b'x' * nbytes)
+
+
+def age_folders(root):
+    for folder, subfolders, files in os.walk(root):
+        os.utime(folder, ns=(OLD_NS, OLD_NS))
+
+
+@pytest.fixture
+def shot_path(tmp_path):
+    shot_path = str(tmp_path / 'DIG' / 'sh010')
+    write(os.path.join(shot_path, 'comp', 'sh010_v001.nk'), 100)
+    write(os.path.join(shot_path, 'footages', 'plate', 'plate.1001.exr'), 1000)
+    write(os.path.join(shot_path, 'footages', 'plate', 'plate.1002.exr'), 1000)
+    write(os.path.join(shot_path, 'notes.txt'), 10)
+    age_folders(shot_path)
+    return shot_path
+
+
+@pytest.fixture
+def listed(monkeypatch):
+    """Folders os.scandir lists."""
+    folders = []
+    scandir = os.scandir
+
+    def counting_scandir(path='.'):
+        folders.append(os.path.relpath(path))
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', counting_scandir)
+    return folders
+
+
+def sizes(stats):
+    return {name: (folder_stats.bytes, folder_stats.files) for name, folder_stats in stats.items()}
+
+
+def test_shot_is_measured_per_top_level_folder(shot_path):
+    stats = DiskStatsScanner().shot(shot_path)
+    assert sizes(stats) == {'': (10, 1), 'comp': (100, 1), 'footages': (2000, 2)}
+    assert DiskStatsScanner().shot(shot_path + '_missing') is None
+
+
+def test_rescan_lists_only_changed_folders(shot_path, listed):
+    scanner = DiskStatsScanner()
+    scanner.shot(shot_path)
+    assert len(listed) == 4
+
+    del listed[:]
+    assert sizes(scanner.shot(shot_path))['footages'] == (2000, 2)
+    assert listed == []
+
+    write(os.path.join(shot_path, 'footages', 'plate', 'plate.1003.exr'), 1000)
+    os.remove(os.path.join(shot_path, 'comp', 'sh010_v001.nk'))
+    stats = sizes(scanner.shot(shot_path))
+    assert stats['footages'] == (3000, 3) and stats['comp'] == (0, 0)
+    assert sorted(os.path.basename(folder) for folder in listed) == ['comp', 'plate']
+
+
+def test_file_rewritten_in_place_needs_a_full_scan(shot_path):
+    scanner = DiskStatsScanner()
+    scanner.shot(shot_path)
+    write(os.path.join(shot_path, 'comp', 'sh010_v001.nk'), 500)
+    age_folders(shot_path)  # Rewriting a file leaves its folder's time alone
+    assert sizes(scanner.shot(shot_path))['comp'] == (100, 1)
+    assert sizes(scanner.shot(shot_path, full=True))['comp'] == (500, 1)
+
+
+def test_removed_and_invalidated_folders(shot_path, listed):
+    scanner = DiskStatsScanner()
+    scanner.shot(shot_path)
+    scanner.invalidate(os.path.join(shot_path, 'footages'))
+    del listed[:]
+    scanner.shot(shot_path)
+    assert sorted(os.path.basename(folder) for folder in listed) == ['footages', 'plate']
+
+    for name in os.listdir(os.path.join(shot_path, 'footages', 'plate')):
+        os.remove(os.path.join(shot_path, 'footages', 'plate', name))
+    os.rmdir(os.path.join(shot_path, 'footages', 'plate'))
+    assert sizes(scanner.shot(shot_path))['footages'] == (0, 0)
+
+
+def test_cache_file_carries_over_to_the_next_session(shot_path, tmp_path, listed):
+    cache_file = str(tmp_path / 'disk_stats.json')
+    shot_disk_usage([{'show': 'DIG', 'shot': 'sh010', 'path': shot_path}], ['comp'], DiskStatsScanner(cache_file))
+    assert os.path.exists(cache_file)
+
+    del listed[:]
+    rows = shot_disk_usage([{'show': 'DIG', 'shot': 'sh010', 'path': shot_path}], ['comp'], DiskStatsScanner(cache_file))
+    assert listed == []
+    assert rows[0]['size'] == 2110
+
+
+def test_usage_rows_and_summaries(shot_path, tmp_path):
+    shots = [{'show': 'DIG', 'shot': 'sh010', 'path': shot_path},
+             {'show': 'DIG', 'shot': 'sh020', 'path': str(tmp_path / 'DIG' / 'sh020')},
+             {'show': 'DIG', 'shot': 'sh030', 'path': ''}]
+    rows = shot_disk_usage(shots, ['comp', 'footages'], DiskStatsScanner())
+    assert [row['shot'] for row in rows] == ['sh010', 'sh020']
+    assert rows[0][usage_key('footages')] == 2000
+    assert rows[0][usage_key(OTHER_FOLDER)] == 10
+    assert (rows[0]['size'], rows[0]['files'], rows[0]['missing']) == (2110, 4, False)
+    assert rows[1]['missing']
+
+    summary = show_summaries(rows, ['comp', 'footages', OTHER_FOLDER])['DIG']
+    assert (summary['shots'], summary['size'], summary['missing'], summary['active']) == (2, 2110, 1, 1)
+    assert summary['folders'] == {'comp': 100, 'footages': 2000, OTHER_FOLDER: 10}
@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+
+import pytest
+
+from shot_record import Shot
+from launch_context import LaunchContextCache, SoftwareRegistry, LaunchError, remove_old_scripts
+
+
+@pytest.fixture
+def cache(tmp_path):
+    config_file = tmp_path / 'software.json'
+    # Any executable will do, nothing is launched
+    config_file.write_text(json.dumps({'nuke': [sys.executable, '--nukex'], 'houdini': sys.executable,
+                                       'katana': '', 'missing': str(tmp_path / 'no_such_program')}))
+    return LaunchContextCache(SoftwareRegistry(str(config_file)), str(tmp_path / 'launch_scripts'))
+
+
+def make_shot(**fields):
+    return Shot('DIG', 'sh010', fields.pop('frame_range', '1001-1100'), resolution=fields.pop('resolution', '4K'),
+                path='/projects/DIG/sh010', **fields)
+
+
+def test_context_holds_command_environment_and_script(cache):
+    context = cache.context('nuke', make_shot())
+    assert context.command[:2] == [sys.executable, '--nukex']
+    assert context.command[2] == '-run' and context.command[3] == context.script_path
+    assert os.path.exists(context.script_path)
+    assert context.env['FRAME_RANGE'] == '1001-1100'
+    assert context.env['SHOT_PATH'] == '/projects/DIG/sh010'
+    assert context.environment()['SHOT'] == 'sh010'
+
+    houdini = cache.context('houdini', make_shot())
+    assert houdini.command == [sys.executable] and houdini.script_path is None
+
+
+def test_unchanged_shot_reuses_its_context(cache):
+    first = cache.context('nuke', make_shot())
+    assert cache.context('nuke', make_shot()) is first
+    assert cache.context('nuke', make_shot(comment='not part of the context')) is first
+
+
+@pytest.mark.parametrize('fields', [{'frame_range': '1001-1200'}, {'resolution': 'HD'}])
+def test_changed_shot_gets_a_new_context(cache, fields):
+    first = cache.context('nuke', make_shot())
+    second = cache.context('nuke', make_shot(**fields))
+    assert second is not first
+    assert second.digest != first.digest
+    assert second.script_path != first.script_path
+    assert os.path.exists(first.script_path)  # Shared by every launch that still needs it
+
+
+def test_same_metadata_shares_the_startup_script(cache):
+    first = cache.context('nuke', make_shot())
+    other = LaunchContextCache(cache.software, cache.script_dir).context('nuke', make_shot())
+    assert other.script_path == first.script_path
+    assert len(os.listdir(cache.script_dir)) == 1
+
+
+def test_invalidate_forgets_contexts(cache):
+    first = cache.context('nuke', make_shot())
+    houdini = cache.context('houdini', make_shot())
+    cache.invalidate([('DIG', 'sh020')])
+    assert cache.context('nuke', make_shot()) is first
+    cache.invalidate([('DIG', 'sh010')])
+    assert cache.context('nuke', make_shot()) is not first
+    assert cache.context('houdini', make_shot()) is not houdini
+
+
+def test_software_that_cannot_be_launched(cache):
+    with pytest.raises(LaunchError):
+        cache.context('katana', make_shot())  # Removed by an empty entry
+    with pytest.raises(LaunchError):
+        cache.context('missing', make_shot())
+    with pytest.raises(LaunchError):
+        cache.context('maya', make_shot())
+
+
+def test_precompute_skips_software_that_cannot_be_launched(cache):
+    shots = [make_shot(), Shot('DIG', 'sh020', '1001-1010', path='/projects/DIG/sh020')]
+    assert cache.precompute(shots) == 4  # nuke and houdini for both shots
+    assert cache.context('nuke', shots[1]) is cache.context('nuke', shots[1])
+
+
+def test_remove_old_scripts(cache):
+    script_path = cache.context('nuke', make_shot()).script_path
+    os.utime(script_path, (0, 0))
+    assert remove_old_scripts(cache.script_dir) == 1
+    assert not os.path.exists(script_path)
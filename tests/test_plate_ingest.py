@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from plate_ingest import plan_ingest, ingest, is_ingested, PART_SUFFIX
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'symlink'), reason='needs symlinks')
+
+
+def touch(path, data=b'plate'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+
+def planned(tmp_path, sources):
+    target_dir = tmp_path / 'footages'
+    return sorted(os.path.relpath(target, target_dir) for source, target in plan_ingest(sources, str(target_dir)))
+
+
+@pytest.fixture
+def source(tmp_path):
+    touch(str(tmp_path / 'src' / 'one.mov'))
+    touch(str(tmp_path / 'src' / 'seq' / 'plate.1001.exr'))
+    return tmp_path / 'src'
+
+
+def test_folder_is_copied_as_a_folder(tmp_path, source):
+    touch(str(source / 'seq' / 'plate.1002.exr' ) + PART_SUFFIX)  # Left by an interrupted ingest
+    assert planned(tmp_path, [str(source)]) == [
+        os.path.join('src', 'one.mov'), os.path.join('src', 'seq', 'plate.1001.exr')]
+
+
+def test_link_to_the_source_itself_is_skipped(tmp_path, source):
+    os.symlink('..', str(source / 'seq' / 'loop'))
+    assert planned(tmp_path, [str(source)]) == [
+        os.path.join('src', 'one.mov'), os.path.join('src', 'seq', 'plate.1001.exr')]
+
+
+def test_link_to_a_folder_containing_the_source_is_skipped(tmp_path, source):
+    os.symlink('..', str(source / 'seq' / 'up'))
+    os.symlink(str(tmp_path), str(source / 'seq' / 'top'))
+    assert planned(tmp_path, [str(source / 'seq')]) == [os.path.join('seq', 'plate.1001.exr')]
+
+
+def test_folder_linked_twice_is_copied_once(tmp_path, source):
+    touch(str(tmp_path / 'elsewhere' / 'grade.cube'))
+    os.symlink(str(tmp_path / 'elsewhere'), str(source / 'first'))
+    os.symlink(str(tmp_path / 'elsewhere'), str(source / 'seq' / 'second'))
+    copies = [path for path in planned(tmp_path, [str(source)]) if path.endswith('grade.cube')]
+    assert len(copies) == 1
+
+
+def test_ingest_copies_once_and_skips_finished_copies(tmp_path, source):
+    os.symlink('..', str(source / 'seq' / 'loop'))
+    jobs = plan_ingest([str(source)], str(tmp_path / 'footages'))
+    assert set(ingest(jobs).values()) == {''}
+    for source_path, target in jobs:
+        assert is_ingested(source_path, target)
+        assert not os.path.exists(target + PART_SUFFIX)
+    assert set(ingest(jobs).values()) == {''}
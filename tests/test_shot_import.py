@@ -0,0 +1,81 @@
+import csv
+
+import pytest
+
+from metadata_store import MetadataStore
+from show_api import apply_shot_list_diff
+from shot_import import read_shot_list, diff_shot_list
+
+ROWS = [
+    ('DIG', 'sh010', '4K', '1001-1100', 'first'),
+    ('DIG', 'sh020', 'HD', '1001-1050', ''),
+    ('DIG', 'sh030', '2K', '1001-1010', 'last'),
+]
+
+
+def write_shot_list(path, rows):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['SHOW', 'SHOT', 'RESOLUTION', 'FRAME-RANGE', 'COMMENTS'])
+        writer.writerows(rows)
+    return str(path)
+
+
+def import_shot_list(store, file_path, project_path, remove_missing=False):
+    shot_list = read_shot_list(file_path)
+    existing = {}
+    for show_name in {record['show'] for record in shot_list.records}:
+        for shot in store.shots(show_name):
+            existing[(show_name, shot['shot'])] = shot
+    diff = diff_shot_list(shot_list, existing)
+    apply_shot_list_diff(store, diff, project_path, remove_missing)
+    return diff
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MetadataStore(str(tmp_path / 'metadata'))
+    yield store
+    store.close()
+
+
+def test_first_import_inserts_every_row(store, tmp_path):
+    diff = import_shot_list(store, write_shot_list(tmp_path / 'shots.csv', ROWS), str(tmp_path))
+    assert len(diff.inserts) == 3
+    assert not diff.updates and not diff.unchanged
+    assert [shot['shot'] for shot in store.shots('DIG')] == ['sh010', 'sh020', 'sh030']
+
+
+def test_identical_reimport_writes_nothing(store, tmp_path):
+    file_path = write_shot_list(tmp_path / 'shots.csv', ROWS)
+    import_shot_list(store, file_path, str(tmp_path))
+    last_change = store.last_change_id()
+
+    diff = import_shot_list(store, file_path, str(tmp_path))
+    assert not diff.inserts and not diff.updates and not diff.missing
+    assert len(diff.unchanged) == 3
+    assert store.last_change_id() == last_change
+
+
+def test_reimport_updates_changed_rows_only(store, tmp_path):
+    import_shot_list(store, write_shot_list(tmp_path / 'shots.csv', ROWS), str(tmp_path))
+    store.update_shot('DIG', 'sh020', footage='/plates/sh020')
+    changed = ROWS[:1] + [('DIG', 'sh020', 'HD', '1001-1060', 'longer')] + ROWS[2:]
+
+    diff = import_shot_list(store, write_shot_list(tmp_path / 'changed.csv', changed), str(tmp_path))
+    assert [shot['shot'] for shot in diff.updates] == ['sh020']
+    assert len(diff.unchanged) == 2
+    shot = store.get_shot('DIG', 'sh020')
+    assert (shot['frame_range'], shot['comment']) == ('1001-1060', 'longer')
+    assert shot['footage'] == '/plates/sh020'  # Fields the sheet doesn't have are kept
+
+
+def test_reimport_reports_missing_shots(store, tmp_path):
+    import_shot_list(store, write_shot_list(tmp_path / 'shots.csv', ROWS), str(tmp_path))
+
+    diff = import_shot_list(store, write_shot_list(tmp_path / 'fewer.csv', ROWS[:2]), str(tmp_path))
+    assert [shot['shot'] for shot in diff.missing] == ['sh030']
+    assert store.get_shot('DIG', 'sh030') is not None
+
+    import_shot_list(store, write_shot_list(tmp_path / 'fewer.csv', ROWS[:2]), str(tmp_path), remove_missing=True)
+    assert store.get_shot('DIG', 'sh030') is None
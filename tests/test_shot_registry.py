@@ -0,0 +1,84 @@
+import pytest
+
+from shot_record import Shot
+from shot_registry import ShotRegistry, parse_query
+
+
+@pytest.fixture
+def registry():
+    return ShotRegistry([
+        Shot('DIG', 'sh010', '1001-1100', 'Sky replacement', '4K'),
+        Shot('DIG', 'sh020', '1001-1050', 'roto for the sky', 'HD'),
+        Shot('DIG', 'sh030', '1090-1200', 'paint out rig', '4K'),
+        Shot('ABC', 'sh010', '', 'sky', '2K'),
+    ])
+
+
+def test_key_lookup(registry):
+    assert len(registry) == 4
+    assert ('ABC', 'sh010') in registry
+    assert registry.get('DIG', 'sh020')['comment'] == 'roto for the sky'
+    assert registry.get('DIG', 'sh999') is None
+    assert registry.shows() == ['ABC', 'DIG']
+    assert list(registry.show_keys('DIG')) == [('DIG', 'sh010'), ('DIG', 'sh020'), ('DIG', 'sh030')]
+
+
+def test_indexes(registry):
+    assert registry.with_resolution('4k') == {('DIG', 'sh010'), ('DIG', 'sh030')}
+    assert registry.with_comment_word('SKY') == {('DIG', 'sh010'), ('DIG', 'sh020'), ('ABC', 'sh010')}
+    assert registry.in_frames(1095, 1095) == {('DIG', 'sh010'), ('DIG', 'sh030')}
+    assert registry.in_frames(1051, 1089) == {('DIG', 'sh010')}
+    assert registry.in_frames(1201, 1300) == set()
+
+
+def test_search_combines_terms_within_a_show(registry):
+    assert registry.search('res:4K comment:sky', 'DIG') == {('DIG', 'sh010')}
+    assert registry.search('frame:1040-1095 sky') == {('DIG', 'sh010'), ('DIG', 'sh020')}
+    assert registry.search('sh010') == {('DIG', 'sh010'), ('ABC', 'sh010')}
+    assert registry.search('', 'ABC') == {('ABC', 'sh010')}
+    assert registry.search('frame:nonsense') == set()
+
+
+def test_update_moves_a_shot_between_index_entries(registry):
+    shot = registry.get('DIG', 'sh010')
+    shot.update(resolution='HD', comment='cleanup', frame_range='2001-2010')
+    registry.update(shot)
+    assert ('DIG', 'sh010') not in registry.with_resolution('4K')
+    assert ('DIG', 'sh010') in registry.with_resolution('HD')
+    assert ('DIG', 'sh010') not in registry.with_comment_word('sky')
+    assert registry.in_frames(1001, 1010) == {('DIG', 'sh020')}
+    assert registry.in_frames(2005, 2005) == {('DIG', 'sh010')}
+    assert registry.search('cleanup') == {('DIG', 'sh010')}
+
+
+def test_remove_drops_every_index_entry(registry):
+    assert registry.remove('DIG', 'sh030')['shot'] == 'sh030'
+    assert registry.remove('DIG', 'sh030') is None
+    assert registry.with_resolution('4K') == {('DIG', 'sh010')}
+    assert registry.with_comment_word('rig') == set()
+    assert registry.in_frames(1150, 1150) == set()
+
+    registry.remove_show('DIG')
+    assert registry.shows() == ['ABC']
+    assert len(registry) == 1
+
+
+def test_shots_removed_from_an_unsorted_batch():
+    registry = ShotRegistry()
+    registry.add_shots([Shot('DIG', f'sh{number:03d}', f'{2000 - number}-{2100 - number}') for number in range(50)])
+    for number in range(0, 50, 2):
+        registry.remove('DIG', f'sh{number:03d}')
+    assert registry.in_frames(0, 10000) == {('DIG', f'sh{number:03d}') for number in range(1, 50, 2)}
+
+
+@pytest.mark.parametrize('query', ['res:4K', 'comment:sky', 'frame:1095', 'frame:1001-1050 roto', 'sky 4k', 'nothing'])
+def test_matcher_agrees_with_search(registry, query):
+    matches = registry.matcher(query)
+    everything = [registry.get(*key) for key in registry.search('')]
+    assert {(shot['show'], shot['shot']) for shot in everything if matches(shot)} == registry.search(query)
+
+
+def test_parse_query():
+    assert parse_query('res:4k comment:Sky frame:1001-1100 frame:1050 frame:x Plate') == [
+        ('res', '4K'), ('comment', 'sky'), ('frame', (1001, 1100)), ('frame', (1050, 1050)), ('frame', None),
+        ('text', 'plate')]
@@ -0,0 +1,96 @@
+import os
+import time
+
+import pytest
+
+import shot_trash
+from shot_trash import move_to_trash, restore_from_trash, purge_expired_trash, trashed_at, UNDO_SECONDS
+
+
+@pytest.fixture(autouse=True)
+def trash_index(monkeypatch):
+    """Each test starts with an empty trash index, it lives in the tests' home folder."""
+    monkeypatch.setattr(shot_trash, '_recorded', set())
+    if os.path.exists(shot_trash.TRASH_INDEX_FILE):
+        os.remove(shot_trash.TRASH_INDEX_FILE)
+    return shot_trash.TRASH_INDEX_FILE
+
+
+def make_shot(tmp_path, show_name='DIG', shot_name='sh010'):
+    shot_path = tmp_path / 'projects' / show_name / shot_name
+    os.makedirs(str(shot_path / 'comp'))
+    (shot_path / 'comp' / 'sh010_v001.nk').write_text('Root {}\n')
+    return str(shot_path)
+
+
+def age(trashed_path, seconds):
+    """Rename a trashed folder as if it had been moved to the trash seconds ago."""
+    name = os.path.basename(trashed_path).rpartition('.')[0]
+    older = os.path.join(os.path.dirname(trashed_path), f'{name}.{int((time.time() - seconds) * 1000)}')
+    os.rename(trashed_path, older)
+    return older
+
+
+def test_move_to_trash_and_undo(tmp_path):
+    shot_path = make_shot(tmp_path)
+    trashed_path = move_to_trash(shot_path)
+    assert not os.path.exists(shot_path)
+    assert os.path.dirname(trashed_path) == os.path.join(os.path.dirname(shot_path), '.trash')
+    assert abs(trashed_at(trashed_path) - time.time()) < 60
+
+    restore_from_trash(trashed_path, shot_path)
+    assert os.path.exists(os.path.join(shot_path, 'comp', 'sh010_v001.nk'))
+    assert not os.path.exists(trashed_path)
+
+
+def test_undo_keeps_a_folder_created_since(tmp_path):
+    shot_path = make_shot(tmp_path)
+    trashed_path = move_to_trash(shot_path)
+    os.makedirs(shot_path)
+    with pytest.raises(FileExistsError):
+        restore_from_trash(trashed_path, shot_path)
+    assert os.path.exists(trashed_path)
+
+
+def test_same_shot_trashed_twice_keeps_both(tmp_path):
+    first = move_to_trash(make_shot(tmp_path))
+    second = move_to_trash(make_shot(tmp_path))
+    assert first != second and os.path.exists(first) and os.path.exists(second)
+
+
+def test_missing_folder_is_not_trashed(tmp_path):
+    assert move_to_trash(str(tmp_path / 'projects' / 'DIG' / 'gone')) is None
+
+
+def test_purge_deletes_only_expired_folders(tmp_path):
+    expired = age(move_to_trash(make_shot(tmp_path, shot_name='sh010')), UNDO_SECONDS + 60)
+    recent = move_to_trash(make_shot(tmp_path, shot_name='sh020'))
+
+    deleted, errors = purge_expired_trash([os.path.dirname(recent)])
+    assert deleted == [expired] and errors == {}
+    assert not os.path.exists(expired)
+    assert os.path.exists(recent)
+
+
+def test_purge_finds_trash_of_earlier_sessions(tmp_path):
+    expired = age(move_to_trash(make_shot(tmp_path, 'ABC')), UNDO_SECONDS + 60)
+    assert shot_trash.known_trash_folders() == {os.path.dirname(expired)}
+
+    shot_trash._recorded.clear()  # A later session only has the index
+    deleted, errors = purge_expired_trash()
+    assert deleted == [expired] and not os.path.exists(expired)
+
+
+def test_purge_finds_trash_through_shot_paths(tmp_path, trash_index):
+    shot_path = make_shot(tmp_path, shot_name='sh020')
+    expired = age(move_to_trash(make_shot(tmp_path)), UNDO_SECONDS + 60)
+    os.remove(trash_index)  # Not recorded, e.g. trashed by an older version
+
+    deleted, errors = purge_expired_trash(shot_paths=[shot_path])
+    assert deleted == [expired]
+
+
+def test_purge_older_than(tmp_path):
+    trashed_path = age(move_to_trash(make_shot(tmp_path)), 120)
+    assert purge_expired_trash([os.path.dirname(trashed_path)])[0] == []
+    assert purge_expired_trash([os.path.dirname(trashed_path)], older_than=60)[0] == [trashed_path]
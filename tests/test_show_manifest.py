@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+import show_manifest
+from show_manifest import ManifestStore
+
+
+def shot(show_name, shot_name, **fields):
+    return dict({'show': show_name, 'shot': shot_name}, **fields)
+
+
+def changes(store, since):
+    return [(show_name, shot_name, op) for change_id, show_name, shot_name, op in store.changes_since(since)]
+
+
+@pytest.fixture
+def stores(tmp_path):
+    """Two stores on the same folder, like the manager and the launcher."""
+    path = str(tmp_path / 'metadata')
+    return ManifestStore(path), ManifestStore(path)
+
+
+def test_writes_of_one_store_are_read_by_the_other(stores):
+    writer, reader = stores
+    writer.add_shots([shot('DIG', 'sh010', comment='a'), shot('DIG', 'sh020')])
+    writer.update_shot('DIG', 'sh010', comment='b')
+    writer.remove_shot('DIG', 'sh020')
+
+    assert reader.shows() == ['DIG']
+    assert [record['shot'] for record in reader.shots('DIG')] == ['sh010']
+    assert reader.get_shot('DIG', 'sh010')['comment'] == 'b'
+
+
+def test_change_feed_reports_appends_of_the_other_store(stores):
+    writer, reader = stores
+    writer.add_shot(shot('DIG', 'sh010'))
+    start = reader.last_change_id()
+    assert changes(reader, start) == []
+
+    writer.add_shot(shot('DIG', 'sh020'))
+    writer.update_shot('DIG', 'sh010', comment='new')
+    writer.remove_shot('DIG', 'sh020')
+    assert changes(reader, start) == [
+        ('DIG', 'sh020', 'upsert'), ('DIG', 'sh010', 'upsert'), ('DIG', 'sh020', 'delete')]
+
+
+def test_existing_manifests_are_not_reported_as_changes(tmp_path):
+    path = str(tmp_path / 'metadata')
+    ManifestStore(path).add_shots([shot('DIG', 'sh010'), shot('ABC', 'sh010')])
+
+    store = ManifestStore(path)
+    assert changes(store, 0) == []
+    assert store.shot_count() == 2
+    assert changes(store, 0) == []
+
+
+def test_compaction_by_one_store_reports_no_changes_to_the_other(stores):
+    writer, reader = stores
+    writer.add_shots([shot('DIG', f'sh{number:03d}') for number in range(10)])
+    for number in range(5):
+        writer.update_shot('DIG', 'sh000', comment=str(number))
+    reader.shots('DIG')
+    start = reader.last_change_id()
+
+    manifest_path = os.path.join(writer.manifest_dir, show_manifest.manifest_name('DIG'))
+    lines_before = sum(1 for line in open(manifest_path))
+    writer.compact('DIG')
+    assert sum(1 for line in open(manifest_path)) == 10 < lines_before
+
+    assert changes(reader, start) == []
+    assert reader.get_shot('DIG', 'sh000')['comment'] == '4'
+    writer.add_shot(shot('DIG', 'sh100'))
+    assert changes(reader, start) == [('DIG', 'sh100', 'upsert')]
+    assert reader.shot_count('DIG') == 11
+
+
+def test_followed_manifest_reports_changes_across_compaction(stores):
+    writer, reader = stores
+    writer.add_shots([shot('DIG', 'sh010'), shot('DIG', 'sh020')])
+    reader = ManifestStore(writer.metadata_path)  # Only follows the feed, never reads DIG in full
+    start = reader.last_change_id()
+    writer.add_shots([shot('DIG', 'sh030'), shot('DIG', 'sh040')])
+    assert changes(reader, start) == [('DIG', 'sh030', 'upsert'), ('DIG', 'sh040', 'upsert')]
+    start = reader.last_change_id()
+
+    writer.compact('DIG')
+    writer.remove_shot('DIG', 'sh030')
+    writer.update_shot('DIG', 'sh040', comment='after compaction')
+    assert sorted(changes(reader, start)) == [('DIG', 'sh030', 'delete'), ('DIG', 'sh040', 'upsert')]
+    assert [record['shot'] for record in reader.shots('DIG')] == ['sh010', 'sh020', 'sh040']
+
+
+def test_appends_trigger_compaction_and_keep_every_shot(stores, monkeypatch):
+    monkeypatch.setattr(show_manifest, 'COMPACT_MIN_LINES', 20)
+    writer, reader = stores
+    writer.add_shots([shot('DIG', f'sh{number:03d}') for number in range(5)])
+    for number in range(40):
+        (writer, reader)[number % 2].update_shot('DIG', 'sh000', comment=str(number))  # Outdated lines pile up
+
+    manifest_path = os.path.join(writer.manifest_dir, show_manifest.manifest_name('DIG'))
+    assert sum(1 for line in open(manifest_path)) <= 20
+    for store in ManifestStore(writer.metadata_path), writer, reader:
+        assert store.shot_count('DIG') == 5
+        assert store.get_shot('DIG', 'sh000')['comment'] == '39'
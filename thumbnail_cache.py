@@ -0,0 +1,329 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, QSize, Qt, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+from sequence_scanner import SequenceScanner, main_plate, plate_folder
+from shot_table_model import shot_key
+from instrumentation import span
+
+THUMBNAIL_DIR = os.path.join(os.path.expanduser('~/.nuke'), 'show_manager', 'thumbnails')
+MAX_CACHE_BYTES = int(os.environ.get('SHOW_MANAGER_THUMBNAIL_CACHE_MB', 256)) * 1024 * 1024
+THUMBNAIL_SIZE = QSize(128, 72)
+JPEG_QUALITY = 85
+MEMORY_THUMBNAILS = 600  # Decoded pixmaps kept per window, about 40 MB
+MAX_WORKERS = 4
+
+# Frame formats Qt can decode here, EXR and DPX need an image format plugin such as kimageformats
+READABLE_SUFFIXES = {'.' + bytes(name).decode().lower() for name in QImageReader.supportedImageFormats()}
+
+
+def representative_frame(shot, scanner):
+    """A frame from the middle of a shot's plate that Qt can read, or None.
+
+    The plate is the shot's footage if it was set, else its footages folder.
+    When the main plate can't be decoded the longest readable sequence next to
+    it is used, e.g. JPEG proxies of EXR plates.
+    """
+    footage = shot.get('footage') or ''
+    if footage and os.path.splitext(footage)[1].lower() in READABLE_SUFFIXES and os.path.isfile(footage):
+        return footage
+    folder = footage if footage and os.path.isdir(footage) else plate_folder(shot)
+
+    plate = main_plate([sequence for sequence in scanner.scan(folder)
+                        if sequence.suffix.lower() in READABLE_SUFFIXES])
+    if plate is None:
+        return None
+    frame = (plate.first + plate.last) // 2
+    for first, last in plate.gaps:
+        if first <= frame <= last:
+            frame = first - 1  # The frame before a gap always exists
+            break
+    return os.path.join(plate.folder, f'{plate.prefix}{frame:0{plate.padding}d}{plate.suffix}')
+
+
+def decode_thumbnail(path, size=THUMBNAIL_SIZE):
+    """Decode an image straight to thumbnail size, a null QImage if it can't be read.
+
+    Formats that support it (JPEG, TIFF) are downsampled while decoding
+    instead of decoding the full frame first.
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    full_size = reader.size()
+    if full_size.isValid():
+        reader.setScaledSize(full_size.scaled(size, Qt.KeepAspectRatio))
+    image = reader.read()
+    if not image.isNull() and (image.width() > size.width() or image.height() > size.height()):
+        image = image.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+class ThumbnailCache:
+    """Thumbnails on disk, named by a hash of the frame's path, mtime and size.
+
+    A changed frame gets a new name, so entries never need to be invalidated.
+    When the cache grows past max_bytes the least recently used entries are
+    deleted. Several processes can share a cache folder.
+    """
+
+    def __init__(self, cache_dir=THUMBNAIL_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None  # key -> [bytes, last used], read from disk before the first write
+        self._total = 0
+
+    def key(self, path, stat, size=THUMBNAIL_SIZE):
+        text = f'{os.path.normpath(path)}\0{stat.st_mtime_ns}\0{stat.st_size}\0{size.width()}x{size.height()}'
+        return hashlib.sha1(text.encode('utf-8', 'surrogateescape')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.jpg')
+
+    def get(self, key):
+        """Return the cached QImage of a key, or None."""
+        path = self.path(key)
+        image = QImage(path)
+        if image.isNull():
+            return None
+        now = time.time()
+        try:
+            os.utime(path, (now, now))  # The modification time is the last use, see _evict
+        except OSError:
+            pass
+        with self._lock:
+            if self._entries is not None and key in self._entries:
+                self._entries[key][1] = now
+        return image
+
+    def put(self, key, image):
+        path = self.path(key)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if not image.save(temp_path, 'JPG', JPEG_QUALITY):
+                return
+            os.replace(temp_path, path)  # Other processes never read a half written thumbnail
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f'Could not cache thumbnail {path}: {e}')
+            return
+
+        with self._lock:
+            if self._entries is None:
+                self._read_entries()
+            old_size = self._entries[key][0] if key in self._entries else 0
+            self._entries[key] = [size, time.time()]
+            self._total += size - old_size
+            expired = self._evict() if self._total > self.max_bytes else []
+        for expired_path in expired:
+            try:
+                os.remove(expired_path)
+            except OSError:
+                pass
+
+    def _read_entries(self):
+        self._entries = {}
+        self._total = 0
+        try:
+            folders = [entry.path for entry in os.scandir(self.cache_dir) if entry.is_dir()]
+        except OSError:
+            return
+        for folder in folders:
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.name.endswith('.jpg'):
+                            stat = entry.stat()
+                            self._entries[entry.name[:-4]] = [stat.st_size, stat.st_mtime]
+                            self._total += stat.st_size
+            except OSError:
+                continue
+
+    def _evict(self):
+        """Forget the least recently used entries down to 90% of max_bytes and return their paths."""
+        expired = []
+        for key, (size, last_used) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total <= self.max_bytes * 0.9:
+                break
+            del self._entries[key]
+            self._total -= size
+            expired.append(self.path(key))
+        return expired
+
+
+class ThumbnailLoader(QObject):
+    """Hands out shot thumbnails, decoding missing ones on a thread pool.
+
+    thumbnail() returns at once, with None while a thumbnail is being made;
+    thumbnail_ready is emitted when it is. Views ask only for the rows they
+    paint, so only rows in view are decoded, the newest requests first.
+    """
+
+    thumbnail_ready = Signal(str, str)  # show, shot
+    _decoded = Signal(str, str, int, QImage)  # show, shot, generation, image
+
+    def __init__(self, cache=None, scanner=None, workers=MAX_WORKERS, parent=None):
+        super().__init__(parent)
+        self.cache = cache or ThumbnailCache()
+        self.scanner = scanner or SequenceScanner()
+        self.workers = workers
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(workers)
+        self._pixmaps = OrderedDict()  # (show, shot) -> QPixmap, least recently used first
+        self._missing = set()  # Shots without a readable plate, asked again after invalidate()
+        self._lock = threading.Lock()
+        self._queue = []  # (key, shot, generation) to decode, the last one first
+        self._queued = {}  # key -> generation of its queued or running decode
+        self._running = 0
+        # Decodes are stamped with the generation they started in, those started before
+        # their shot was invalidated may have read the old plate and are dropped
+        self._generation = 0
+        self._invalidated = {}  # key -> generation it was last invalidated in
+        self._invalidated_all = 0
+        self._decoded.connect(self._on_decoded)
+
+    def thumbnail(self, shot):
+        """Return the shot's thumbnail QPixmap, or None if it has none or is being made."""
+        key = shot_key(shot)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            return pixmap
+        if key not in self._missing:
+            self._request(key, shot)
+        return None
+
+    def retain(self, keys):
+        """Drop queued decodes of shots whose key isn't in keys, e.g. rows scrolled out of view."""
+        with self._lock:
+            dropped = {item[0] for item in self._queue if item[0] not in keys}
+            self._queue = [item for item in self._queue if item[0] not in dropped]
+            for key in dropped:
+                self._queued.pop(key, None)
+
+    def invalidate(self, keys=None):
+        """Make the given shots, or all shots, look for their plate again when next shown."""
+        with self._lock:
+            self._generation += 1
+            if keys is None:
+                self._invalidated_all = self._generation
+                self._invalidated.clear()
+                self._queue = []
+                self._queued.clear()
+            else:
+                keys = set(keys)
+                for key in keys:
+                    self._invalidated[key] = self._generation
+                    self._queued.pop(key, None)  # Asked for again with the new plate
+                self._queue = [item for item in self._queue if item[0] not in keys]
+        if keys is None:
+            self._pixmaps.clear()
+            self._missing.clear()
+            return
+        for key in keys:
+            self._pixmaps.pop(key, None)
+            self._missing.discard(key)
+
+    def cancel(self, wait_msecs=2000):
+        """Stop decoding after the current frames, used when the window closes."""
+        with self._lock:
+            self._queue = []
+            self._queued.clear()
+        self.pool.waitForDone(wait_msecs)
+
+    def _request(self, key, shot):
+        with self._lock:
+            if key in self._queued:
+                return
+            self._queued[key] = self._generation
+            self._queue.append((key, shot, self._generation))
+            if self._running >= self.workers:
+                return  # A running job picks it up
+            self._running += 1
+        self.pool.start(_DecodeJob(self))
+
+    def _next(self):
+        with self._lock:
+            if not self._queue:
+                self._running -= 1
+                return None
+            return self._queue.pop()
+
+    def _load(self, shot):
+        frame = representative_frame(shot, self.scanner)
+        if frame is None:
+            return QImage()
+        stat = os.stat(frame)
+        key = self.cache.key(frame, stat)
+        image = self.cache.get(key)
+        if image is None:
+            with span('thumbnails.decode', frame=os.path.basename(frame)) as timing:
+                image = decode_thumbnail(frame)
+                timing.add(nbytes=stat.st_size)
+            if not image.isNull():
+                self.cache.put(key, image)
+        return image
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            key, shot, generation = item
+            try:
+                image = self._load(shot)
+            except OSError as e:
+                print(f'Could not make a thumbnail for {key[0]} {key[1]}: {e}')
+                image = QImage()
+            self._decoded.emit(key[0], key[1], generation, image)
+
+    def _on_decoded(self, show_name, shot_name, generation, image):
+        key = (show_name, shot_name)
+        with self._lock:
+            if self._queued.get(key) == generation:
+                del self._queued[key]
+            if generation < max(self._invalidated.get(key, 0), self._invalidated_all):
+                return  # Started before the shot changed, a newer decode is asked for
+        if image.isNull():
+            self._missing.add(key)
+            return
+        self._pixmaps[key] = QPixmap.fromImage(image)  # Pixmaps can only be made on the GUI thread
+        while len(self._pixmaps) > MEMORY_THUMBNAILS:
+            self._pixmaps.popitem(last=False)
+        self.thumbnail_ready.emit(show_name, shot_name)
+
+
+class _DecodeJob(QRunnable):
+    def __init__(self, loader):
+        super().__init__()
+        self.loader = loader
+
+    def run(self):
+        self.loader._run()
+
+
+def track_visible_rows(loader, view):
+    """Drop queued decodes of rows that left the view, shortly after it stops scrolling or is reset."""
+    timer = QTimer(view)
+    timer.setSingleShot(True)
+    timer.setInterval(100)
+
+    def retain():
+        model = view.model()
+        first = view.rowAt(0)
+        if first < 0:
+            loader.retain(set())
+            return
+        last = view.rowAt(view.viewport().height() - 1)
+        if last < 0:
+            last = model.rowCount() - 1
+        loader.retain({shot_key(model.shot_at(row)) for row in range(first, last + 1)})
+
+    timer.timeout.connect(retain)
+    view.verticalScrollBar().valueChanged.connect(timer.start)
+    view.model().modelReset.connect(timer.start)
+    return timer